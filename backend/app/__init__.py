@@ -1,13 +1,20 @@
 # backend/app/__init__.py
 from flask import Flask, jsonify
 from .config import Config
-from .extensions import db, jwt, cors, migrate, limiter
+from .extensions import (
+    db, jwt, cors, migrate, limiter, slow_query_log, compressor, replica_router,
+    idempotency, cold_storage, user_locks, habit_events,
+)
+from .utils import db_timeouts
+from .utils.db_routing import RoutingSession
+from .utils.json_provider import OrjsonProvider
 from sqlalchemy.exc import OperationalError
 
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.json = OrjsonProvider(app)
     app.url_map.strict_slashes = False
 
     # Init extensions
@@ -16,13 +23,26 @@ def create_app():
     cors.init_app(app)
     migrate.init_app(app, db)
     limiter.init_app(app)
+    slow_query_log.init_app(app, db)
+    compressor.init_app(app)
+    replica_router.init_app(app, db)
+    idempotency.init_app(app, db)
+    cold_storage.init_app(app)
+    user_locks.init_app(app)
+    habit_events.init_app(app)
+    db_timeouts.init_app(app, RoutingSession)
 
     # Register blueprints
     from .routes.auth import auth_bp
     from .routes.habits import habits_bp
+    from .routes.admin import admin_bp
 
     app.register_blueprint(auth_bp, url_prefix="/api/auth")
     app.register_blueprint(habits_bp, url_prefix="/api/habits")
+    app.register_blueprint(admin_bp, url_prefix="/api/admin")
+
+    from .commands import register_commands
+    register_commands(app)
 
     # Import models so Alembic/migrate sees them
     from app.models import user, habit, log, reset_token
@@ -30,6 +50,6 @@ def create_app():
     @app.errorhandler(OperationalError)
     def handle_operational_error(e):
         db.session.rollback()
-        return jsonify({"error": "database_unavailable"}), 503
+        return jsonify({"error": db_timeouts.operational_error_code(e)}), 503
 
     return app
@@ -0,0 +1,62 @@
+# app/asgi/__init__.py
+"""ASGI entry point serving the same API as the Flask app.
+
+The read endpoints of habits_bp and its per-habit writes (create,
+update, delete, archive, log, unlog) run natively on async SQLAlchemy,
+so a process waiting on the database holds a coroutine instead of a
+thread; the ``/events`` change stream likewise waits on the event loop.
+Both stacks share the validation and statements of
+``app.utils.habit_queries``. Writes carrying an Idempotency-Key are
+handed to Flask, which stores the keys.
+
+Every other route is served by the Flask app mounted underneath, in a
+bounded thread pool: auth_bp, whose time goes to pbkdf2 hashing and to
+Apple, Google and SMTP calls rather than to waiting on the database;
+and the rarer habit writes (bulk, unarchive, reminders) and admin. Native responses are
+compressed, and their statements timed, by the same compressor and
+slow-query log as the Flask app's.
+"""
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.routing import Mount
+
+from app.extensions import (
+    cold_storage, compressor, habit_events, limiter, replica_router, slow_query_log, user_locks,
+)
+from .compression import CompressionMiddleware
+from .database import AsyncDatabase
+from .habits import routes as habit_routes
+
+
+def create_asgi_app(flask_app=None):
+    if flask_app is None:
+        from app import create_app
+        flask_app = create_app()
+    config = flask_app.config
+    database = AsyncDatabase(config, replica_router, slow_query_log)
+
+    @asynccontextmanager
+    async def lifespan(app):
+        database.connect()
+        yield
+        await database.dispose()
+
+    flask = WSGIMiddleware(flask_app, workers=config["ASGI_WSGI_THREADS"])
+    app = Starlette(
+        routes=[*habit_routes("/api/habits"), Mount("/", flask)],
+        middleware=[Middleware(CompressionMiddleware, compressor=compressor, config=config)],
+        lifespan=lifespan,
+    )
+    app.state.config = config
+    app.state.db = database
+    app.state.cold_storage = cold_storage
+    app.state.habit_events = habit_events
+    app.state.flask = flask
+    app.state.limiter = limiter
+    app.state.replica_router = replica_router
+    app.state.user_locks = user_locks
+    return app
+
@@ -0,0 +1,45 @@
+# app/asgi/auth.py
+import jwt
+
+
+class AuthError(Exception):
+    def __init__(self, msg, status):
+        super().__init__(msg)
+        self.msg = msg
+        self.status = status
+
+
+def jwt_identity(request, config):
+    """Verify the Bearer access token the way ``jwt_required`` does.
+
+    Tokens are issued by the Flask app, so the flask_jwt_extended settings
+    it registered decide how they are decoded; failures carry the same
+    ``msg`` and status codes as its default callbacks.
+    """
+    header = request.headers.get(config["JWT_HEADER_NAME"])
+    if not header:
+        raise AuthError(f"Missing {config['JWT_HEADER_NAME']} Header", 401)
+    scheme, _, token = header.partition(" ")
+    if scheme != config["JWT_HEADER_TYPE"] or not token:
+        raise AuthError(
+            f"Missing '{config['JWT_HEADER_TYPE']}' type in '{config['JWT_HEADER_NAME']}' header."
+            f" Expected '{config['JWT_HEADER_NAME']}: {config['JWT_HEADER_TYPE']} <JWT>'",
+            401,
+        )
+
+    try:
+        data = jwt.decode(
+            token,
+            config["JWT_SECRET_KEY"],
+            algorithms=config["JWT_DECODE_ALGORITHMS"] or [config["JWT_ALGORITHM"]],
+            audience=config["JWT_DECODE_AUDIENCE"],
+            issuer=config["JWT_DECODE_ISSUER"],
+            leeway=config["JWT_DECODE_LEEWAY"],
+        )
+    except jwt.ExpiredSignatureError:
+        raise AuthError("Token has expired", 401) from None
+    except jwt.InvalidTokenError as e:
+        raise AuthError(str(e), 422) from None
+    if data.get("type") != "access":
+        raise AuthError("Only non-refresh tokens are allowed", 422)
+    return data[config["JWT_IDENTITY_CLAIM"]]
@@ -0,0 +1,96 @@
+# app/asgi/compression.py
+from starlette.datastructures import Headers, MutableHeaders
+from werkzeug.http import parse_accept_header
+
+
+class CompressionMiddleware:
+    """Compresses the native routes' responses with the Flask app's ``Compressor``.
+
+    Negotiation, thresholds, levels and the cache are those of
+    ``Compressor.after_request``. Responses that already carry a
+    Content-Encoding, as the mounted Flask app's do, pass through. A
+    handler sets ``request.state.compression_cacheable`` where a Flask view
+    would call ``mark_compression_cacheable``.
+    """
+
+    def __init__(self, app, compressor, config):
+        self.app = app
+        self.compressor = compressor
+        self.config = config
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        responder = _Responder(self.compressor, self.config, scope, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    def __init__(self, compressor, config, scope, send):
+        self.compressor = compressor
+        self.config = config
+        self.scope = scope
+        self._send = send
+        self.start = None
+        self.stream = None
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message  # held until the first body decides the headers
+        elif message["type"] != "http.response.body":
+            await self._send(message)
+        elif self.start is not None:
+            await self._begin(message)
+        elif self.stream is not None:
+            await self._send_chunk(message)
+        else:
+            await self._send(message)
+
+    async def _begin(self, message):
+        start, self.start = self.start, None
+        config = self.config
+        headers = MutableHeaders(raw=start["headers"])
+        mimetype = headers.get("content-type", "").partition(";")[0].strip()
+        if (
+            start["status"] < 200
+            or start["status"] in (204, 206, 304)
+            or "content-encoding" in headers
+            or mimetype not in config["COMPRESS_MIMETYPES"]
+        ):
+            await self._pass(start, message)
+            return
+
+        if "accept-encoding" not in headers.get("vary", "").lower():
+            headers.add_vary_header("Accept-Encoding")
+        accept = Headers(scope=self.scope).get("accept-encoding", "")
+        encoding = parse_accept_header(accept).best_match(self.compressor.available(config))
+        body, more = message.get("body", b""), message.get("more_body", False)
+        if not encoding or (not more and len(body) < config["COMPRESS_MIN_SIZE"]):
+            await self._pass(start, message)
+            return
+
+        level = self.compressor.level(config, encoding)
+        headers["Content-Encoding"] = encoding
+        if more:
+            del headers["Content-Length"]
+            self.stream = self.compressor.streams[encoding](level)
+            await self._send(start)
+            await self._send_chunk(message)
+            return
+        cacheable = self.scope.get("state", {}).get("compression_cacheable", False)
+        body = self.compressor.compress(body, encoding, level, cacheable)
+        headers["Content-Length"] = str(len(body))
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": body})
+
+    async def _pass(self, start, message):
+        await self._send(start)
+        await self._send(message)
+
+    async def _send_chunk(self, message):
+        more = message.get("more_body", False)
+        data = self.stream.compress(message.get("body", b""))
+        if not more:
+            data += self.stream.flush()
+        await self._send({"type": "http.response.body", "body": data, "more_body": more})
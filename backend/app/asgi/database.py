@@ -0,0 +1,105 @@
+# app/asgi/database.py
+import random
+from contextlib import asynccontextmanager
+
+from sqlalchemy import event, make_url, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.utils.db_routing import REPLICA_BIND_PREFIX
+from app.utils.db_timeouts import timeouts_sql
+
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_url(url):
+    """``url`` with its driver swapped for the asyncio one (asyncpg/aiosqlite)."""
+    url = make_url(url)
+    backend = url.get_backend_name()
+    url = url.set(drivername=ASYNC_DRIVERS.get(backend, url.drivername))
+    if backend == "postgresql" and "sslmode" in url.query:
+        # asyncpg spells libpq's sslmode as ssl
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url
+
+
+class AsyncDatabase:
+    """Async engines for the primary and the read replicas of ``SQLALCHEMY_BINDS``.
+
+    Reads go to a random replica unless ``replica_router`` pins the user to
+    the primary: a write recorded by the mounted Flask app in this process,
+    or a ``Last-Write`` header signed by any worker. Statements are
+    timed by ``slow_query_log`` like those of the Flask engines.
+    """
+
+    def __init__(self, config, replica_router=None, slow_query_log=None):
+        self.config = config
+        self.replica_router = replica_router
+        self.slow_query_log = slow_query_log
+        self.primary = None
+        self.replicas = []
+
+    def connect(self):
+        self.primary = self._engine(self.config["SQLALCHEMY_DATABASE_URI"])
+        self.replicas = [
+            self._engine(url)
+            for key, url in sorted(self.config.get("SQLALCHEMY_BINDS", {}).items())
+            if key.startswith(REPLICA_BIND_PREFIX)
+        ]
+
+    def _engine(self, url):
+        url = async_database_url(url)
+        # SQLite is only used in development and tests, where the sync
+        # engine also runs without pool options.
+        options = {} if url.get_backend_name() == "sqlite" else self.config["ASYNC_ENGINE_OPTIONS"]
+        engine = create_async_engine(url, **options)
+        if self.slow_query_log is not None:
+            self.slow_query_log.instrument(engine.sync_engine)
+        return engine
+
+    async def dispose(self):
+        for engine in [self.primary, *self.replicas]:
+            if engine is not None:
+                await engine.dispose()
+
+    def read_engine(self, user_id, last_write=None):
+        if not self.replicas:
+            return self.primary
+        if self.replica_router is not None and self.replica_router.pinned(user_id, last_write):
+            return self.primary
+        return random.choice(self.replicas)
+
+    @asynccontextmanager
+    async def session(self, user_id, statement_ms=None, last_write=None):
+        """A read-only session in one transaction, with Postgres timeouts applied."""
+        engine = self.read_engine(user_id, last_write)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            async with session.begin():
+                if engine.dialect.name == "postgresql":
+                    sql = timeouts_sql(
+                        statement_ms or self.config.get("DB_STATEMENT_TIMEOUT_MS", 0),
+                        self.config.get("DB_LOCK_TIMEOUT_MS", 0),
+                    )
+                    if sql:
+                        await session.execute(text(sql))
+                yield session
+
+    @asynccontextmanager
+    async def write_session(self):
+        """A session on the primary for a mutation, which commits or rolls back itself.
+
+        Like the Flask session, each transaction it begins gets the Postgres
+        timeouts first.
+        """
+        async with AsyncSession(self.primary, expire_on_commit=False) as session:
+            sql = timeouts_sql(
+                self.config.get("DB_STATEMENT_TIMEOUT_MS", 0),
+                self.config.get("DB_LOCK_TIMEOUT_MS", 0),
+            )
+            if sql and self.primary.dialect.name == "postgresql":
+                event.listen(
+                    session.sync_session, "after_begin",
+                    lambda session, transaction, connection: connection.exec_driver_sql(sql),
+                )
+            yield session
@@ -0,0 +1,496 @@
+# app/asgi/habits.py
+from datetime import date
+from functools import wraps
+
+import orjson
+from limits import parse as parse_limit
+from sqlalchemy.exc import IntegrityError, OperationalError
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from werkzeug.exceptions import TooManyRequests
+
+from app.models.habit import Habit
+from app.models.habit_counter import UserHabitCounter
+from app.models.habit_pause import HabitPause
+from app.models.log import HabitLog
+from app.reminders import reschedule
+from app.routes import habits as habit_routes
+from app.utils import habit_queries
+from app.utils.db_routing import LAST_WRITE_HEADER
+from app.utils.db_timeouts import operational_error_code
+from app.utils.events import STREAM_HEADERS
+from app.utils.habit_queries import is_applicable
+from app.utils.idempotency import HEADER as IDEMPOTENCY_HEADER
+from app.utils.json_provider import dumps
+from app.utils.pauses import PauseIndex, normalize_pauses
+from app.utils.slow_query import asgi_request
+from .auth import AuthError, jwt_identity
+
+
+class JSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
+
+
+def read_endpoint(statement_ms=None):
+    """Authenticate like ``jwt_required`` and run the handler in a read session.
+
+    The handler is called as ``handler(request, session, user_id)``, with
+    the identity as an int since asyncpg won't bind a str to an integer
+    column; a ``QueryError`` it raises becomes the same 400 the Flask
+    handler sends. Slow queries are logged under the Flask endpoint name.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        async def endpoint(request):
+            state = request.app.state
+            try:
+                user_id = jwt_identity(request, state.config)
+            except AuthError as e:
+                return JSONResponse({state.config["JWT_ERROR_MESSAGE_KEY"]: e.msg}, e.status)
+            context = asgi_request.set((f"habits.{fn.__name__}", user_id))
+            try:
+                last_write = request.headers.get(LAST_WRITE_HEADER)
+                async with state.db.session(user_id, statement_ms, last_write) as session:
+                    return await fn(request, session, int(user_id))
+            except habit_queries.QueryError as e:
+                return JSONResponse({"error": str(e)}, 400)
+            except OperationalError as e:
+                return JSONResponse({"error": operational_error_code(e)}, 503)
+            finally:
+                asgi_request.reset(context)
+        return endpoint
+    return decorator
+
+
+class FlaskFallback:
+    """Hands the request to the mounted Flask app, replaying a body already read."""
+
+    def __init__(self, request, body=None):
+        self.flask = request.app.state.flask
+        self.body = body
+
+    async def __call__(self, scope, receive, send):
+        if self.body is not None:
+            replayed, body = False, self.body
+
+            async def receive(receive=receive):
+                nonlocal replayed
+                if replayed:
+                    return await receive()
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+        await self.flask(scope, receive, send)
+
+
+async def json_body(request):
+    """The body as Flask's ``get_json(silent=True)`` reads it: None unless it is JSON."""
+    mimetype = request.headers.get("content-type", "").partition(";")[0].strip().lower()
+    if not (mimetype == "application/json" or (
+        mimetype.startswith("application/") and mimetype.endswith("+json")
+    )):
+        return None
+    try:
+        return orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        return None
+
+
+def _rate_limited(request, endpoint, user_id, limit):
+    """The 429 Flask-Limiter would send once ``limit`` is used up, else None."""
+    limiter = request.app.state.limiter
+    if not (limiter.enabled and limiter.initialized):
+        return None
+    item = parse_limit(limit)
+    if limiter.limiter.hit(item, "asgi", endpoint, str(user_id)):
+        return None
+    error = TooManyRequests(str(item))
+    return Response(error.get_body(), error.code, media_type="text/html")
+
+
+def write_endpoint(rate_limit=None):
+    """Authenticate like ``jwt_required`` and run the handler in a primary session.
+
+    The handler is called as ``handler(request, session, user_id)``, as
+    by ``read_endpoint``, and commits its own changes. As habits_bp's hooks do, the write pins the
+    user's reads to the primary and ``rate_limit`` is Flask-Limiter's. A
+    request carrying an Idempotency-Key goes to the mounted Flask app,
+    which keeps the keys.
+    """
+    def decorator(fn):
+        endpoint_name = f"habits.{fn.__name__}"
+
+        @wraps(fn)
+        async def endpoint(request):
+            state = request.app.state
+            if IDEMPOTENCY_HEADER in request.headers:
+                return FlaskFallback(request)
+            try:
+                user_id = jwt_identity(request, state.config)
+            except AuthError as e:
+                return JSONResponse({state.config["JWT_ERROR_MESSAGE_KEY"]: e.msg}, e.status)
+            if rate_limit:
+                limited = _rate_limited(request, endpoint_name, user_id, rate_limit)
+                if limited:
+                    return limited
+            context = asgi_request.set((endpoint_name, user_id))
+            try:
+                async with state.db.write_session() as session:
+                    response = await fn(request, session, int(user_id))
+            except habit_queries.QueryError as e:
+                response = JSONResponse({"error": str(e)}, 400)
+            except OperationalError as e:
+                response = JSONResponse({"error": operational_error_code(e)}, 503)
+            finally:
+                asgi_request.reset(context)
+            if isinstance(response, FlaskFallback):
+                return response
+            state.replica_router.record_write(user_id)
+            response.headers[LAST_WRITE_HEADER] = state.replica_router.write_token(user_id)
+            return response
+        return endpoint
+    return decorator
+
+
+async def publish(request, user_id, event_type, data):
+    """Publish a committed change, as habits_bp does after a successful response."""
+    await run_in_threadpool(request.app.state.habit_events.publish, user_id, event_type, data)
+
+
+def mark_compression_cacheable(request):
+    request.state.compression_cacheable = True
+
+
+async def _cold_before(request, session, user_id, lock=False):
+    if not request.app.state.cold_storage.enabled:
+        return None
+    return await session.scalar(habit_queries.cold_before_query(user_id, lock))
+
+
+async def merge_cold_logs(request, session, user_id, rows, habit_ids, start, end):
+    """``ColdStorage.merge_logs``, reading the file off the event loop when needed."""
+    before = await _cold_before(request, session, user_id)
+    if before is None or start >= before:
+        return rows
+    return await run_in_threadpool(
+        request.app.state.cold_storage.merge_logs, user_id, before, rows, habit_ids, start, end
+    )
+
+
+@read_endpoint(statement_ms=5000)
+async def list_habits(request, session, user_id):
+    selected_date, fields, limit, after = habit_queries.parse_habit_list(request.query_params)
+    query = habit_queries.habit_list_query(user_id, selected_date, fields, limit, after)
+    rows = (await session.execute(query)).all()
+    pauses = (await session.execute(
+        habit_queries.pauses_query([row.id for row in rows])
+    )).all() if rows and "pauses" in fields else []
+    return JSONResponse(habit_queries.habit_list_payload(rows, pauses, fields, limit))
+
+
+@read_endpoint()
+async def archived_habits(request, session, user_id):
+    habits = (await session.scalars(habit_queries.archived_habits_query(user_id))).all()
+    return JSONResponse(habit_queries.archived_habits_payload(habits))
+
+
+@read_endpoint(statement_ms=5000)
+async def habit_logs(request, session, user_id):
+    habit_id = request.path_params["habit_id"]
+    owned = (await session.execute(habit_queries.owned_habit_query(habit_id, user_id))).first()
+    if not owned:
+        return JSONResponse({"error": "Habit not found"}, 404)
+
+    before, limit, encoding = habit_queries.parse_log_page(request.query_params)
+    dates = (await session.scalars(habit_queries.log_page_query(habit_id, before, limit))).all()
+    cold_before = await _cold_before(request, session, user_id)
+    if cold_before is not None:
+        dates = await run_in_threadpool(
+            request.app.state.cold_storage.merge_log_page,
+            user_id, cold_before, habit_id, before, dates, limit,
+        )
+    return JSONResponse(habit_queries.log_page_payload(habit_id, dates, limit, encoding))
+
+
+@read_endpoint(statement_ms=5000)
+async def log_summary(request, session, user_id):
+    start_date, end_date, encoding, axis = habit_queries.parse_log_summary(request.query_params)
+    if end_date < date.today():
+        mark_compression_cacheable(request)
+    habit_ids = (await session.scalars(habit_queries.habit_ids_query(user_id))).all()
+    logs = (await session.execute(
+        habit_queries.logs_between_query(habit_ids, start_date, end_date)
+    )).all()
+    logs = await merge_cold_logs(
+        request, session, user_id, logs, habit_ids, start_date, end_date
+    )
+    return JSONResponse(habit_queries.log_summary_payload(
+        logs, habit_ids, start_date, end_date, encoding, axis
+    ))
+
+
+@read_endpoint(statement_ms=5000)
+async def daily_summary(request, session, user_id):
+    selected_date = habit_queries.parse_daily_summary(request.query_params)
+    applicable = (await session.execute(
+        habit_queries.daily_habits_query(user_id, selected_date)
+    )).all()
+    habit_ids = [h.id for h in applicable]
+    logged_ids = set(await session.scalars(
+        habit_queries.logged_on_query(habit_ids, selected_date)
+    ))
+    logged_ids.update(habit_id for habit_id, _ in await merge_cold_logs(
+        request, session, user_id, [], habit_ids, selected_date, selected_date
+    ))
+    return JSONResponse(habit_queries.daily_summary_payload(
+        applicable, logged_ids, selected_date, date.today()
+    ))
+
+
+@read_endpoint(statement_ms=5000)
+async def calendar_summary(request, session, user_id):
+    month_days = habit_queries.parse_calendar_summary(request.query_params)
+    if month_days[-1] < date.today():
+        mark_compression_cacheable(request)
+    habits = (await session.execute(habit_queries.schedule_habits_query(user_id))).all()
+    if not habits:
+        return JSONResponse({})  # No habits for user
+
+    habit_ids = [h.id for h in habits]
+    pauses = (await session.execute(habit_queries.pauses_query(habit_ids))).all()
+    logs = (await session.execute(
+        habit_queries.logs_between_query(habit_ids, month_days[0], month_days[-1])
+    )).all()
+    logs = await merge_cold_logs(
+        request, session, user_id, logs, habit_ids, month_days[0], month_days[-1]
+    )
+    return JSONResponse(habit_queries.calendar_summary_payload(
+        habits, pauses, logs, month_days, date.today()
+    ))
+
+
+@read_endpoint(statement_ms=5000)
+async def week_grid(request, session, user_id):
+    days = habit_queries.parse_week_grid(request.query_params)
+    habits = (await session.execute(habit_queries.schedule_habits_query(user_id))).all()
+    habit_ids = [h.id for h in habits]
+    pauses, logs = [], []
+    if habit_ids:
+        pauses = (await session.execute(habit_queries.pauses_query(habit_ids))).all()
+        logs = (await session.execute(
+            habit_queries.logs_between_query(habit_ids, days[0], days[-1])
+        )).all()
+    logs = await merge_cold_logs(request, session, user_id, logs, habit_ids, days[0], days[-1])
+    today = date.today()
+    if days[-1] < today:
+        mark_compression_cacheable(request)
+    return JSONResponse(habit_queries.week_grid_payload(habits, pauses, logs, days, today))
+
+
+async def _user_habit(session, habit_id, user_id):
+    return (await session.scalars(habit_queries.user_habit_query(habit_id, user_id))).first()
+
+
+async def _open_pause(session, habit_id):
+    return (await session.scalars(habit_queries.open_pause_query(habit_id))).first()
+
+
+async def _flush_unique_name(session, user_id, name):
+    """``_flush_unique_name`` of the Flask handlers."""
+    try:
+        await session.flush()
+        return None
+    except IntegrityError as e:
+        await session.rollback()
+        if "uniq_habit_name_per_user" not in str(e.orig):
+            raise
+    existing = (await session.execute(habit_queries.name_conflict_query(user_id, name))).first()
+    return JSONResponse(habit_queries.name_conflict_payload(existing), 409)
+
+
+async def _scheduled_on(session, habit, log_date):
+    pauses = (await session.execute(habit_queries.pauses_query([habit.id]))).all()
+    return is_applicable(habit, log_date, PauseIndex(pauses))
+
+
+@write_endpoint()
+async def create_habit(request, session, user_id):
+    data = await json_body(request)
+    if data is None:
+        return FlaskFallback(request, await request.body())  # Flask's 400/415
+    name, start_date, frequency, days = habit_queries.parse_habit_body(data)
+
+    habit = Habit(
+        name=name,
+        user_id=user_id,
+        start_date=start_date,
+        frequency=frequency,
+        days_of_week=days,
+    )
+    await request.app.state.user_locks.alock(session, user_id)
+    session.add(habit)
+    conflict = await _flush_unique_name(session, user_id, name)
+    if conflict:
+        return conflict
+
+    active_count, total_count = await session.run_sync(
+        lambda sync_session: UserHabitCounter.counts_after_insert(user_id, sync_session)
+    )
+    if active_count > habit_routes.MAX_ACTIVE_HABITS:
+        await session.rollback()
+        return JSONResponse({"error": "active_habit_limit_reached"}, 400)
+    if total_count > habit_routes.MAX_TOTAL_HABITS:
+        await session.rollback()
+        return JSONResponse({"error": "total_habit_limit_reached"}, 400)
+
+    payload = {"message": "Habit created", "habit": habit_queries.habit_payload(habit)}
+    await session.commit()
+    await publish(request, user_id, "habit.created", payload["habit"])
+    return JSONResponse(payload)
+
+
+@write_endpoint()
+async def update_habit(request, session, user_id):
+    data = await json_body(request)
+    if data is None:
+        return FlaskFallback(request, await request.body())
+    habit_id = request.path_params["habit_id"]
+    habit = await _user_habit(session, habit_id, user_id)
+    if not habit:
+        return JSONResponse({"error": "Habit not found"}, 404)
+    name, _, frequency, days = habit_queries.parse_habit_body(data, habit)
+
+    habit.name = name
+    habit.frequency = frequency
+    habit.days_of_week = days
+    conflict = await _flush_unique_name(session, user_id, name)
+    if conflict:
+        return conflict
+    await session.run_sync(lambda sync_session: reschedule([habit_id], session=sync_session))
+
+    payload = {"message": "Habit updated successfully", "habit": habit_queries.habit_payload(habit)}
+    await session.commit()
+    await publish(request, user_id, "habit.updated", payload["habit"])
+    return JSONResponse(payload)
+
+
+@write_endpoint()
+async def delete_habit(request, session, user_id):
+    habit_id = request.path_params["habit_id"]
+    habit = await _user_habit(session, habit_id, user_id)
+    if not habit:
+        return JSONResponse({"error": "Habit not found"}, 404)
+
+    await request.app.state.user_locks.alock(session, user_id)
+    await session.delete(habit)
+    await session.commit()
+    await publish(request, user_id, "habit.deleted", {"id": habit_id})
+    return JSONResponse({"message": "Habit deleted successfully"})
+
+
+@write_endpoint()
+async def archive_habit(request, session, user_id):
+    habit_id = request.path_params["habit_id"]
+    habit = await _user_habit(session, habit_id, user_id)
+    if not habit:
+        return JSONResponse({"error": "Habit not found"}, 404)
+
+    await request.app.state.user_locks.alock(session, user_id)
+    if not await _open_pause(session, habit_id):
+        session.add(HabitPause(habit_id=habit_id, start_date=date.today()))
+        await session.run_sync(normalize_pauses, [habit_id])
+        paused_since = (await _open_pause(session, habit_id)).start_date
+        await session.commit()
+        await publish(
+            request, user_id, "habit.archived", {"id": habit_id, "pause_start_date": paused_since}
+        )
+    return JSONResponse({"habit": {"id": habit.id, "name": habit.name}})
+
+
+@write_endpoint(rate_limit="10/minute")
+async def log_habit(request, session, user_id):
+    habit_id = request.path_params["habit_id"]
+    habit = await _user_habit(session, habit_id, user_id)
+    if not habit:
+        return JSONResponse({"error": "Habit not found"}, 404)
+    log_date = habit_queries.parse_log_date(await json_body(request) or {})
+    if not await _scheduled_on(session, habit, log_date):
+        return JSONResponse({"error": "Habit not scheduled for this date"}, 400)
+
+    already = {"message": "Habit already logged for this date"}
+    if (await session.scalars(habit_queries.habit_log_query(habit_id, log_date))).first():
+        return JSONResponse(already)
+    cold_before = await _cold_before(request, session, user_id)
+    if cold_before is not None and await run_in_threadpool(
+        request.app.state.cold_storage.contains, user_id, cold_before, habit_id, log_date
+    ):
+        return JSONResponse(already)
+
+    session.add(HabitLog(habit_id=habit_id, date=log_date))
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        return JSONResponse(already)
+    await publish(request, user_id, "log.created", {"habit_id": habit_id, "date": log_date})
+    return JSONResponse({"message": "Habit logged"})
+
+
+@write_endpoint(rate_limit="10/minute")
+async def unlog_habit(request, session, user_id):
+    habit_id = request.path_params["habit_id"]
+    habit = await _user_habit(session, habit_id, user_id)
+    if not habit:
+        return JSONResponse({"error": "Habit not found"}, 404)
+    log_date = habit_queries.parse_log_date(await json_body(request) or {})
+    if not await _scheduled_on(session, habit, log_date):
+        return JSONResponse({"error": "Habit not scheduled for this date"}, 400)
+
+    log = (await session.scalars(habit_queries.habit_log_query(habit_id, log_date))).first()
+    if not log:
+        # The archive row lock keeps `flask cold-logs archive` off the file meanwhile
+        cold_before = await _cold_before(request, session, user_id, lock=True)
+        if not await run_in_threadpool(
+            request.app.state.cold_storage.discard, user_id, cold_before, habit_id, log_date
+        ):
+            return JSONResponse({"message": "No log found for this date"}, 404)
+    else:
+        await session.delete(log)
+    await session.commit()
+    await publish(request, user_id, "log.deleted", {"habit_id": habit_id, "date": log_date})
+    return JSONResponse({"message": "Habit log undone"})
+
+
+async def habit_event_stream(request):
+    """The SSE change stream; it holds no session, only a queue on the loop."""
+    state = request.app.state
+    try:
+        user_id = jwt_identity(request, state.config)
+    except AuthError as e:
+        return JSONResponse({state.config["JWT_ERROR_MESSAGE_KEY"]: e.msg}, e.status)
+    body = await state.habit_events.astream(user_id, request.headers.get("last-event-id"))
+    return StreamingResponse(body, media_type="text/event-stream", headers=STREAM_HEADERS)
+
+
+def routes(prefix):
+    """Routes served natively; anything else falls through to Flask."""
+    return [
+        Route(f"{prefix}/", create_habit, methods=["POST"]),
+        Route(f"{prefix}/{{habit_id:int}}", update_habit, methods=["PUT"]),
+        Route(f"{prefix}/{{habit_id:int}}", delete_habit, methods=["DELETE"]),
+        Route(f"{prefix}/{{habit_id:int}}/archive", archive_habit, methods=["POST"]),
+        Route(f"{prefix}/{{habit_id:int}}/log", log_habit, methods=["POST"]),
+        Route(f"{prefix}/{{habit_id:int}}/unlog", unlog_habit, methods=["POST"]),
+        Route(f"{prefix}/", list_habits, methods=["GET"]),
+        Route(prefix, list_habits, methods=["GET"]),
+        Route(f"{prefix}/archived", archived_habits, methods=["GET"]),
+        Route(f"{prefix}/{{habit_id:int}}/logs", habit_logs, methods=["GET"]),
+        Route(f"{prefix}/log-summary", log_summary, methods=["GET"]),
+        Route(f"{prefix}/daily-summary", daily_summary, methods=["GET"]),
+        Route(f"{prefix}/calendar-summary", calendar_summary, methods=["GET"]),
+        Route(f"{prefix}/week-grid", week_grid, methods=["GET"]),
+        Route(f"{prefix}/events", habit_event_stream, methods=["GET"]),
+    ]
@@ -0,0 +1,126 @@
+# app/commands.py
+from datetime import date, timedelta
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.extensions import cold_storage, db
+from app.utils import log_partitions
+from app.utils.pauses import normalize_pauses
+
+
+@click.command("compact-pauses")
+@with_appcontext
+def compact_pauses():
+    """Merge overlapping/adjacent habit pauses and drop empty ones."""
+    removed = normalize_pauses(db.session)
+    db.session.commit()
+    click.echo(f"Removed {removed} redundant pause rows.")
+
+
+@click.command("run-reminders")
+@with_appcontext
+def run_reminders():
+    """Run the reminder scheduler until interrupted."""
+    from app.reminders import ReminderScheduler
+
+    ReminderScheduler(current_app._get_current_object()).run()
+
+
+@click.group("habit-log-partitions")
+def habit_log_partitions():
+    """Maintain the date partitions of habit_log (Postgres)."""
+
+
+@habit_log_partitions.command("ensure")
+@click.option("--ahead", type=int, default=None, help="Periods to create past the current one.")
+@with_appcontext
+def ensure_log_partitions(ahead):
+    """Create upcoming partitions and drain the default partition; run daily."""
+    interval = current_app.config["HABIT_LOG_PARTITION_INTERVAL"]
+    if ahead is None:
+        ahead = current_app.config["HABIT_LOG_PARTITIONS_AHEAD"]
+    with db.engine.begin() as connection:
+        if not log_partitions.is_partitioned(connection):
+            raise click.ClickException("habit_log is not partitioned.")
+        created = log_partitions.ensure_partitions(
+            connection, interval, log_partitions.horizon(date.today(), interval, ahead)
+        )
+    click.echo(f"Created {len(created)} partitions: {', '.join(created) or '-'}")
+
+
+@habit_log_partitions.command("compact")
+@click.option(
+    "--before", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+    help="Only partitions that end on or before this date (default: the current period).",
+)
+@with_appcontext
+def compact_log_partitions(before):
+    """Rewrite past partitions one at a time, then VACUUM them for index-only reads."""
+    interval = current_app.config["HABIT_LOG_PARTITION_INTERVAL"]
+    before = before.date() if before else log_partitions.period_start(date.today(), interval)
+    with db.engine.connect() as connection:
+        partitions = log_partitions.list_partitions(connection)
+    names = [name for name, _, upper in partitions if upper <= before]
+    for name in names:
+        with db.engine.begin() as connection:
+            log_partitions.compact_partition(connection, name)
+        # VACUUM refuses to run inside a transaction
+        with db.engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(db.text(f"VACUUM (ANALYZE) {name}"))
+        click.echo(f"Compacted {name}")
+
+
+@habit_log_partitions.command("archive")
+@click.option(
+    "--before", required=True, type=click.DateTime(formats=["%Y-%m-%d"]),
+    help="Detach partitions that end on or before this date.",
+)
+@click.option("--drop", is_flag=True, help="Drop detached partitions instead of archiving them.")
+@with_appcontext
+def archive_log_partitions(before, drop):
+    """Detach old partitions into the habit_log_archive schema."""
+    with db.engine.begin() as connection:
+        detached = log_partitions.archive_partitions(connection, before.date(), drop=drop)
+    action = "Dropped" if drop else f"Moved to {log_partitions.ARCHIVE_SCHEMA}"
+    click.echo(f"{action}: {', '.join(detached) or '-'}")
+
+
+@click.group("cold-logs")
+def cold_logs():
+    """Move old habit logs to cold storage (COLD_STORAGE_URL)."""
+
+
+@cold_logs.command("archive")
+@click.option(
+    "--before", type=click.DateTime(formats=["%Y-%m-%d"]), default=None,
+    help="Archive logs dated before this day (default: COLD_LOG_HORIZON_DAYS ago).",
+)
+@with_appcontext
+def archive_cold_logs(before):
+    """Move logs older than the horizon into per-user cold files; run daily."""
+    from app.models.habit import Habit
+    from app.models.log import HabitLog
+
+    if not cold_storage.enabled:
+        raise click.ClickException("COLD_STORAGE_URL is not set.")
+    before = before.date() if before else date.today() - timedelta(days=cold_storage.horizon_days)
+    user_ids = db.session.scalars(
+        db.select(Habit.user_id).distinct()
+        .join(HabitLog, HabitLog.habit_id == Habit.id)
+        .where(HabitLog.date < before)
+        .order_by(Habit.user_id)
+    ).all()
+    moved = 0
+    for user_id in user_ids:
+        moved += cold_storage.archive_user(db.session, user_id, before)
+        db.session.commit()
+    click.echo(f"Archived {moved} logs dated before {before} for {len(user_ids)} users.")
+
+
+def register_commands(app):
+    app.cli.add_command(compact_pauses)
+    app.cli.add_command(run_reminders)
+    app.cli.add_command(habit_log_partitions)
+    app.cli.add_command(cold_logs)
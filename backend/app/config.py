@@ -6,20 +6,138 @@ from datetime import timedelta
 load_dotenv()
 
 
+def server_concurrency(env=os.environ):
+    """``(workers, threads)`` per gunicorn process; gunicorn.conf.py reads the same."""
+    workers = max(1, int(env.get("WEB_CONCURRENCY", "1")))
+    threads = max(1, int(env.get("GUNICORN_THREADS", "5")))
+    return workers, threads
+
+
+def engine_options(env=os.environ, asyncio=False):
+    """SQLAlchemy engine options for the DB_CONNECTION_PROFILE in ``env``.
+
+    ``direct`` keeps a per-process pool sized from the worker/thread count.
+    ``pgbouncer`` hands pooling to a transaction-pooling proxy: no local
+    pool and no server-side prepared statements, which do not survive
+    being moved between server connections. ``asyncio`` sizes the pool for
+    the asyncpg engine of the ASGI entry point, where one process serves
+    ASYNC_DB_POOL_SIZE concurrent queries instead of one per thread.
+    """
+    profile = env.get("DB_CONNECTION_PROFILE", "direct")
+    url = env.get("DATABASE_URL") or ""
+
+    if profile == "pgbouncer":
+        from sqlalchemy.pool import NullPool
+
+        connect_args = {}
+        if asyncio or url.startswith("postgresql+asyncpg:"):
+            connect_args["statement_cache_size"] = 0
+        elif url.startswith("postgresql+psycopg:"):
+            connect_args["prepare_threshold"] = None
+        return {"poolclass": NullPool, "connect_args": connect_args}
+
+    if profile != "direct":
+        raise RuntimeError(f"Unknown DB_CONNECTION_PROFILE: {profile}")
+
+    workers, threads = server_concurrency(env)
+    if asyncio:
+        threads = max(1, int(env.get("ASYNC_DB_POOL_SIZE", "20")))
+    pool_size, max_overflow = threads, threads
+    if env.get("DB_MAX_CONNECTIONS"):
+        per_worker = max(1, int(env["DB_MAX_CONNECTIONS"]) // workers)
+        pool_size = min(threads, per_worker)
+        max_overflow = per_worker - pool_size
+    return {
+        "pool_pre_ping": True,
+        "pool_recycle": int(env.get("DB_POOL_RECYCLE", "300")),
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": int(env.get("DB_POOL_TIMEOUT", "10")),
+    }
+
+
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
-    SQLALCHEMY_ENGINE_OPTIONS = {
-        "pool_pre_ping": True,
-        "pool_recycle": 300,
-        "pool_size": 5,
-        "max_overflow": 5,
-        "pool_timeout": 10,
+    # Comma-separated read replicas; GET requests in habits_bp read from them
+    SQLALCHEMY_BINDS = {
+        f"replica_{i}": url.strip()
+        for i, url in enumerate(os.getenv("DATABASE_REPLICA_URLS", "").split(","))
+        if url.strip()
     }
+    READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    # Clients echo the Last-Write header on reads; browsers only see it exposed
+    CORS_EXPOSE_HEADERS = ["Last-Write"]
+    IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options()
+    # Async engine used by the ASGI entry point (asgi.py) for habit reads
+    ASYNC_ENGINE_OPTIONS = engine_options(asyncio=True)
+    ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "10"))
+
+    # Postgres timeouts applied with SET LOCAL per transaction (0 disables);
+    # endpoints can tighten them with app.utils.db_timeouts.db_timeouts
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+    DB_LOCK_TIMEOUT_MS = int(os.getenv("DB_LOCK_TIMEOUT_MS", "5000"))
+
+    # habit_log range partitions on Postgres (`flask habit-log-partitions`)
+    HABIT_LOG_PARTITION_INTERVAL = os.getenv("HABIT_LOG_PARTITION_INTERVAL", "year")
+    HABIT_LOG_PARTITIONS_AHEAD = int(os.getenv("HABIT_LOG_PARTITIONS_AHEAD", "1"))
+
+    # Cold storage for old habit logs (`flask cold-logs archive`): a directory,
+    # file:// path or s3://bucket/prefix; empty keeps every log in habit_log
+    COLD_STORAGE_URL = os.getenv("COLD_STORAGE_URL", "")
+    COLD_STORAGE_ENDPOINT_URL = os.getenv("COLD_STORAGE_ENDPOINT_URL") or None
+    COLD_LOG_HORIZON_DAYS = int(os.getenv("COLD_LOG_HORIZON_DAYS", "1095"))
 
     # JWT
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-key")
     if not JWT_SECRET_KEY:
         raise RuntimeError("JWT_SECRET_KEY environment variable is required")
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=365)
+
+    # Top-level JSON arrays/objects longer than this are streamed
+    JSON_STREAM_THRESHOLD = int(os.getenv("JSON_STREAM_THRESHOLD", "500"))
+
+    # Response compression (br/zstd are used when their packages are installed)
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "1024"))
+    COMPRESS_GZIP_LEVEL = int(os.getenv("COMPRESS_GZIP_LEVEL", "6"))
+    COMPRESS_BR_LEVEL = int(os.getenv("COMPRESS_BR_LEVEL", "5"))
+    COMPRESS_ZSTD_LEVEL = int(os.getenv("COMPRESS_ZSTD_LEVEL", "3"))
+
+    # Slow-query log
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "250"))
+    SLOW_QUERY_LOG_SIZE = int(os.getenv("SLOW_QUERY_LOG_SIZE", "200"))
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0"))
+
+    # Per-user lock around habit-limit checks; longer waits are logged
+    USER_LOCK_WARN_MS = float(os.getenv("USER_LOCK_WARN_MS", "100"))
+
+    # Live change stream (GET /api/habits/events). Empty broker URL: in-process,
+    # single node; postgresql://... (LISTEN/NOTIFY) or redis://... across nodes.
+    # A postgresql URL must use psycopg2 and reach Postgres directly, not pgbouncer.
+    EVENT_BROKER_URL = os.getenv("EVENT_BROKER_URL", "")
+    EVENT_STREAM_SECONDS = float(os.getenv("EVENT_STREAM_SECONDS", "25"))
+    EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+    EVENT_REPLAY_SIZE = int(os.getenv("EVENT_REPLAY_SIZE", "100"))
+    # Each open stream holds a WSGI worker for EVENT_STREAM_SECONDS, so the
+    # Flask route answers 501 unless the workers are threaded or gevent;
+    # the ASGI entry point always streams
+    EVENT_STREAM_WSGI = os.getenv("EVENT_STREAM_WSGI", "false").lower() in ("1", "true")
+
+    # Comma-separated user ids allowed to read /api/admin endpoints
+    ADMIN_USER_IDS = {
+        uid.strip() for uid in os.getenv("ADMIN_USER_IDS", "").split(",") if uid.strip()
+    }
+
+    # Reminder scheduler (`flask run-reminders`)
+    REMINDER_PUSH_SENDER = os.getenv(
+        "REMINDER_PUSH_SENDER", "app.reminders.senders:LogPushSender"
+    )
+    REMINDER_TICK_SECONDS = float(os.getenv("REMINDER_TICK_SECONDS", "1"))
+    REMINDER_LOAD_INTERVAL_SECONDS = float(os.getenv("REMINDER_LOAD_INTERVAL_SECONDS", "30"))
+    REMINDER_LOAD_HORIZON_SECONDS = float(os.getenv("REMINDER_LOAD_HORIZON_SECONDS", "120"))
+    REMINDER_STALE_SECONDS = float(os.getenv("REMINDER_STALE_SECONDS", "900"))
+    REMINDER_BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "1000"))
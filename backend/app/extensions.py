@@ -5,11 +5,25 @@ from flask_cors import CORS
 from flask_migrate import Migrate
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from app.utils.cold_logs import ColdStorage
+from app.utils.compression import Compressor
+from app.utils.db_routing import ReplicaRouter, RoutingSession
+from app.utils.events import HabitEvents
+from app.utils.idempotency import Idempotency
+from app.utils.slow_query import SlowQueryLog
+from app.utils.user_locks import UserLocks
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager()
 cors = CORS()
 migrate = Migrate()
+slow_query_log = SlowQueryLog()
+compressor = Compressor()
+replica_router = ReplicaRouter()
+idempotency = Idempotency()
+cold_storage = ColdStorage()
+user_locks = UserLocks()
+habit_events = HabitEvents()
 
 
 def rate_limit_key():
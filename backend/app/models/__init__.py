@@ -3,3 +3,7 @@ from .habit import Habit
 from .log import HabitLog
 from .reset_token import PasswordResetToken
 from .habit_pause import HabitPause
+from .habit_counter import UserHabitCounter
+from .reminder import HabitReminder
+from .idempotency import IdempotencyKey
+from .cold_log_archive import ColdLogArchive
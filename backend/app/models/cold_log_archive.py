@@ -0,0 +1,16 @@
+# backend/app/models/cold_log_archive.py
+from datetime import datetime
+
+from app.extensions import db
+
+
+class ColdLogArchive(db.Model):
+    """A user's logs dated before ``before`` were moved to cold storage."""
+
+    __tablename__ = "cold_log_archives"
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    before = db.Column(db.Date, nullable=False)
+    log_count = db.Column(db.Integer, nullable=False, default=0)
+    archived_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
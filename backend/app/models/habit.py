@@ -1,8 +1,18 @@
 # backend/app/models/habit.py
 from datetime import date
+from sqlalchemy import event, inspect
 from app.extensions import db
 from .habit_pause import HabitPause
 
+ALL_DAYS_MASK = 0b1111111
+
+
+def weekday_mask(frequency, days_of_week):
+    """Bit ``d`` set for each weekday (0=Mon..6=Sun) the habit is scheduled on."""
+    if frequency == 'WEEKLY':
+        return sum(1 << d for d in set(days_of_week or ()))
+    return ALL_DAYS_MASK
+
 class Habit(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -15,6 +25,62 @@ class Habit(db.Model):
         default='DAILY'
     )
     days_of_week = db.Column(db.ARRAY(db.Integer), nullable=True)
+    weekday_mask = db.Column(
+        db.SmallInteger, nullable=False, default=ALL_DAYS_MASK, server_default=str(ALL_DAYS_MASK)
+    )
 
     logs = db.relationship('HabitLog', backref='habit', lazy=True, cascade='all, delete-orphan')
-    pauses = db.relationship('HabitPause', backref='habit', lazy=True, cascade='all, delete-orphan')
+    pauses = db.relationship(
+        'HabitPause',
+        backref='habit',
+        lazy=True,
+        cascade='all, delete-orphan',
+        order_by='HabitPause.start_date'
+    )
+    reminder = db.relationship(
+        'HabitReminder',
+        backref='habit',
+        uselist=False,
+        lazy=True,
+        cascade='all, delete-orphan'
+    )
+
+    __table_args__ = (
+        db.Index('uniq_habit_name_per_user', user_id, db.func.lower(name), unique=True),
+    )
+
+    @classmethod
+    def applicable_on(cls, check_date, day_bit=None):
+        """SQL criterion mirroring ``is_applicable`` for a single date.
+
+        Inside a ``lambda_stmt`` pass ``day_bit`` (``1 << check_date.weekday()``)
+        computed outside the lambda, which can't call its closure values.
+        """
+        if day_bit is None:
+            day_bit = 1 << check_date.weekday()
+        covering_pause = (
+            db.select(HabitPause.id)
+            .where(
+                HabitPause.habit_id == cls.id,
+                HabitPause.start_date <= check_date,
+                db.or_(HabitPause.end_date.is_(None), HabitPause.end_date >= check_date),
+            )
+            .exists()
+        )
+        return db.and_(
+            cls.start_date <= check_date,
+            cls.weekday_mask.op('&')(day_bit) != 0,
+            ~covering_pause,
+        )
+
+
+@event.listens_for(Habit, 'before_insert')
+def _set_weekday_mask(mapper, connection, habit):
+    habit.weekday_mask = weekday_mask(habit.frequency or 'DAILY', habit.days_of_week)
+
+
+@event.listens_for(Habit, 'before_update')
+def _sync_weekday_mask(mapper, connection, habit):
+    state = inspect(habit)
+    if state.attrs.frequency.history.has_changes() or state.attrs.days_of_week.history.has_changes():
+        habit.weekday_mask = weekday_mask(habit.frequency, habit.days_of_week)
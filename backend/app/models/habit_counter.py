@@ -0,0 +1,134 @@
+# backend/app/models/habit_counter.py
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db
+from .habit import Habit
+from .habit_pause import HabitPause
+
+
+class UserHabitCounter(db.Model):
+    """Running habit totals per user, kept in step by mapper events below."""
+
+    __tablename__ = "user_habit_counters"
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    active_count = db.Column(db.Integer, nullable=False, default=0)
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def locked_for_user(cls, user_id, session=None):
+        """Return the user's counters with the row locked for this transaction.
+
+        A missing row is backfilled from COUNT queries; if a concurrent
+        request inserts it first, its row is locked and returned instead.
+        ``session`` defaults to ``db.session``.
+        """
+        session = session or db.session
+        stmt = select(cls).where(cls.user_id == user_id).with_for_update()
+        counters = session.scalars(stmt).first()
+        if counters is not None:
+            return counters
+
+        count = select(func.count()).select_from(Habit).where(Habit.user_id == user_id)
+        active = session.scalar(count.where(~Habit.pauses.any(HabitPause.end_date.is_(None))))
+        total = session.scalar(count)
+        try:
+            with session.begin_nested():
+                counters = cls(user_id=int(user_id), active_count=active, total_count=total)
+                session.add(counters)
+        except IntegrityError:
+            counters = session.scalars(stmt.execution_options(populate_existing=True)).one()
+        return counters
+
+    @classmethod
+    def adjust(cls, user_id, active=0, total=0):
+        """Apply a delta for writes made with bulk statements, which skip mapper events."""
+        if active or total:
+            _adjust(db.session.connection(), user_id, active=active, total=total)
+
+    @classmethod
+    def counts_after_insert(cls, user_id, session=None):
+        """Return ``(active, total)`` including habits just flushed for the user.
+
+        The counter UPDATE issued by the insert already holds the row lock and
+        returned the new totals; only a user without a counter row costs an
+        extra backfill.
+        """
+        session = session or db.session
+        counts = session.info.get("habit_counts", {}).pop(str(user_id), None)
+        if counts is None:
+            counters = cls.locked_for_user(user_id, session)
+            counts = (counters.active_count, counters.total_count)
+        return tuple(counts)
+
+
+_counters = UserHabitCounter.__table__
+
+
+def _adjust(connection, user_id, active=0, total=0):
+    # Users without a row yet are picked up by the backfill on first lock.
+    stmt = (
+        update(_counters)
+        .where(_counters.c.user_id == user_id)
+        .values(
+            active_count=_counters.c.active_count + active,
+            total_count=_counters.c.total_count + total,
+        )
+    )
+    if not connection.dialect.update_returning:
+        connection.execute(stmt)
+        return None
+    return connection.execute(
+        stmt.returning(_counters.c.active_count, _counters.c.total_count)
+    ).first()
+
+
+def _habit_owner(habit_id):
+    return select(Habit.__table__.c.user_id).where(Habit.__table__.c.id == habit_id).scalar_subquery()
+
+
+@event.listens_for(Habit, "after_insert")
+def _habit_inserted(mapper, connection, habit):
+    counts = _adjust(connection, habit.user_id, active=1, total=1)
+    if counts is not None:
+        session = object_session(habit)
+        session.info.setdefault("habit_counts", {})[str(habit.user_id)] = counts
+
+
+@event.listens_for(Habit, "after_delete")
+def _habit_deleted(mapper, connection, habit):
+    # Open pauses are deleted first by the cascade, which hands their
+    # active slot back; so every deleted habit leaves as an active one.
+    _adjust(connection, habit.user_id, active=-1, total=-1)
+
+
+@event.listens_for(HabitPause, "after_insert")
+def _pause_inserted(mapper, connection, pause):
+    if pause.end_date is None:
+        _adjust(connection, _habit_owner(pause.habit_id), active=-1)
+
+
+@event.listens_for(HabitPause, "after_update")
+def _pause_updated(mapper, connection, pause):
+    history = inspect(pause).attrs.end_date.history
+    if not history.has_changes():
+        return
+    was_open = None in (history.deleted or ())
+    is_open = pause.end_date is None
+    if was_open != is_open:
+        _adjust(connection, _habit_owner(pause.habit_id), active=1 if was_open else -1)
+
+
+@event.listens_for(HabitPause, "after_delete")
+def _pause_deleted(mapper, connection, pause):
+    if pause.end_date is None:
+        _adjust(connection, _habit_owner(pause.habit_id), active=1)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _forget_counts(session, transaction):
+    if transaction.parent is None:
+        session.info.pop("habit_counts", None)
@@ -0,0 +1,20 @@
+# backend/app/models/idempotency.py
+from datetime import datetime
+
+from app.extensions import db
+
+
+class IdempotencyKey(db.Model):
+    """A stored response for a client-supplied Idempotency-Key."""
+
+    __tablename__ = "idempotency_keys"
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)
+    # NULL while the first request with this key is still running.
+    status_code = db.Column(db.Integer, nullable=True)
+    content_type = db.Column(db.String(100), nullable=True)
+    body = db.Column(db.LargeBinary, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -0,0 +1,23 @@
+# backend/app/models/reminder.py
+from datetime import datetime
+
+from app.extensions import db
+
+
+class HabitReminder(db.Model):
+    """A habit's daily reminder time, with its next UTC due time precomputed."""
+
+    __tablename__ = "habit_reminders"
+    id = db.Column(db.Integer, primary_key=True)
+    habit_id = db.Column(
+        db.Integer, db.ForeignKey("habit.id", ondelete="CASCADE"), nullable=False, unique=True
+    )
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    time_of_day = db.Column(db.Time, nullable=False)
+    timezone = db.Column(db.String(64), nullable=False, default="UTC")
+    enabled = db.Column(db.Boolean, nullable=False, default=True)
+    # Naive UTC; NULL while the habit has no upcoming scheduled day.
+    next_due_at = db.Column(db.DateTime, nullable=True, index=True)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
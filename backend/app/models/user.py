@@ -15,6 +15,12 @@ class User(db.Model):
     lazy=True,
     cascade='all, delete-orphan'
     )
+    habit_counters = db.relationship(
+        'UserHabitCounter',
+        uselist=False,
+        lazy=True,
+        cascade='all, delete-orphan'
+    )
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password, method="pbkdf2:sha256")
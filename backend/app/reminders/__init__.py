@@ -0,0 +1,4 @@
+from .schedule import next_due_at, reschedule
+from .scheduler import ReminderScheduler
+from .senders import LogPushSender, PushMessage, PushSender
+from .wheel import TimingWheel
@@ -0,0 +1,69 @@
+# app/reminders/schedule.py
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from app.extensions import db
+from app.models.habit import Habit
+from app.models.reminder import HabitReminder
+from app.utils.pauses import PauseIndex
+
+
+def to_utc_naive(moment):
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def next_due_at(habit, reminder, after, pauses=None):
+    """First naive-UTC reminder time strictly after naive-UTC ``after``, or None.
+
+    Walks the habit's local calendar from ``after``: jumps to its start
+    date, skips closed pauses in one step each and days missing from
+    ``weekday_mask``. An open pause means nothing is due until the habit
+    is unarchived.
+    """
+    if not habit.weekday_mask:
+        return None
+    tz = ZoneInfo(reminder.timezone)
+    pauses = pauses if pauses is not None else PauseIndex(habit.pauses)
+    local_after = after.replace(tzinfo=timezone.utc).astimezone(tz)
+    day = max(local_after.date(), habit.start_date)
+
+    # Each pass either skips a pause or advances at most one day of a week.
+    for _ in range(2 * len(pauses) + 15):
+        resumed = pauses.resume_date(day)
+        if resumed is None:
+            return None
+        if resumed != day:
+            day = resumed
+            continue
+        if habit.weekday_mask & (1 << day.weekday()):
+            due = datetime.combine(day, reminder.time_of_day, tzinfo=tz)
+            if due > local_after:
+                return to_utc_naive(due)
+        day += timedelta(days=1)
+    return None
+
+
+def local_date(reminder, due):
+    """The reminder's local calendar date for naive-UTC ``due``."""
+    return due.replace(tzinfo=timezone.utc).astimezone(ZoneInfo(reminder.timezone)).date()
+
+
+def reschedule(habit_ids, now=None, session=None):
+    """Recompute ``next_due_at`` for the enabled reminders of ``habit_ids``.
+
+    Call after changing a habit's schedule or pauses; the scheduler picks
+    the new times up through ``updated_at``. ``session`` defaults to
+    ``db.session``.
+    """
+    now = now or datetime.utcnow()
+    reminders = (session or db.session).scalars(
+        select(HabitReminder)
+        .where(HabitReminder.habit_id.in_(habit_ids), HabitReminder.enabled.is_(True))
+        .options(joinedload(HabitReminder.habit).selectinload(Habit.pauses))
+    )
+    for reminder in reminders:
+        reminder.next_due_at = next_due_at(reminder.habit, reminder, now)
+        reminder.updated_at = now
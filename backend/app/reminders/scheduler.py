@@ -0,0 +1,155 @@
+# app/reminders/scheduler.py
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import joinedload
+from werkzeug.utils import import_string
+
+from app.extensions import db
+from app.models.habit import Habit
+from app.models.log import HabitLog
+from app.models.reminder import HabitReminder
+from app.utils.habit_queries import is_applicable
+from app.utils.pauses import PauseIndex
+from .schedule import local_date, next_due_at
+from .senders import PushMessage
+from .wheel import TimingWheel
+
+logger = logging.getLogger("app.reminders")
+
+# Re-read rows touched slightly before the previous load, in case their
+# transaction committed after that load's query ran.
+UPDATE_OVERLAP = timedelta(seconds=60)
+
+
+def _timestamp(due):
+    return due.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _chunks(items, size):
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class ReminderScheduler:
+    """Fires habit reminders from a timing wheel fed by ``next_due_at`` windows.
+
+    Only reminders due within ``REMINDER_LOAD_HORIZON_SECONDS`` are read,
+    through the ``next_due_at`` index, plus rows whose ``updated_at``
+    moved since the last load; the habit table is never scanned. Due
+    reminders are processed in batches: one query for the reminders with
+    their habits and pauses, one for the day's logs, one bulk UPDATE of
+    the next due times.
+    """
+
+    def __init__(self, app, sender=None):
+        config = app.config
+        self.app = app
+        self.sender = sender or import_string(config["REMINDER_PUSH_SENDER"])(app)
+        self.tick_seconds = float(config["REMINDER_TICK_SECONDS"])
+        self.horizon = timedelta(seconds=float(config["REMINDER_LOAD_HORIZON_SECONDS"]))
+        self.load_interval = timedelta(seconds=float(config["REMINDER_LOAD_INTERVAL_SECONDS"]))
+        self.stale_after = timedelta(seconds=float(config["REMINDER_STALE_SECONDS"]))
+        self.batch_size = int(config["REMINDER_BATCH_SIZE"])
+        self.wheel = None
+        self._due = {}  # reminder id -> due time the wheel holds for it
+        self._loaded_until = None
+        self._last_load = None
+
+    def _queue(self, reminder_id, due):
+        if self._due.get(reminder_id) != due:
+            self._due[reminder_id] = due
+            self.wheel.schedule(_timestamp(due), (reminder_id, due))
+
+    def load(self, now):
+        horizon = now + self.horizon
+        base = select(HabitReminder.id, HabitReminder.next_due_at).where(
+            HabitReminder.enabled.is_(True), HabitReminder.next_due_at < horizon
+        )
+        if self._loaded_until is None:
+            queries = [base]
+        else:
+            queries = [
+                base.where(HabitReminder.next_due_at >= self._loaded_until),
+                base.where(HabitReminder.updated_at >= self._last_load - UPDATE_OVERLAP),
+            ]
+        for query in queries:
+            for reminder_id, due in db.session.execute(query):
+                self._queue(reminder_id, due)
+        db.session.commit()
+        self._loaded_until, self._last_load = horizon, now
+
+    def tick(self, now=None):
+        """Load if due, fire everything due by ``now``; returns pushes sent."""
+        now = now or datetime.utcnow()
+        if self.wheel is None:
+            self.wheel = TimingWheel(self.tick_seconds, start=_timestamp(now))
+        if self._last_load is None or now >= self._last_load + self.load_interval:
+            self.load(now)
+
+        fired = []
+        for reminder_id, due in self.wheel.advance(_timestamp(now)):
+            if self._due.get(reminder_id) == due:
+                del self._due[reminder_id]
+                fired.append((reminder_id, due))
+        return sum(self._dispatch(chunk, now) for chunk in _chunks(fired, self.batch_size))
+
+    def _dispatch(self, fired, now):
+        expected = dict(fired)
+        reminders = [
+            reminder
+            for reminder in HabitReminder.query.filter(HabitReminder.id.in_(expected)).options(
+                joinedload(HabitReminder.habit).selectinload(Habit.pauses)
+            )
+            # Anything disabled or moved since it was queued is skipped here;
+            # the next load queues its new time.
+            if reminder.enabled and reminder.next_due_at == expected[reminder.id]
+        ]
+        days = {reminder.id: local_date(reminder, reminder.next_due_at) for reminder in reminders}
+        logged = set(
+            db.session.query(HabitLog.habit_id, HabitLog.date).filter(
+                HabitLog.habit_id.in_({reminder.habit_id for reminder in reminders}),
+                HabitLog.date.in_(set(days.values())),
+            )
+        ) if reminders else set()
+
+        messages, updates = [], []
+        for reminder in reminders:
+            habit = reminder.habit
+            pauses = PauseIndex(habit.pauses)
+            day = days[reminder.id]
+            if (
+                reminder.next_due_at >= now - self.stale_after
+                and is_applicable(habit, day, pauses)
+                and (habit.id, day) not in logged
+            ):
+                messages.append(
+                    PushMessage(reminder.user_id, habit.id, habit.name, reminder.next_due_at)
+                )
+            following = next_due_at(habit, reminder, reminder.next_due_at, pauses)
+            updates.append({"id": reminder.id, "next_due_at": following})
+            if following is not None and following < self._loaded_until:
+                self._queue(reminder.id, following)
+
+        if messages:
+            self.sender.send(messages)
+        if updates:
+            # Bulk UPDATE by primary key; updated_at stays put so the next
+            # load doesn't re-read rows the scheduler itself moved.
+            db.session.execute(update(HabitReminder), updates)
+        db.session.commit()
+        return len(messages)
+
+    def run(self):
+        logger.info("reminder scheduler started, tick=%ss", self.tick_seconds)
+        while True:
+            started = time.monotonic()
+            with self.app.app_context():
+                sent = self.tick()
+            if sent:
+                logger.info("sent %d reminders", sent)
+            time.sleep(max(0.0, self.tick_seconds - (time.monotonic() - started)))
@@ -0,0 +1,35 @@
+# app/reminders/senders.py
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+logger = logging.getLogger("app.reminders")
+
+
+@dataclass(frozen=True)
+class PushMessage:
+    user_id: int
+    habit_id: int
+    habit_name: str
+    due_at: datetime
+
+
+class PushSender:
+    """Delivers reminder pushes; ``REMINDER_PUSH_SENDER`` names the class to use."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def send(self, messages):
+        raise NotImplementedError
+
+
+class LogPushSender(PushSender):
+    """Local stand-in that logs each push instead of delivering it."""
+
+    def send(self, messages):
+        for message in messages:
+            logger.info(
+                "reminder user=%s habit=%s name=%r due=%s",
+                message.user_id, message.habit_id, message.habit_name, message.due_at,
+            )
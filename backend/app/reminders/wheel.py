@@ -0,0 +1,71 @@
+# app/reminders/wheel.py
+import heapq
+from itertools import count
+from math import prod
+
+
+class TimingWheel:
+    """Hierarchical timing wheel: O(1) scheduling, amortised O(levels) per expiry.
+
+    Level ``k`` has ``slots[k]`` buckets each spanning ``prod(slots[:k])``
+    ticks. Items further out than the whole wheel wait in an overflow heap.
+    A bucket is cascaded into lower levels when the clock reaches the start
+    of its span, so an item always fires on its own tick.
+    """
+
+    def __init__(self, tick=1.0, slots=(60, 60, 24), start=0.0):
+        self.tick = tick
+        self.current = int(start // tick)  # next tick to process
+        self._sizes = tuple(slots)
+        self._spans = tuple(prod(slots[:level]) for level in range(len(slots)))
+        self._range = self._spans[-1] * self._sizes[-1]
+        self._levels = [[[] for _ in range(size)] for size in slots]
+        self._overflow = []
+        self._seq = count()
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def schedule(self, when, item):
+        """Fire ``item`` at time ``when`` (seconds); past times fire on the next advance."""
+        self._place(max(int(when // self.tick), self.current), item)
+        self._len += 1
+
+    def _place(self, due, item):
+        delta = due - self.current
+        if delta >= self._range:
+            heapq.heappush(self._overflow, (due, next(self._seq), item))
+            return
+        for level, span in enumerate(self._spans):
+            if delta < span * self._sizes[level]:
+                self._levels[level][(due // span) % self._sizes[level]].append((due, item))
+                return
+
+    def advance(self, now):
+        """Return the items due at or before ``now``, in due order."""
+        target = int(now // self.tick)
+        fired = []
+        while self.current <= target:
+            tick = self.current
+            while self._overflow and self._overflow[0][0] - tick < self._range:
+                due, _, item = heapq.heappop(self._overflow)
+                self._place(due, item)
+            for level in range(len(self._sizes) - 1, 0, -1):
+                span = self._spans[level]
+                if tick % span == 0:
+                    bucket = self._levels[level][(tick // span) % self._sizes[level]]
+                    self._levels[level][(tick // span) % self._sizes[level]] = []
+                    for due, item in bucket:
+                        self._place(due, item)
+            slot = tick % self._sizes[0]
+            bucket = self._levels[0][slot]
+            if bucket:
+                self._levels[0][slot] = []
+                fired.extend(item for _, item in bucket)
+            self.current = tick + 1
+            if self._len == len(fired):
+                # Nothing left anywhere: jump straight past the target.
+                self.current = max(self.current, target + 1)
+        self._len -= len(fired)
+        return fired
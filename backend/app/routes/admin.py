@@ -0,0 +1,41 @@
+# app/routes/admin.py
+from functools import wraps
+
+from flask import Blueprint, current_app, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.extensions import slow_query_log, user_locks
+
+admin_bp = Blueprint("admin", __name__)
+
+
+def admin_required(fn):
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if str(get_jwt_identity()) not in current_app.config.get("ADMIN_USER_IDS", set()):
+            return jsonify({"error": "Forbidden"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+@admin_bp.route("/slow-queries", methods=["GET"])
+@admin_required
+def slow_queries():
+    return jsonify({
+        "threshold_ms": slow_query_log.threshold_ms,
+        "entries": slow_query_log.entries(),
+    })
+
+
+@admin_bp.route("/slow-queries", methods=["DELETE"])
+@admin_required
+def clear_slow_queries():
+    slow_query_log.clear()
+    return jsonify({"message": "Slow query log cleared"})
+
+
+@admin_bp.route("/user-locks", methods=["GET"])
+@admin_required
+def user_lock_stats():
+    return jsonify({"warn_ms": user_locks.warn_ms, **user_locks.stats()})
@@ -1,5 +1,5 @@
 from flask import Blueprint, request, jsonify
-from app.extensions import db, limiter
+from app.extensions import cold_storage, db, limiter
 from app.models.user import User
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from datetime import datetime, timedelta
@@ -10,8 +10,7 @@ from app.utils.email import send_email_smtp
 
 # Apple JWT verification
 from jwt import PyJWKClient, InvalidTokenError
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+import importlib
 import os
 import re
 import uuid
@@ -21,6 +20,25 @@ auth_bp = Blueprint("auth", __name__)
 APPLE_CLIENT_ID = os.getenv("APPLE_CLIENT_ID")
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 
+# The Google SDK drags in requests/urllib3, so it is imported on the first
+# /auth/google call rather than at startup.
+_LAZY_PROVIDER_MODULES = {
+    "id_token": "google.oauth2.id_token",
+    "google_requests": "google.auth.transport.requests",
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY_PROVIDER_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(_LAZY_PROVIDER_MODULES[name])
+    globals()[name] = module
+    return module
+
+
+def _provider(name):
+    return globals()[name] if name in globals() else __getattr__(name)
+
 
 def retry_on_operational_error(fn):
     @wraps(fn)
@@ -163,8 +181,8 @@ def google_login():
         return jsonify({"error": "Token is required"}), 400
 
     try:
-        decoded = id_token.verify_oauth2_token(
-            token, google_requests.Request(), audience=GOOGLE_CLIENT_ID
+        decoded = _provider("id_token").verify_oauth2_token(
+            token, _provider("google_requests").Request(), audience=GOOGLE_CLIENT_ID
         )
     except Exception:
         return jsonify({"error": "Invalid token"}), 401
@@ -219,6 +237,7 @@ def delete_user():
 
     db.session.delete(user)
     db.session.commit()
+    cold_storage.delete(user_id)
     return jsonify({"message": "User deleted successfully"}), 200
 
 
@@ -1,32 +1,66 @@
 # app/routes/habits.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy.exc import IntegrityError
-from app.extensions import db, limiter
+from app.extensions import (
+    cold_storage, db, habit_events, idempotency, limiter, replica_router, user_locks,
+)
+from app.utils import habit_queries
+from app.utils.compression import mark_compression_cacheable
+from app.utils.db_timeouts import db_timeouts
+from app.utils.events import STREAM_HEADERS
+from app.utils.habit_queries import is_applicable
+from app.utils.pauses import normalize_pauses
 from app.models.habit import Habit
 from app.models.log import HabitLog
 from app.models.habit_pause import HabitPause
-from datetime import date, datetime, timedelta
-from collections import defaultdict
-from calendar import monthrange
-
-
-def is_applicable(habit: Habit, check_date: date) -> bool:
-    """Return True if the habit should be shown on the given date."""
-    if habit.start_date > check_date:
-        return False
-    for p in habit.pauses:
-        if p.start_date <= check_date and (p.end_date is None or p.end_date >= check_date):
-            return False
-    if habit.frequency == 'DAILY':
-        return True
-    if habit.frequency == 'WEEKLY':
-        weekday = check_date.weekday()  # 0=Mon..6=Sun
-        return habit.days_of_week and weekday in habit.days_of_week
-    return True
+from app.models.habit_counter import UserHabitCounter
+from app.models.reminder import HabitReminder
+from app.reminders import next_due_at, reschedule
+from datetime import date, datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 
+MAX_ACTIVE_HABITS = 100
+MAX_TOTAL_HABITS = 200
+
 habits_bp = Blueprint("habits", __name__)
+replica_router.route_blueprint(habits_bp)
+idempotency.route_blueprint(habits_bp)
+habit_events.route_blueprint(habits_bp)
+
+
+def _user_habit(habit_id, user_id):
+    return db.session.scalars(habit_queries.user_habit_query(habit_id, user_id)).first()
+
+
+def _open_pause(habit_id):
+    return db.session.scalars(habit_queries.open_pause_query(habit_id)).first()
+
+
+def _cold_before(user_id, lock=False):
+    """The user's cold-storage cut-off, or None when no logs were archived."""
+    if not cold_storage.enabled:
+        return None
+    return db.session.scalar(habit_queries.cold_before_query(user_id, lock))
+
+
+def _flush_unique_name(user_id, name):
+    """Flush pending habit changes, mapping a duplicate name to its 409 response.
+
+    The ``uniq_habit_name_per_user`` index decides; the conflicting habit is
+    only looked up after it has rejected the write.
+    """
+    try:
+        db.session.flush()
+        return None
+    except IntegrityError as e:
+        db.session.rollback()
+        if "uniq_habit_name_per_user" not in str(e.orig):
+            raise
+
+    existing = db.session.execute(habit_queries.name_conflict_query(user_id, name)).first()
+    return jsonify(habit_queries.name_conflict_payload(existing)), 409
 
 
 @habits_bp.route("/test", methods=["GET"])
@@ -39,65 +73,10 @@ def test():
 def create_habit():
     user_id = get_jwt_identity()
     data = request.get_json()
-    name = data.get("name")
-    start_date_str = data.get("start_date")
-    frequency = data.get("frequency", "DAILY")
-    days = data.get("days_of_week")
-
-    if not name:
-        return jsonify({"error": "Habit name is required"}), 400
-
-    name = name.strip()
-
-    if len(name) > 64:
-        return jsonify({"error": "Habit name cannot exceed 64 characters"}), 400
-
-    existing = Habit.query.filter(
-        db.func.lower(Habit.name) == name.lower(),
-        Habit.user_id == user_id
-    ).first()
-
-    if existing:
-        paused = HabitPause.query.filter_by(
-            habit_id=existing.id, end_date=None
-        ).first()
-        if paused:
-            return (
-                jsonify(
-                    {"error": "duplicate_name_archived", "archivedHabitId": existing.id}
-                ),
-                409,
-            )
-        return jsonify({"error": "duplicate_name_active"}), 409
-
     try:
-        start_date = date.fromisoformat(start_date_str) if start_date_str else date.today()
-    except ValueError:
-        return jsonify({"error": "Invalid start_date format. Use YYYY-MM-DD"}), 400
-
-    if frequency not in ["DAILY", "WEEKLY"]:
-        return jsonify({"error": "Invalid frequency"}), 400
-    if frequency == "WEEKLY":
-        if not isinstance(days, list) or len(days) == 0:
-            return jsonify({"error": "days_of_week must be a non-empty list"}), 400
-        try:
-            days = [int(d) for d in days]
-        except Exception:
-            return jsonify({"error": "days_of_week must be integers"}), 400
-        if any(d < 0 or d > 6 for d in days):
-            return jsonify({"error": "days_of_week must be between 0 and 6"}), 400
-    else:
-        days = None
-
-    active_count = Habit.query.filter(
-        Habit.user_id == user_id,
-        ~Habit.pauses.any(HabitPause.end_date.is_(None))
-    ).count()
-    total_count = Habit.query.filter_by(user_id=user_id).count()
-    if active_count >= 100:
-        return jsonify({"error": "active_habit_limit_reached"}), 400
-    if total_count >= 200:
-        return jsonify({"error": "total_habit_limit_reached"}), 400
+        name, start_date, frequency, days = habit_queries.parse_habit_body(data)
+    except habit_queries.QueryError as e:
+        return jsonify({"error": str(e)}), 400
 
     habit = Habit(
         name=name,
@@ -106,19 +85,25 @@ def create_habit():
         frequency=frequency,
         days_of_week=days,
     )
+    # Held until commit/rollback, so parallel creates check the limits in turn
+    user_locks.lock(db.session, user_id)
     db.session.add(habit)
-    db.session.commit()
+    conflict = _flush_unique_name(user_id, name)
+    if conflict:
+        return conflict
 
-    return jsonify({
-        "message": "Habit created",
-        "habit": {
-            "id": habit.id,
-            "name": habit.name,
-            "start_date": habit.start_date.isoformat(),
-            "frequency": habit.frequency,
-            "days_of_week": habit.days_of_week,
-        }
-    })
+    active_count, total_count = UserHabitCounter.counts_after_insert(user_id)
+    if active_count > MAX_ACTIVE_HABITS:
+        db.session.rollback()
+        return jsonify({"error": "active_habit_limit_reached"}), 400
+    if total_count > MAX_TOTAL_HABITS:
+        db.session.rollback()
+        return jsonify({"error": "total_habit_limit_reached"}), 400
+
+    payload = {"message": "Habit created", "habit": habit_queries.habit_payload(habit)}
+    db.session.commit()
+    habit_events.record("habit.created", payload["habit"])
+    return jsonify(payload)
 
 
 @habits_bp.route("/<int:habit_id>", methods=["PUT"])
@@ -127,78 +112,42 @@ def update_habit(habit_id):
     user_id = get_jwt_identity()
     data = request.get_json()
 
-    habit = Habit.query.filter_by(id=habit_id, user_id=user_id).first()
+    habit = _user_habit(habit_id, user_id)
     if not habit:
         return jsonify({"error": "Habit not found"}), 404
 
-    new_name = data.get("name")
-    if not new_name:
-        return jsonify({"error": "Habit name is required"}), 400
-
-    new_name = new_name.strip()
-
-    if len(new_name) > 64:
-        return jsonify({"error": "Habit name cannot exceed 64 characters"}), 400
-
-    existing = Habit.query.filter(
-        db.func.lower(Habit.name) == new_name.lower(),
-        Habit.user_id == user_id,
-        Habit.id != habit_id
-    ).first()
-
-    if existing:
-        paused = HabitPause.query.filter_by(habit_id=existing.id, end_date=None).first()
-        if paused:
-            return (
-                jsonify({"error": "duplicate_name_archived", "archivedHabitId": existing.id}),
-                409,
-            )
-        return jsonify({"error": "duplicate_name_active"}), 409
-
-    frequency = data.get("frequency", habit.frequency)
-    days = data.get("days_of_week", habit.days_of_week)
-    if frequency not in ["DAILY", "WEEKLY"]:
-        return jsonify({"error": "Invalid frequency"}), 400
-    if frequency == "WEEKLY":
-        if not isinstance(days, list) or len(days) == 0:
-            return jsonify({"error": "days_of_week must be a non-empty list"}), 400
-        try:
-            days = [int(d) for d in days]
-        except Exception:
-            return jsonify({"error": "days_of_week must be integers"}), 400
-        if any(d < 0 or d > 6 for d in days):
-            return jsonify({"error": "days_of_week must be between 0 and 6"}), 400
-    else:
-        days = None
+    try:
+        new_name, _, frequency, days = habit_queries.parse_habit_body(data, habit)
+    except habit_queries.QueryError as e:
+        return jsonify({"error": str(e)}), 400
 
     habit.name = new_name
     habit.frequency = frequency
     habit.days_of_week = days
-    db.session.commit()
+    conflict = _flush_unique_name(user_id, new_name)
+    if conflict:
+        return conflict
+    reschedule([habit.id])
 
-    return jsonify({
-        "message": "Habit updated successfully",
-        "habit": {
-            "id": habit.id,
-            "name": habit.name,
-            "start_date": habit.start_date.isoformat(),
-            "frequency": habit.frequency,
-            "days_of_week": habit.days_of_week,
-        }
-    })
+    payload = {"message": "Habit updated successfully", "habit": habit_queries.habit_payload(habit)}
+    db.session.commit()
+    habit_events.record("habit.updated", payload["habit"])
+    return jsonify(payload)
 
 
 @habits_bp.route("/<int:habit_id>", methods=["DELETE"])
 @jwt_required()
 def delete_habit(habit_id):
     user_id = get_jwt_identity()
-    habit = Habit.query.filter_by(id=habit_id, user_id=user_id).first()
+    habit = _user_habit(habit_id, user_id)
 
     if not habit:
         return jsonify({"error": "Habit not found"}), 404
 
+    user_locks.lock(db.session, user_id)
     db.session.delete(habit)
     db.session.commit()
+    habit_events.record("habit.deleted", {"id": habit_id})
 
     return jsonify({"message": "Habit deleted successfully"})
 
@@ -207,15 +156,19 @@ def delete_habit(habit_id):
 @jwt_required()
 def archive_habit(habit_id):
     user_id = get_jwt_identity()
-    habit = Habit.query.filter_by(id=habit_id, user_id=user_id).first()
+    habit = _user_habit(habit_id, user_id)
     if not habit:
         return jsonify({"error": "Habit not found"}), 404
 
-    open_pause = HabitPause.query.filter_by(habit_id=habit_id, end_date=None).first()
+    user_locks.lock(db.session, user_id)
+    open_pause = _open_pause(habit_id)
     if not open_pause:
         pause = HabitPause(habit_id=habit_id, start_date=date.today())
         db.session.add(pause)
+        normalize_pauses(db.session, [habit_id])
+        paused_since = _open_pause(habit_id).start_date
         db.session.commit()
+        habit_events.record("habit.archived", {"id": habit_id, "pause_start_date": paused_since})
 
     return jsonify({"habit": {"id": habit.id, "name": habit.name}})
 
@@ -224,83 +177,226 @@ def archive_habit(habit_id):
 @jwt_required()
 def unarchive_habit(habit_id):
     user_id = get_jwt_identity()
-    habit = Habit.query.filter_by(id=habit_id, user_id=user_id).first()
+    habit = _user_habit(habit_id, user_id)
     if not habit:
         return {"error": "Habit not found"}, 404
-    active_count = Habit.query.filter(
-        Habit.user_id == user_id,
-        ~Habit.pauses.any(HabitPause.end_date.is_(None))
-    ).count()
-    if active_count >= 100:
-        return jsonify({"error": "active_habit_limit_reached"}), 400
-
-    open_pause = HabitPause.query.filter_by(habit_id=habit_id, end_date=None).first()
+    user_locks.lock(db.session, user_id)
+    open_pause = _open_pause(habit_id)
     if open_pause:
+        counters = UserHabitCounter.locked_for_user(user_id)
+        if counters.active_count >= MAX_ACTIVE_HABITS:
+            db.session.rollback()
+            return jsonify({"error": "active_habit_limit_reached"}), 400
         open_pause.end_date = date.today() - timedelta(days=1)
+        normalize_pauses(db.session, [habit_id])
+        reschedule([habit_id])
         db.session.commit()
+        habit_events.record("habit.unarchived", {"id": habit_id})
 
     return jsonify({"habit": {"id": habit.id, "name": habit.name}})
 
 
-@habits_bp.route("/archived", methods=["GET"])
+BULK_ACTIONS = ("archive", "unarchive", "delete")
+
+
+@habits_bp.route("/bulk", methods=["POST"])
 @jwt_required()
-def archived_habits():
+def bulk_habits():
     user_id = get_jwt_identity()
-    habits = (
-        Habit.query.filter(Habit.user_id == user_id)
-        .join(HabitPause)
-        .filter(HabitPause.end_date.is_(None))
-        .all()
+    data = request.get_json(silent=True) or {}
+    action = data.get("action")
+    habit_ids = data.get("habit_ids")
+
+    if action not in BULK_ACTIONS:
+        return jsonify({"error": "Invalid action"}), 400
+    if (
+        not isinstance(habit_ids, list)
+        or not habit_ids
+        or not all(isinstance(i, int) and not isinstance(i, bool) for i in habit_ids)
+    ):
+        return jsonify({"error": "habit_ids must be a non-empty list of integers"}), 400
+    habit_ids = list(dict.fromkeys(habit_ids))
+    if len(habit_ids) > MAX_TOTAL_HABITS:
+        return jsonify({"error": f"habit_ids cannot exceed {MAX_TOTAL_HABITS}"}), 400
+
+    # The read below picks targets and reported statuses; counter deltas
+    # follow the rows each statement actually changed, as mapper events would.
+    user_locks.lock(db.session, user_id)
+    open_pause = (
+        db.select(HabitPause.id)
+        .where(HabitPause.habit_id == Habit.id, HabitPause.end_date.is_(None))
+        .exists()
     )
+    archived = dict(
+        db.session.execute(
+            db.select(Habit.id, open_pause).where(
+                Habit.user_id == user_id, Habit.id.in_(habit_ids)
+            )
+        ).all()
+    )
+    results = {habit_id: "not_found" for habit_id in habit_ids if habit_id not in archived}
+
+    if action == "archive":
+        targets = [i for i, paused in archived.items() if not paused]
+        if targets:
+            paused = db.session.execute(
+                db.insert(HabitPause).from_select(
+                    ["habit_id", "start_date"],
+                    db.select(Habit.id, db.literal(date.today(), db.Date))
+                    .where(Habit.id.in_(targets), ~open_pause),
+                )
+            ).rowcount
+            normalize_pauses(db.session, targets)
+            UserHabitCounter.adjust(user_id, active=-paused)
+        results.update({i: "archived" if i in targets else "already_archived" for i in archived})
+
+    elif action == "unarchive":
+        targets = [i for i, paused in archived.items() if paused]
+        if targets:
+            counters = UserHabitCounter.locked_for_user(user_id)
+            if counters.active_count + len(targets) > MAX_ACTIVE_HABITS:
+                db.session.rollback()
+                return jsonify({"error": "active_habit_limit_reached"}), 400
+            resumed = db.session.execute(
+                db.update(HabitPause)
+                .where(HabitPause.habit_id.in_(targets), HabitPause.end_date.is_(None))
+                .values(end_date=date.today() - timedelta(days=1))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            normalize_pauses(db.session, targets)
+            reschedule(targets)
+            UserHabitCounter.adjust(user_id, active=resumed)
+        results.update({i: "unarchived" if i in targets else "not_archived" for i in archived})
+
+    else:
+        targets = list(archived)
+        if targets:
+            open_pauses = db.session.execute(
+                db.delete(HabitPause)
+                .where(HabitPause.habit_id.in_(targets), HabitPause.end_date.is_(None))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            for model in (HabitLog, HabitPause, HabitReminder):
+                db.session.execute(
+                    db.delete(model)
+                    .where(model.habit_id.in_(targets))
+                    .execution_options(synchronize_session=False)
+                )
+            deleted = db.session.execute(
+                db.delete(Habit)
+                .where(Habit.id.in_(targets))
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            UserHabitCounter.adjust(user_id, active=open_pauses - deleted, total=-deleted)
+        results.update({i: "deleted" for i in targets})
+
+    db.session.commit()
+    if targets:
+        habit_events.record("habits.bulk", {"action": action, "ids": targets})
+    return jsonify({
+        "action": action,
+        "results": [{"id": i, "status": results[i]} for i in habit_ids],
+    })
+
+
+def _reminder_payload(reminder):
+    return {
+        "habit_id": reminder.habit_id,
+        "time": reminder.time_of_day.strftime("%H:%M"),
+        "timezone": reminder.timezone,
+        "enabled": reminder.enabled,
+        "next_due_at": reminder.next_due_at,
+    }
+
+
+@habits_bp.route("/reminders", methods=["GET"])
+@jwt_required()
+def list_reminders():
+    user_id = get_jwt_identity()
+    reminders = HabitReminder.query.filter_by(user_id=user_id).order_by(HabitReminder.habit_id)
+    return jsonify([_reminder_payload(r) for r in reminders])
+
+
+@habits_bp.route("/<int:habit_id>/reminder", methods=["PUT"])
+@jwt_required()
+def set_reminder(habit_id):
+    user_id = get_jwt_identity()
+    habit = _user_habit(habit_id, user_id)
+    if not habit:
+        return jsonify({"error": "Habit not found"}), 404
+
+    data = request.get_json(silent=True) or {}
+    try:
+        time_of_day = time.fromisoformat(data.get("time") or "")
+    except (TypeError, ValueError):
+        return jsonify({"error": "time must be HH:MM"}), 400
+    tz_name = data.get("timezone") or "UTC"
+    try:
+        ZoneInfo(tz_name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return jsonify({"error": "Invalid timezone"}), 400
+
+    now = datetime.utcnow()
+    reminder = habit.reminder or HabitReminder(habit_id=habit.id, user_id=habit.user_id)
+    reminder.time_of_day = time_of_day.replace(second=0, microsecond=0, tzinfo=None)
+    reminder.timezone = tz_name
+    reminder.enabled = bool(data.get("enabled", True))
+    reminder.next_due_at = next_due_at(habit, reminder, now) if reminder.enabled else None
+    reminder.updated_at = now
+    db.session.add(reminder)
+    payload = {"reminder": _reminder_payload(reminder)}
+    db.session.commit()
+    habit_events.record("reminder.updated", payload["reminder"])
+    return jsonify(payload)
+
+
+@habits_bp.route("/<int:habit_id>/reminder", methods=["DELETE"])
+@jwt_required()
+def delete_reminder(habit_id):
+    user_id = get_jwt_identity()
+    reminder = HabitReminder.query.filter_by(habit_id=habit_id, user_id=user_id).first()
+    if not reminder:
+        return jsonify({"error": "Reminder not found"}), 404
+    db.session.delete(reminder)
+    db.session.commit()
+    habit_events.record("reminder.deleted", {"habit_id": habit_id})
+    return jsonify({"message": "Reminder deleted"})
 
-    result = []
-    for h in habits:
-        pause = next((p for p in h.pauses if p.end_date is None), None)
-        result.append(
-            {
-                "id": h.id,
-                "name": h.name,
-                "start_date": h.start_date.isoformat(),
-                "frequency": h.frequency,
-                "days_of_week": h.days_of_week,
-                "pause_start_date": pause.start_date.isoformat() if pause else None,
-            }
-        )
 
-    return jsonify(result)
+@habits_bp.route("/events", methods=["GET"])
+@jwt_required()
+def habit_event_stream():
+    if not habit_events.wsgi_streams:
+        return jsonify({"error": "Event streams are served by the ASGI entry point"}), 501
+    user_id = get_jwt_identity()
+    body = habit_events.stream(user_id, request.headers.get("Last-Event-ID"))
+    return Response(body, mimetype="text/event-stream", headers=STREAM_HEADERS)
+
+
+@habits_bp.route("/archived", methods=["GET"])
+@jwt_required()
+def archived_habits():
+    user_id = get_jwt_identity()
+    habits = db.session.scalars(habit_queries.archived_habits_query(user_id)).all()
+    return jsonify(habit_queries.archived_habits_payload(habits))
 
 
 @habits_bp.route("/", methods=["GET"])
 @jwt_required()
+@db_timeouts(statement_ms=5000)
 def list_habits():
     user_id = get_jwt_identity()
-    date_str = request.args.get("date")
-    habits = Habit.query.filter_by(user_id=user_id).all()
-
-    if date_str:
-        try:
-            selected_date = date.fromisoformat(date_str)
-        except ValueError:
-            return {"error": "Invalid date format. Use YYYY-MM-DD"}, 400
-        habits = [h for h in habits if is_applicable(h, selected_date)]
-
-    return jsonify([
-        {
-            "id": h.id,
-            "name": h.name,
-            "start_date": h.start_date.isoformat(),
-            "frequency": h.frequency,
-            "days_of_week": h.days_of_week,
-            "pauses": [
-                {
-                    "start_date": p.start_date.isoformat(),
-                    "end_date": p.end_date.isoformat() if p.end_date else None,
-                }
-                for p in h.pauses
-            ],
-        }
-        for h in habits
-    ])
+    try:
+        selected_date, fields, limit, after = habit_queries.parse_habit_list(request.args)
+    except habit_queries.QueryError as e:
+        return {"error": str(e)}, 400
+
+    query = habit_queries.habit_list_query(user_id, selected_date, fields, limit, after)
+    rows = db.session.execute(query).all()
+    pauses = db.session.execute(
+        habit_queries.pauses_query([row.id for row in rows])
+    ).all() if rows and "pauses" in fields else []
+    return jsonify(habit_queries.habit_list_payload(rows, pauses, fields, limit))
 
 
 @habits_bp.route("/<int:habit_id>/log", methods=["POST"])
@@ -308,24 +404,23 @@ def list_habits():
 @limiter.limit("10/minute")
 def log_habit(habit_id):
     user_id = get_jwt_identity()
-    habit = Habit.query.filter_by(id=habit_id, user_id=user_id).first()
+    habit = _user_habit(habit_id, user_id)
 
     if not habit:
         return jsonify({"error": "Habit not found"}), 404
 
     data = request.get_json(silent=True) or {}
-    date_str = data.get("date")
     try:
-        log_date = date.fromisoformat(date_str) if date_str else date.today()
-    except ValueError:
-        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        log_date = habit_queries.parse_log_date(data)
+    except habit_queries.QueryError as e:
+        return jsonify({"error": str(e)}), 400
 
     if not is_applicable(habit, log_date):
         return jsonify({"error": "Habit not scheduled for this date"}), 400
 
-    existing_log = HabitLog.query.filter_by(habit_id=habit_id, date=log_date).first()
+    existing_log = db.session.scalars(habit_queries.habit_log_query(habit_id, log_date)).first()
 
-    if existing_log:
+    if existing_log or cold_storage.contains(user_id, _cold_before(user_id), habit_id, log_date):
         return jsonify({"message": "Habit already logged for this date"}), 200
 
     log = HabitLog(habit_id=habit.id, date=log_date)
@@ -336,6 +431,7 @@ def log_habit(habit_id):
         db.session.rollback()
         return jsonify({"message": "Habit already logged for this date"}), 200
 
+    habit_events.record("log.created", {"habit_id": habit_id, "date": log_date})
     return jsonify({"message": "Habit logged"})
 
 
@@ -345,186 +441,154 @@ def log_habit(habit_id):
 def unlog_habit(habit_id):
     user_id = get_jwt_identity()
 
-    habit = Habit.query.filter_by(id=habit_id, user_id=user_id).first()
+    habit = _user_habit(habit_id, user_id)
     if not habit:
         return jsonify({"error": "Habit not found"}), 404
 
     data = request.get_json(silent=True) or {}
-    date_str = data.get("date")
     try:
-        log_date = date.fromisoformat(date_str) if date_str else date.today()
-    except ValueError:
-        return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
+        log_date = habit_queries.parse_log_date(data)
+    except habit_queries.QueryError as e:
+        return jsonify({"error": str(e)}), 400
 
     if not is_applicable(habit, log_date):
         return jsonify({"error": "Habit not scheduled for this date"}), 400
 
-    log = HabitLog.query.filter_by(habit_id=habit.id, date=log_date).first()
+    log = db.session.scalars(habit_queries.habit_log_query(habit.id, log_date)).first()
 
     if not log:
+        # The archive row lock keeps `flask cold-logs archive` off the file meanwhile
+        if cold_storage.discard(user_id, _cold_before(user_id, lock=True), habit.id, log_date):
+            db.session.commit()
+            habit_events.record("log.deleted", {"habit_id": habit_id, "date": log_date})
+            return jsonify({"message": "Habit log undone"})
         return jsonify({"message": "No log found for this date"}), 404
 
     db.session.delete(log)
     db.session.commit()
+    habit_events.record("log.deleted", {"habit_id": habit_id, "date": log_date})
 
     return jsonify({"message": "Habit log undone"})
 
 
-@habits_bp.route("/log-summary", methods=["GET"])
+@habits_bp.route("/<int:habit_id>/logs", methods=["GET"])
 @jwt_required()
-def log_summary():
+@db_timeouts(statement_ms=5000)
+def habit_logs(habit_id):
     user_id = get_jwt_identity()
-    month_str = request.args.get("month")
-
-    if not month_str:
-        return {"error": "Month query param required. Format: YYYY-MM"}, 400
+    owned = db.session.execute(habit_queries.owned_habit_query(habit_id, user_id)).first()
+    if not owned:
+        return jsonify({"error": "Habit not found"}), 404
 
     try:
-        year, month = map(int, month_str.split("-"))
-    except ValueError:
-        return {"error": "Invalid month format. Use YYYY-MM"}, 400
+        before, limit, encoding = habit_queries.parse_log_page(request.args)
+    except habit_queries.QueryError as e:
+        return {"error": str(e)}, 400
 
-    start_date = date(year, month, 1)
-    end_date = date(year, month, monthrange(year, month)[1])
+    dates = db.session.scalars(habit_queries.log_page_query(habit_id, before, limit)).all()
+    dates = cold_storage.merge_log_page(
+        user_id, _cold_before(user_id), habit_id, before, dates, limit
+    )
+    return jsonify(habit_queries.log_page_payload(habit_id, dates, limit, encoding))
 
-    habits = Habit.query.filter_by(user_id=user_id).all()
-    habit_ids = [h.id for h in habits]
 
-    logs = HabitLog.query.filter(
-        HabitLog.habit_id.in_(habit_ids),
-        HabitLog.date >= start_date,
-        HabitLog.date <= end_date
+@habits_bp.route("/log-summary", methods=["GET"])
+@jwt_required()
+@db_timeouts(statement_ms=5000)
+def log_summary():
+    user_id = get_jwt_identity()
+    try:
+        start_date, end_date, encoding, axis = habit_queries.parse_log_summary(request.args)
+    except habit_queries.QueryError as e:
+        return {"error": str(e)}, 400
+    if end_date < date.today():
+        mark_compression_cacheable()
+
+    habit_ids = db.session.scalars(habit_queries.habit_ids_query(user_id)).all()
+    logs = db.session.execute(
+        habit_queries.logs_between_query(habit_ids, start_date, end_date)
     ).all()
-
-    result = {}
-    for log in logs:
-        day = log.date.isoformat()
-        if day not in result:
-            result[day] = []
-        result[day].append(log.habit_id)
-
-    return jsonify(result)
+    logs = cold_storage.merge_logs(
+        user_id, _cold_before(user_id), logs, habit_ids, start_date, end_date
+    )
+    return jsonify(habit_queries.log_summary_payload(
+        logs, habit_ids, start_date, end_date, encoding, axis
+    ))
 
 
 @habits_bp.route("/daily-summary", methods=["GET"])
 @jwt_required()
+@db_timeouts(statement_ms=5000)
 def daily_summary():
     user_id = get_jwt_identity()
-    date_str = request.args.get("date")
-
-    if not date_str:
-        return {"error": "Date query param is required. Format: YYYY-MM-DD"}, 400
-
     try:
-        selected_date = date.fromisoformat(date_str)
-    except ValueError:
-        return {"error": "Invalid date format. Use YYYY-MM-DD"}, 400
-
-    habits = Habit.query.filter(Habit.user_id == user_id).all()
-    applicable = [h for h in habits if is_applicable(h, selected_date)]
+        selected_date = habit_queries.parse_daily_summary(request.args)
+    except habit_queries.QueryError as e:
+        return {"error": str(e)}, 400
 
+    applicable = db.session.execute(habit_queries.daily_habits_query(user_id, selected_date)).all()
     habit_ids = [h.id for h in applicable]
-
-    # Get logs for this date
-    logs = HabitLog.query.filter(
-        HabitLog.habit_id.in_(habit_ids),
-        HabitLog.date == selected_date
-    ).all()
-
-    logged_ids = {log.habit_id for log in logs}
-
-    # Return habit list with completed status
-    summary = []
-    today = date.today()
-    for habit in applicable:
-        if habit.id in logged_ids:
-            status = "complete"
-        else:
-            status = "missed" if selected_date < today else "unlogged"
-        summary.append({
-            "id": habit.id,
-            "name": habit.name,
-            "start_date": habit.start_date.isoformat(),
-            "frequency": habit.frequency,
-            "days_of_week": habit.days_of_week,
-            "status": status,
-            "completed": habit.id in logged_ids,
-        })
-
-    return jsonify(summary)
+    logged_ids = set(db.session.scalars(habit_queries.logged_on_query(habit_ids, selected_date)))
+    logged_ids.update(habit_id for habit_id, _ in cold_storage.merge_logs(
+        user_id, _cold_before(user_id), [], habit_ids, selected_date, selected_date
+    ))
+    return jsonify(habit_queries.daily_summary_payload(
+        applicable, logged_ids, selected_date, date.today()
+    ))
 
 
 @habits_bp.route("/calendar-summary", methods=["GET"])
 @jwt_required()
+@db_timeouts(statement_ms=5000)
 def calendar_summary():
     user_id = get_jwt_identity()
-    month_str = request.args.get("month")
-
-    if not month_str:
-        return {"error": "Month query param is required. Format: YYYY-MM"}, 400
-
     try:
-        month_start = datetime.strptime(month_str, "%Y-%m").date()
-    except ValueError:
-        return {"error": "Invalid month format. Use YYYY-MM"}, 400
+        month_days = habit_queries.parse_calendar_summary(request.args)
+    except habit_queries.QueryError as e:
+        return {"error": str(e)}, 400
+    if month_days[-1] < date.today():
+        mark_compression_cacheable()
 
-    # Generate all days in the month
-    from calendar import monthrange
-    _, last_day = monthrange(month_start.year, month_start.month)
-    month_days = [month_start.replace(day=day) for day in range(1, last_day + 1)]
-
-    # Get user's habits
-    habits = Habit.query.filter_by(user_id=user_id).all()
+    habits = db.session.execute(habit_queries.schedule_habits_query(user_id)).all()
     if not habits:
         return jsonify({})  # No habits for user
 
-    habit_dict = {h.id: h for h in habits}
-    habit_ids = list(habit_dict.keys())
-
-    # Get logs for habits during this month
-    month_end = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
-    logs = HabitLog.query.filter(
-        HabitLog.habit_id.in_(habit_ids),
-        HabitLog.date >= month_start,
-        HabitLog.date < month_end
+    habit_ids = [h.id for h in habits]
+    pauses = db.session.execute(habit_queries.pauses_query(habit_ids)).all()
+    logs = db.session.execute(
+        habit_queries.logs_between_query(habit_ids, month_days[0], month_days[-1])
     ).all()
+    logs = cold_storage.merge_logs(
+        user_id, _cold_before(user_id), logs, habit_ids, month_days[0], month_days[-1]
+    )
+    return jsonify(habit_queries.calendar_summary_payload(
+        habits, pauses, logs, month_days, date.today()
+    ))
 
-    # Organize logs by date
-    logs_by_date = defaultdict(list)
-    for log in logs:
-        logs_by_date[log.date].append(log.habit_id)
+
+@habits_bp.route("/week-grid", methods=["GET"])
+@jwt_required()
+@db_timeouts(statement_ms=5000)
+def week_grid():
+    user_id = get_jwt_identity()
+    try:
+        days = habit_queries.parse_week_grid(request.args)
+    except habit_queries.QueryError as e:
+        return {"error": str(e)}, 400
+
+    habits = db.session.execute(habit_queries.schedule_habits_query(user_id)).all()
+    habit_ids = [h.id for h in habits]
+    pauses, logs = [], []
+    if habit_ids:
+        pauses = db.session.execute(habit_queries.pauses_query(habit_ids)).all()
+        logs = db.session.execute(
+            habit_queries.logs_between_query(habit_ids, days[0], days[-1])
+        ).all()
+    logs = cold_storage.merge_logs(
+        user_id, _cold_before(user_id), logs, habit_ids, days[0], days[-1]
+    )
 
     today = date.today()
-    summary = {}
-
-    for day in month_days:
-        if day > today:
-            summary[day.isoformat()] = {"status": "future"}
-            continue
-
-        # Only consider habits that should appear on this day
-        applicable_habits = [h for h in habits if is_applicable(h, day)]
-        total = len(applicable_habits)
-
-        if total == 0:
-            summary[day.isoformat()] = {"status": "inactive"}
-            continue
-
-        completed = logs_by_date.get(day, [])
-        applicable_ids = {h.id for h in applicable_habits}
-        done = len({hid for hid in completed if hid in applicable_ids})
-
-        if done == 0:
-            status = "incomplete"
-        elif done == total:
-            status = "complete"
-        else:
-            status = "partial"
-
-        summary[day.isoformat()] = {
-            "status": status,
-            "completed": done,
-            "total": total
-        }
-
-    return jsonify(summary)
+    if days[-1] < today:
+        mark_compression_cacheable()
+    return jsonify(habit_queries.week_grid_payload(habits, pauses, logs, days, today))
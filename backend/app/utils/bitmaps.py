@@ -0,0 +1,35 @@
+# app/utils/bitmaps.py
+import base64
+from collections import defaultdict
+
+
+def pack_bits(bits: int, length: int) -> bytes:
+    """Little-endian bitset: bit ``i`` lives in byte ``i // 8`` at position ``i % 8``."""
+    return bits.to_bytes((length + 7) // 8, "little")
+
+
+def unpack_bits(data: bytes) -> int:
+    return int.from_bytes(data, "little")
+
+
+def encode_bits(bits: int, length: int) -> str:
+    return base64.b64encode(pack_bits(bits, length)).decode("ascii")
+
+
+def day_bitmaps(pairs, habit_ids):
+    """Map each date to a bitset over ``habit_ids`` of the habits logged that day."""
+    index = {habit_id: i for i, habit_id in enumerate(habit_ids)}
+    days = defaultdict(int)
+    for habit_id, day in pairs:
+        days[day] |= 1 << index[habit_id]
+    return {day: encode_bits(bits, len(habit_ids)) for day, bits in sorted(days.items())}
+
+
+def habit_bitmaps(pairs, habit_ids, start, length):
+    """One bitset per habit (in ``habit_ids`` order) over ``length`` days from ``start``."""
+    index = {habit_id: i for i, habit_id in enumerate(habit_ids)}
+    rows = [0] * len(habit_ids)
+    origin = start.toordinal()
+    for habit_id, day in pairs:
+        rows[index[habit_id]] |= 1 << (day.toordinal() - origin)
+    return [encode_bits(bits, length) for bits in rows]
@@ -0,0 +1,306 @@
+# app/utils/cold_logs.py
+"""Cold storage for habit logs older than COLD_LOG_HORIZON_DAYS.
+
+``flask cold-logs archive`` moves a user's old ``habit_log`` rows into one
+file per user and records the cut-off in ``cold_log_archives``. A file
+holds one bit-packed column per habit: bit ``i`` is set when the habit was
+logged ``i`` days after the column's first day, so a few years of a daily
+habit fit in a couple of hundred bytes before zlib. Reads only open the
+file when the requested range starts before the user's cut-off.
+"""
+import os
+import struct
+import tempfile
+import zlib
+from collections import defaultdict
+from datetime import date, datetime
+from urllib.parse import urlsplit
+
+from sqlalchemy import delete, select
+
+from app.utils.bitmaps import pack_bits, unpack_bits
+
+try:
+    import boto3
+except ImportError:  # optional, only needed for s3:// storage
+    boto3 = None
+
+MAGIC = b"HLC1"
+# habit_id, ordinal of the column's first day, number of days it covers
+_COLUMN = struct.Struct("<qiI")
+
+
+def _set_bits(bits):
+    """Indexes of the set bits, lowest first."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class ColdLogs:
+    """The logged days of a user's habits, one ``(first_ordinal, bits)`` column per habit."""
+
+    def __init__(self, columns=None):
+        self.columns = columns or {}
+
+    def __len__(self):
+        return sum(bin(bits).count("1") for _, bits in self.columns.values())
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data.startswith(MAGIC):
+            raise ValueError("Not a cold log file")
+        body = zlib.decompress(data[len(MAGIC):])
+        columns = {}
+        offset = 0
+        while offset < len(body):
+            habit_id, first, length = _COLUMN.unpack_from(body, offset)
+            offset += _COLUMN.size
+            size = (length + 7) // 8
+            columns[habit_id] = (first, unpack_bits(body[offset:offset + size]))
+            offset += size
+        return cls(columns)
+
+    def to_bytes(self):
+        body = bytearray()
+        for habit_id, (first, bits) in sorted(self.columns.items()):
+            if not bits:
+                continue
+            # Trim the column to its first and last logged day
+            shift = (bits & -bits).bit_length() - 1
+            bits >>= shift
+            length = bits.bit_length()
+            body += _COLUMN.pack(habit_id, first + shift, length)
+            body += pack_bits(bits, length)
+        return MAGIC + zlib.compress(bytes(body), 9)
+
+    def update(self, pairs):
+        days = defaultdict(list)
+        for habit_id, day in pairs:
+            days[habit_id].append(day.toordinal())
+        for habit_id, ordinals in days.items():
+            first, bits = self.columns.get(habit_id, (min(ordinals), 0))
+            origin = min(first, *ordinals)
+            bits <<= first - origin
+            for ordinal in ordinals:
+                bits |= 1 << (ordinal - origin)
+            self.columns[habit_id] = (origin, bits)
+
+    def discard(self, habit_id, day):
+        """Clear one day; returns whether it was set."""
+        if not self.contains(habit_id, day):
+            return False
+        first, bits = self.columns[habit_id]
+        self.columns[habit_id] = (first, bits & ~(1 << (day.toordinal() - first)))
+        return True
+
+    def retain(self, habit_ids):
+        """Forget columns of habits that no longer exist."""
+        keep = set(habit_ids)
+        self.columns = {hid: column for hid, column in self.columns.items() if hid in keep}
+
+    def contains(self, habit_id, day):
+        first, bits = self.columns.get(habit_id, (0, 0))
+        offset = day.toordinal() - first
+        return offset >= 0 and bool(bits >> offset & 1)
+
+    def pairs(self, habit_ids, start, end):
+        """``(habit_id, date)`` for every logged day from ``start`` through ``end``."""
+        low, high = start.toordinal(), end.toordinal()
+        for habit_id in habit_ids:
+            if habit_id not in self.columns:
+                continue
+            first, bits = self.columns[habit_id]
+            offset = low - first
+            window = bits >> offset if offset > 0 else bits << -offset
+            window &= (1 << (high - low + 1)) - 1
+            for i in _set_bits(window):
+                yield habit_id, date.fromordinal(low + i)
+
+    def dates(self, habit_id, before=None):
+        """The habit's logged days, newest first, optionally only those before ``before``."""
+        if habit_id not in self.columns:
+            return []
+        first, bits = self.columns[habit_id]
+        if before is not None:
+            bits &= (1 << max(0, before.toordinal() - first)) - 1
+        return [date.fromordinal(first + i) for i in reversed(list(_set_bits(bits)))]
+
+
+class LocalStore:
+    """Files under a directory; writes are atomic renames."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+
+class S3Store:
+    """Objects in an S3-compatible bucket (AWS, MinIO, R2 via ``endpoint_url``)."""
+
+    def __init__(self, bucket, prefix, endpoint_url=None):
+        if boto3 is None:
+            raise RuntimeError("s3:// cold storage requires the boto3 package")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def _key(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def get(self, key):
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read()
+
+    def put(self, key, data):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+
+def open_store(url, endpoint_url=None):
+    """A store for a directory / ``file://`` path or an ``s3://bucket/prefix`` URL."""
+    parts = urlsplit(url)
+    if parts.scheme in ("", "file"):
+        return LocalStore(parts.path if parts.scheme else url)
+    if parts.scheme == "s3":
+        return S3Store(parts.netloc, parts.path, endpoint_url)
+    raise RuntimeError(f"Unsupported COLD_STORAGE_URL: {url}")
+
+
+class ColdStorage:
+    """Moves old habit logs to COLD_STORAGE_URL and merges them back into reads.
+
+    ``before`` arguments are the user's cut-off from ``cold_log_archives``
+    (``None`` when nothing was archived): every cold log is dated before
+    it, while the hot table may still hold older days logged since.
+    """
+
+    def __init__(self):
+        self.store = None
+        self.horizon_days = 1095
+
+    def init_app(self, app):
+        app.config.setdefault("COLD_STORAGE_URL", "")
+        app.config.setdefault("COLD_STORAGE_ENDPOINT_URL", None)
+        app.config.setdefault("COLD_LOG_HORIZON_DAYS", 1095)
+        url = app.config["COLD_STORAGE_URL"]
+        self.store = open_store(url, app.config["COLD_STORAGE_ENDPOINT_URL"]) if url else None
+        self.horizon_days = int(app.config["COLD_LOG_HORIZON_DAYS"])
+
+    @property
+    def enabled(self):
+        return self.store is not None
+
+    def _key(self, user_id):
+        return f"habit-logs/{int(user_id)}.hlc"
+
+    def load(self, user_id):
+        data = self.store.get(self._key(user_id))
+        return ColdLogs.from_bytes(data) if data else ColdLogs()
+
+    def save(self, user_id, logs):
+        self.store.put(self._key(user_id), logs.to_bytes())
+
+    def delete(self, user_id):
+        if self.enabled:
+            self.store.delete(self._key(user_id))
+
+    def merge_logs(self, user_id, before, rows, habit_ids, start, end):
+        """Hot ``(habit_id, date)`` rows plus the cold ones in ``start``..``end``."""
+        if not self.enabled or before is None or start >= before or not habit_ids:
+            return rows
+        cold = self.load(user_id).pairs(habit_ids, start, end)
+        return sorted({tuple(row) for row in rows}.union(cold), key=lambda r: (r[1], r[0]))
+
+    def merge_log_page(self, user_id, before, habit_id, page_before, dates, limit):
+        """Newest-first page of ``limit + 1`` dates from a hot page and the cold column."""
+        if not self.enabled or before is None:
+            return dates
+        if len(dates) > limit and dates[-1] >= before:
+            return dates  # a full page newer than anything cold
+        cold = self.load(user_id).dates(habit_id, page_before)
+        return sorted(set(dates).union(cold), reverse=True)[:limit + 1]
+
+    def contains(self, user_id, before, habit_id, day):
+        if not self.enabled or before is None or day >= before:
+            return False
+        return self.load(user_id).contains(habit_id, day)
+
+    def discard(self, user_id, before, habit_id, day):
+        """Remove one cold log; the caller holds the user's archive row lock."""
+        if not self.enabled or before is None or day >= before:
+            return False
+        logs = self.load(user_id)
+        if not logs.discard(habit_id, day):
+            return False
+        self.save(user_id, logs)
+        return True
+
+    def archive_user(self, session, user_id, before):
+        """Move the user's logs dated before ``before`` out of habit_log.
+
+        The file is built from the rows the DELETE returns, so a log
+        written concurrently is either deleted and archived or left hot,
+        never lost. It is saved before the caller commits: a failed
+        commit leaves logs in both tiers, which reads tolerate. Returns
+        the number of rows moved.
+        """
+        from app.models.cold_log_archive import ColdLogArchive
+        from app.models.habit import Habit
+        from app.models.log import HabitLog
+
+        archive = session.get(ColdLogArchive, user_id, with_for_update=True)
+        habit_ids = session.scalars(select(Habit.id).where(Habit.user_id == user_id)).all()
+        rows = session.execute(
+            delete(HabitLog)
+            .where(HabitLog.habit_id.in_(habit_ids), HabitLog.date < before)
+            .returning(HabitLog.habit_id, HabitLog.date)
+        ).all()
+        if not rows:
+            return 0
+
+        logs = self.load(user_id) if archive else ColdLogs()
+        logs.update(rows)
+        logs.retain(habit_ids)
+        self.save(user_id, logs)
+
+        if archive is None:
+            archive = ColdLogArchive(user_id=user_id, before=before)
+            session.add(archive)
+        archive.before = max(archive.before, before)
+        archive.log_count = len(logs)
+        archive.archived_at = datetime.utcnow()
+        return len(rows)
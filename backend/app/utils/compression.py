@@ -0,0 +1,150 @@
+# app/utils/compression.py
+import hashlib
+import threading
+import zlib
+
+from cachetools import LRUCache
+from flask import current_app, g, request
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+
+def mark_compression_cacheable():
+    """Let the compressed body of this response be reused for identical payloads."""
+    g.compression_cacheable = True
+
+
+class _GzipStream:
+    def __init__(self, level):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.finish()
+
+
+class _ZstdStream:
+    def __init__(self, level):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class Compressor:
+    """Negotiates br/zstd/gzip response compression from Accept-Encoding."""
+
+    streams = {"br": _BrotliStream, "zstd": _ZstdStream, "gzip": _GzipStream}
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._cache = LRUCache(maxsize=256)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("COMPRESS_ALGORITHMS", ["br", "zstd", "gzip"])
+        app.config.setdefault("COMPRESS_MIMETYPES", {"application/json"})
+        app.config.setdefault("COMPRESS_MIN_SIZE", 1024)
+        app.config.setdefault("COMPRESS_GZIP_LEVEL", 6)
+        app.config.setdefault("COMPRESS_BR_LEVEL", 5)
+        app.config.setdefault("COMPRESS_ZSTD_LEVEL", 3)
+        app.config.setdefault("COMPRESS_CACHE_SIZE", 256)
+        with self._lock:
+            self._cache = LRUCache(maxsize=app.config["COMPRESS_CACHE_SIZE"])
+        app.before_request(self.before_request)
+        app.after_request(self.after_request)
+
+    def available(self, config):
+        installed = {"gzip": True, "br": brotli is not None, "zstd": zstandard is not None}
+        return [name for name in config["COMPRESS_ALGORITHMS"] if installed.get(name)]
+
+    def level(self, config, encoding):
+        return int(config[f"COMPRESS_{encoding.upper()}_LEVEL"])
+
+    def before_request(self):
+        g.pop("compression_cacheable", None)
+
+    def after_request(self, response):
+        config = current_app.config
+        if (
+            request.method == "HEAD"
+            or response.status_code < 200
+            or response.status_code in (204, 206, 304)
+            or "Content-Encoding" in response.headers
+            or response.direct_passthrough
+            or response.mimetype not in config["COMPRESS_MIMETYPES"]
+        ):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = request.accept_encodings.best_match(self.available(config))
+        if not encoding:
+            return response
+        level = self.level(config, encoding)
+
+        if response.is_streamed:
+            response.response = self._compress_stream(response.response, encoding, level)
+            response.headers.pop("Content-Length", None)
+        else:
+            data = response.get_data()
+            if len(data) < config["COMPRESS_MIN_SIZE"]:
+                return response
+            cacheable = g.get("compression_cacheable", False)
+            response.set_data(self.compress(data, encoding, level, cacheable))
+
+        response.headers["Content-Encoding"] = encoding
+        return response
+
+    def compress(self, data, encoding, level, cacheable=False):
+        """Compress a whole body, reusing the cached result for cacheable payloads."""
+        if not cacheable:
+            return self._compress_once(data, encoding, level)
+
+        key = (encoding, level, hashlib.blake2b(data, digest_size=16).digest())
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            self.misses += 1
+        compressed = self._compress_once(data, encoding, level)
+        with self._lock:
+            self._cache[key] = compressed
+        return compressed
+
+    def _compress_once(self, data, encoding, level):
+        stream = self.streams[encoding](level)
+        return stream.compress(data) + stream.flush()
+
+    def _compress_stream(self, chunks, encoding, level):
+        stream = self.streams[encoding](level)
+        for chunk in chunks:
+            compressed = stream.compress(chunk.encode() if isinstance(chunk, str) else chunk)
+            if compressed:
+                yield compressed
+        yield stream.flush()
@@ -0,0 +1,21 @@
+# app/utils/date_runs.py
+from datetime import timedelta
+
+
+def encode_date_runs(dates):
+    """Collapse newest-first dates into ``[last_date, length]`` runs of consecutive days.
+
+    Each run covers ``length`` days ending at ``last_date``; runs keep the
+    newest-first order of the input.
+    """
+    runs = []
+    for day in dates:
+        if runs and runs[-1][0] - timedelta(days=runs[-1][1]) == day:
+            runs[-1][1] += 1
+        else:
+            runs.append([day, 1])
+    return runs
+
+
+def decode_date_runs(runs):
+    return [last - timedelta(days=i) for last, length in runs for i in range(length)]
@@ -0,0 +1,116 @@
+# app/utils/db_routing.py
+import random
+import threading
+
+from cachetools import TTLCache
+from flask import request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, TimestampSigner
+
+REPLICA_BIND_PREFIX = "replica"
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Signed ``user_id`` and write time, echoed back by the client on its reads
+LAST_WRITE_HEADER = "Last-Write"
+
+
+class RoutingSession(Session):
+    """Session that sends reads to the replica bind chosen for the request.
+
+    Flushes always go to the primary, as does anything once a request has
+    been pinned to it.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get("replica_bind")
+        if bind is None and replica is not None and not self._flushing:
+            return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    """Routes read-only requests of a blueprint to replica binds.
+
+    Users who made a mutating request within ``READ_YOUR_WRITES_SECONDS``
+    keep reading from the primary so they always see their own writes. The
+    write is remembered by the process that served it and, for every other
+    worker, by the signed ``Last-Write`` header the client sends back.
+    """
+
+    def __init__(self):
+        self._db = None
+        self._recent_writes = TTLCache(maxsize=100_000, ttl=5)
+        self._lock = threading.Lock()
+        self._signer = None
+        self.window = 5.0
+
+    def init_app(self, app, db):
+        app.config.setdefault("READ_YOUR_WRITES_SECONDS", 5)
+        self._db = db
+        self.window = float(app.config["READ_YOUR_WRITES_SECONDS"])
+        self._signer = TimestampSigner(app.config["JWT_SECRET_KEY"], salt="read-your-writes")
+        with self._lock:
+            self._recent_writes = TTLCache(maxsize=100_000, ttl=self.window)
+
+    def route_blueprint(self, blueprint):
+        blueprint.before_request(self._before_request)
+        blueprint.after_request(self._after_request)
+
+    def replica_binds(self):
+        return sorted(
+            key for key in self._db.engines
+            if isinstance(key, str) and key.startswith(REPLICA_BIND_PREFIX)
+        )
+
+    def recently_wrote(self, user_id):
+        with self._lock:
+            return user_id in self._recent_writes
+
+    def record_write(self, user_id):
+        with self._lock:
+            self._recent_writes[user_id] = True
+
+    def forget_writes(self):
+        with self._lock:
+            self._recent_writes.clear()
+
+    def write_token(self, user_id):
+        return self._signer.sign(str(user_id)).decode()
+
+    def pinned(self, user_id, token=None):
+        """Whether ``user_id`` wrote within the window, here or on any worker."""
+        if self.recently_wrote(user_id):
+            return True
+        if not token or user_id is None:
+            return False
+        try:
+            signed = self._signer.unsign(token, max_age=self.window)
+        except BadSignature:
+            return False
+        return signed.decode() == str(user_id)
+
+    def _before_request(self):
+        self._db.session.info.pop("replica_bind", None)
+        if request.method not in READ_METHODS:
+            return
+        replicas = self.replica_binds()
+        if not replicas or self.pinned(_current_user(), request.headers.get(LAST_WRITE_HEADER)):
+            return
+        self._db.session.info["replica_bind"] = random.choice(replicas)
+
+    def _after_request(self, response):
+        self._db.session.info.pop("replica_bind", None)
+        if request.method not in READ_METHODS:
+            user_id = _current_user()
+            if user_id is not None:
+                self.record_write(user_id)
+                response.headers[LAST_WRITE_HEADER] = self.write_token(user_id)
+        return response
+
+
+def _current_user():
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
@@ -0,0 +1,73 @@
+# app/utils/db_timeouts.py
+from functools import wraps
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event
+
+
+# SQLSTATEs of a cancelled statement and a lock wait timeout
+TIMEOUT_ERRORS = {"57014": "query_timeout", "55P03": "lock_timeout"}
+
+
+def operational_error_code(error):
+    """The ``error`` code a 503 response reports for an OperationalError."""
+    return TIMEOUT_ERRORS.get(getattr(error.orig, "pgcode", None), "database_unavailable")
+
+
+def db_timeouts(statement_ms=None, lock_ms=None):
+    """Override statement/lock timeouts for the transactions of one endpoint."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if statement_ms is not None:
+                g.db_statement_timeout_ms = statement_ms
+            if lock_ms is not None:
+                g.db_lock_timeout_ms = lock_ms
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_timeouts():
+    if not has_app_context():
+        return 0, 0
+    config = current_app.config
+    return (
+        int(g.get("db_statement_timeout_ms", config.get("DB_STATEMENT_TIMEOUT_MS", 0))),
+        int(g.get("db_lock_timeout_ms", config.get("DB_LOCK_TIMEOUT_MS", 0))),
+    )
+
+
+def timeouts_sql(statement_ms, lock_ms):
+    """One statement setting both timeouts for the transaction, or None if both are 0.
+
+    set_config(..., true) is SET LOCAL, so the timeouts are safe behind a
+    transaction-pooling proxy.
+    """
+    settings = [
+        f"set_config('{name}', '{int(ms)}', true)"
+        for name, ms in (("statement_timeout", statement_ms), ("lock_timeout", lock_ms))
+        if ms
+    ]
+    return f"SELECT {', '.join(settings)}" if settings else None
+
+
+def apply_timeouts(session, transaction, connection):
+    if connection.dialect.name != "postgresql":
+        return
+    sql = timeouts_sql(*current_timeouts())
+    if sql:
+        connection.exec_driver_sql(sql)
+
+
+def init_app(app, session_class):
+    app.config.setdefault("DB_STATEMENT_TIMEOUT_MS", 0)
+    app.config.setdefault("DB_LOCK_TIMEOUT_MS", 0)
+    app.before_request(_reset_timeouts)
+    if not event.contains(session_class, "after_begin", apply_timeouts):
+        event.listen(session_class, "after_begin", apply_timeouts)
+
+
+def _reset_timeouts():
+    g.pop("db_statement_timeout_ms", None)
+    g.pop("db_lock_timeout_ms", None)
@@ -0,0 +1,385 @@
+# app/utils/events.py
+"""Per-user change events behind ``GET /api/habits/events``.
+
+Mutating handlers of habits_bp ``record()`` a compact delta (an upsert or
+removal keyed by id, safe to apply twice); once the request has succeeded
+it is published as one Server-Sent Event to the broker named by
+EVENT_BROKER_URL:
+
+- empty or ``memory://``: in-process, for a single node.
+- ``postgresql://...``: NOTIFY/LISTEN on the ``habit_events`` channel,
+  over psycopg2 and a direct connection: a transaction-pooling proxy
+  such as pgbouncer never delivers the notifications.
+- ``redis://...``: PUBLISH/SUBSCRIBE, with the ``redis`` package installed.
+
+Each process keeps a ``Hub`` of its open streams and the last
+EVENT_REPLAY_SIZE events per user. Remote brokers feed it from one
+listener thread per process, the publishing process included. A client
+reconnecting with ``Last-Event-ID`` is sent what it missed, or a
+``resync`` event (refetch, then keep applying deltas) when that id is no
+longer known or its stream fell too far behind.
+"""
+import asyncio
+import itertools
+import logging
+import queue
+import secrets
+import select
+import threading
+import time
+import weakref
+from collections import deque
+from urllib.parse import urlsplit
+
+from cachetools import TTLCache
+from flask import g
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app.utils.json_provider import dumps
+
+try:
+    import redis
+except ImportError:  # optional, only needed for redis:// brokers
+    redis = None
+
+logger = logging.getLogger("app.events")
+
+CHANNEL = "habit_events"
+RESYNC = "event: resync\ndata: {}\n\n"
+KEEPALIVE = ": keepalive\n\n"
+STREAM_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def format_event(event_id, event_type, data):
+    return f"id: {event_id}\nevent: {event_type}\ndata: {dumps(data).decode()}\n\n"
+
+
+class Subscription:
+    """One stream's queue, filled by publishing threads and drained by its request thread."""
+
+    def __init__(self, size):
+        self._queue = queue.Queue(size)
+        self.overflowed = False
+
+    def put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.overflowed = True
+
+    def get(self, timeout):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription:
+    """``Subscription`` for a stream served on an event loop."""
+
+    def __init__(self, size):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(size)
+        self.overflowed = False
+
+    def put(self, message):
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass  # the loop closed under a stream that is going away
+
+    def _put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Hub:
+    """This process's open streams and recent events, per user.
+
+    Streams are held weakly, so one dropped before its body ever ran
+    doesn't linger.
+    """
+
+    def __init__(self):
+        self.replay_size = 100
+        self.queue_size = 100
+        self._streams = {}
+        self._recent = TTLCache(maxsize=50_000, ttl=600)
+        self._lock = threading.Lock()
+
+    def dispatch(self, user_id, event_id, message):
+        with self._lock:
+            recent = self._recent.get(user_id) or deque(maxlen=self.replay_size)
+            recent.append((event_id, message))
+            self._recent[user_id] = recent
+            for subscription in self._streams.get(user_id, ()):
+                subscription.put(message)
+
+    def subscribe(self, user_id, subscription, last_event_id=None):
+        """Attach ``subscription``, first queueing what followed ``last_event_id``."""
+        with self._lock:
+            if last_event_id:
+                recent = list(self._recent.get(user_id, ()))
+                ids = [event_id for event_id, _ in recent]
+                if last_event_id in ids:
+                    for _, message in recent[ids.index(last_event_id) + 1:]:
+                        subscription.put(message)
+                else:
+                    subscription.put(RESYNC)
+            self._streams.setdefault(user_id, weakref.WeakSet()).add(subscription)
+
+    def resync(self):
+        """Tell every open stream it may have missed events."""
+        with self._lock:
+            for streams in self._streams.values():
+                for subscription in streams:
+                    subscription.put(RESYNC)
+
+    def unsubscribe(self, user_id, subscription):
+        with self._lock:
+            streams = self._streams.get(user_id)
+            if streams is not None:
+                streams.discard(subscription)
+                if not streams:
+                    del self._streams[user_id]
+
+
+class LocalBroker:
+    """Hands events straight to this process's hub: a single node."""
+
+    def __init__(self, hub):
+        self.hub = hub
+
+    def start(self):
+        pass
+
+    def publish(self, user_id, event_id, message):
+        self.hub.dispatch(user_id, event_id, message)
+
+
+class _ListeningBroker:
+    """Publishes to a shared channel and relays it into the hub from a daemon thread.
+
+    The thread starts with the first stream and reconnects with backoff;
+    streams open across a reconnect are sent ``resync``.
+    """
+
+    def __init__(self, hub):
+        self.hub = hub
+        self._thread = None
+        self._lost = False
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=CHANNEL, daemon=True)
+                self._thread.start()
+        self._ready.wait(5)
+
+    def _run(self):
+        delay = 1
+        while True:
+            try:
+                self._listen()
+                delay = 1
+            except Exception:
+                self._lost = True
+                logger.exception("event listener failed; reconnecting in %ss", delay)
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+            finally:
+                self._ready.clear()
+
+    def _listening(self):
+        self._ready.set()
+        if self._lost:
+            self._lost = False
+            self.hub.resync()
+
+    @staticmethod
+    def _payload(user_id, event_id, message):
+        return f"{user_id}\n{event_id}\n{message}"
+
+    def _deliver(self, payload):
+        user_id, event_id, message = payload.split("\n", 2)
+        self.hub.dispatch(int(user_id), event_id, message)
+
+
+class PostgresBroker(_ListeningBroker):
+    def __init__(self, hub, url):
+        super().__init__(hub)
+        self.engine = create_engine(url, pool_size=2, pool_pre_ping=True)
+
+    def publish(self, user_id, event_id, message):
+        with self.engine.begin() as conn:
+            conn.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": CHANNEL, "payload": self._payload(user_id, event_id, message)},
+            )
+
+    def _listen(self):
+        raw = self.engine.raw_connection()
+        conn = raw.driver_connection
+        raw.detach()  # autocommit and LISTEN stay with this connection, off the pool
+        try:
+            conn.rollback()
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {CHANNEL}")
+            self._listening()
+            while True:
+                select.select([conn], [], [], 30)
+                conn.poll()  # also raises once the connection is gone
+                while conn.notifies:
+                    self._deliver(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+
+class RedisBroker(_ListeningBroker):
+    def __init__(self, hub, url):
+        if redis is None:
+            raise RuntimeError("redis:// event brokers require the redis package")
+        super().__init__(hub)
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, user_id, event_id, message):
+        self.client.publish(CHANNEL, self._payload(user_id, event_id, message))
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(CHANNEL)
+            self._listening()
+            for item in pubsub.listen():
+                if item["type"] == "message":
+                    self._deliver(item["data"].decode())
+        finally:
+            pubsub.close()
+
+
+def open_broker(url, hub):
+    """A broker for an EVENT_BROKER_URL; empty means in-process."""
+    scheme = urlsplit(url).scheme
+    if scheme in ("", "memory"):
+        return LocalBroker(hub)
+    if scheme.startswith("postgresql"):
+        # The listener polls the psycopg2 connection for notifications
+        if make_url(url).get_driver_name() != "psycopg2":
+            raise RuntimeError(
+                f"postgresql event brokers need the psycopg2 driver, not {scheme}://"
+            )
+        return PostgresBroker(hub, url)
+    if scheme in ("redis", "rediss"):
+        return RedisBroker(hub, url)
+    raise RuntimeError(f"Unsupported EVENT_BROKER_URL: {url}")
+
+
+class HabitEvents:
+    """Publishes habits_bp changes and serves them as per-user SSE streams.
+
+    Streams end after EVENT_STREAM_SECONDS (under the WSGI worker timeout);
+    clients reconnect with ``Last-Event-ID`` and miss nothing the hub still
+    holds. A comment line goes out every EVENT_KEEPALIVE_SECONDS of quiet.
+    The Flask route only streams with EVENT_STREAM_WSGI set, since a sync
+    worker would be held for the whole stream.
+    """
+
+    def __init__(self):
+        self.hub = Hub()
+        self.broker = LocalBroker(self.hub)
+        self.stream_seconds = 25.0
+        self.keepalive_seconds = 15.0
+        self.retry_ms = 3000
+        self.wsgi_streams = False
+        self._node = secrets.token_hex(3)
+        self._sequence = itertools.count(1)
+
+    def init_app(self, app):
+        app.config.setdefault("EVENT_BROKER_URL", "")
+        app.config.setdefault("EVENT_STREAM_SECONDS", 25)
+        app.config.setdefault("EVENT_KEEPALIVE_SECONDS", 15)
+        app.config.setdefault("EVENT_REPLAY_SIZE", 100)
+        app.config.setdefault("EVENT_STREAM_WSGI", False)
+        self.stream_seconds = float(app.config["EVENT_STREAM_SECONDS"])
+        self.keepalive_seconds = float(app.config["EVENT_KEEPALIVE_SECONDS"])
+        self.hub.replay_size = int(app.config["EVENT_REPLAY_SIZE"])
+        self.wsgi_streams = bool(app.config["EVENT_STREAM_WSGI"])
+        self.broker = open_broker(app.config["EVENT_BROKER_URL"], self.hub)
+
+    def route_blueprint(self, blueprint):
+        blueprint.after_request(self._after_request)
+
+    def record(self, event_type, data):
+        """Queue a delta for the current user, published if the request succeeds."""
+        g.setdefault("habit_events", []).append((event_type, data))
+
+    def publish(self, user_id, event_type, data):
+        event_id = f"{self._node}.{next(self._sequence)}"
+        message = format_event(event_id, event_type, data)
+        try:
+            self.broker.publish(int(user_id), event_id, message)
+        except Exception:
+            # The change is committed; streams catch up through a later resync.
+            logger.exception("could not publish %s for user %s", event_type, user_id)
+
+    def stream(self, user_id, last_event_id=None):
+        """The body of one SSE response; the subscription starts before it is returned."""
+        self.broker.start()
+        subscription = Subscription(self.hub.queue_size)
+        self.hub.subscribe(int(user_id), subscription, last_event_id)
+        return self._drain(int(user_id), subscription)
+
+    async def astream(self, user_id, last_event_id=None):
+        """``stream`` for the ASGI app."""
+        await asyncio.to_thread(self.broker.start)
+        subscription = AsyncSubscription(self.hub.queue_size)
+        self.hub.subscribe(int(user_id), subscription, last_event_id)
+        return self._adrain(int(user_id), subscription)
+
+    def _drain(self, user_id, subscription):
+        deadline = time.monotonic() + self.stream_seconds
+        try:
+            yield f"retry: {self.retry_ms}\n\n"
+            while not subscription.overflowed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                message = subscription.get(min(self.keepalive_seconds, remaining))
+                yield KEEPALIVE if message is None else message
+            yield RESYNC
+        finally:
+            self.hub.unsubscribe(user_id, subscription)
+
+    async def _adrain(self, user_id, subscription):
+        deadline = time.monotonic() + self.stream_seconds
+        try:
+            yield f"retry: {self.retry_ms}\n\n"
+            while not subscription.overflowed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                message = await subscription.get(min(self.keepalive_seconds, remaining))
+                yield KEEPALIVE if message is None else message
+            yield RESYNC
+        finally:
+            self.hub.unsubscribe(user_id, subscription)
+
+    def _after_request(self, response):
+        events = g.pop("habit_events", None)
+        if events and response.status_code < 400:
+            user_id = get_jwt_identity()
+            for event_type, data in events:
+                self.publish(user_id, event_type, data)
+        return response
@@ -0,0 +1,558 @@
+# app/utils/habit_queries.py
+"""Validation, statements and payloads behind the read-only habit endpoints,
+plus the validation and lookups the write endpoints share.
+
+Nothing here touches a session or the request: the Flask handlers in
+``app.routes.habits`` and the async ones in ``app.asgi`` parse the same
+query args, run the same statements and shape the same JSON. Statements
+select columns, not entities; see ``app.utils.read_models``.
+
+Every statement is a ``lambda_stmt``: its construct is built and its cache
+key computed once per code path, after which a call only extracts the
+closure values as bound parameters. ``in_()`` lists bind as one expanding
+parameter, so their length doesn't change the key. Values the SQL needs
+derived (``limit + 1``, a weekday bit) are computed outside the lambdas.
+"""
+from calendar import monthrange
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, lambda_stmt, select
+from sqlalchemy.orm import selectinload
+
+from app.models.cold_log_archive import ColdLogArchive
+from app.models.habit import Habit
+from app.models.habit_pause import HabitPause
+from app.models.log import HabitLog
+from app.utils.bitmaps import day_bitmaps, habit_bitmaps
+from app.utils.date_runs import encode_date_runs
+from app.utils.pauses import PauseIndex
+from app.utils.read_models import group_pauses, habit_schedules
+
+HABIT_FIELDS = ("name", "start_date", "frequency", "days_of_week", "pauses")
+HABIT_COLUMNS = {
+    "name": Habit.name,
+    "start_date": Habit.start_date,
+    "frequency": Habit.frequency,
+    "days_of_week": Habit.days_of_week,
+}
+MAX_PAGE_SIZE = 200
+MAX_LOG_PAGE_SIZE = 1000
+
+# One code per week-grid cell; the index is the code sent to clients.
+GRID_STATES = ("inactive", "not_scheduled", "paused", "done", "missed", "pending", "future")
+GRID_CODES = {state: str(code) for code, state in enumerate(GRID_STATES)}
+MAX_GRID_DAYS = 31
+
+
+class QueryError(ValueError):
+    """A query argument was rejected; the message is the 400 ``error``."""
+
+
+def is_applicable(habit: Habit, check_date: date, pauses: PauseIndex = None) -> bool:
+    """Return True if the habit should be shown on the given date.
+
+    Pass a prebuilt ``PauseIndex`` when checking the same habit repeatedly.
+    """
+    if habit.start_date > check_date:
+        return False
+    if (pauses if pauses is not None else PauseIndex(habit.pauses)).covers(check_date):
+        return False
+    if habit.frequency == 'DAILY':
+        return True
+    if habit.frequency == 'WEEKLY':
+        weekday = check_date.weekday()  # 0=Mon..6=Sun
+        return habit.days_of_week and weekday in habit.days_of_week
+    return True
+
+
+def int_arg(args, name):
+    value = args.get(name)
+    return None if value is None else int(value)
+
+
+def _date_arg(args, name, missing=None):
+    value = args.get(name)
+    if not value:
+        if missing:
+            raise QueryError(missing)
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise QueryError("Invalid date format. Use YYYY-MM-DD") from None
+
+
+def cold_before_query(user_id, lock=False):
+    """The user's cold-storage cut-off (see ``app.utils.cold_logs``)."""
+    stmt = lambda_stmt(
+        lambda: select(ColdLogArchive.before).where(ColdLogArchive.user_id == user_id)
+    )
+    if lock:
+        stmt += lambda s: s.with_for_update()
+    return stmt
+
+
+def pauses_query(habit_ids):
+    return lambda_stmt(
+        lambda: select(HabitPause.habit_id, HabitPause.start_date, HabitPause.end_date)
+        .where(HabitPause.habit_id.in_(habit_ids))
+        .order_by(HabitPause.habit_id, HabitPause.start_date)
+    )
+
+
+def habit_fields(row, fields, pauses):
+    data = {"id": row.id}
+    for field in fields:
+        if field == "pauses":
+            data["pauses"] = [
+                {"start_date": start, "end_date": end} for start, end in pauses.get(row.id, ())
+            ]
+        else:
+            data[field] = getattr(row, field)
+    return data
+
+
+# -------------------- write endpoints --------------------
+
+def habit_payload(habit):
+    """The ``habit`` object create and update respond and publish with."""
+    return {
+        "id": habit.id,
+        "name": habit.name,
+        "start_date": habit.start_date,
+        "frequency": habit.frequency,
+        "days_of_week": habit.days_of_week,
+    }
+
+
+def parse_habit_body(data, habit=None):
+    """Return ``(name, start_date, frequency, days)`` for ``POST /``.
+
+    Given the ``habit`` a ``PUT /<id>`` changes, its schedule fills in what
+    the body leaves out and ``start_date`` is None: updates keep theirs.
+    """
+    name = data.get("name")
+    if not name:
+        raise QueryError("Habit name is required")
+    name = name.strip()
+    if len(name) > 64:
+        raise QueryError("Habit name cannot exceed 64 characters")
+
+    start_date = None
+    if habit is None:
+        start_date_str = data.get("start_date")
+        try:
+            start_date = date.fromisoformat(start_date_str) if start_date_str else date.today()
+        except ValueError:
+            raise QueryError("Invalid start_date format. Use YYYY-MM-DD") from None
+
+    frequency = data.get("frequency", habit.frequency if habit else "DAILY")
+    days = data.get("days_of_week", habit.days_of_week if habit else None)
+    if frequency not in ["DAILY", "WEEKLY"]:
+        raise QueryError("Invalid frequency")
+    if frequency == "WEEKLY":
+        if not isinstance(days, list) or len(days) == 0:
+            raise QueryError("days_of_week must be a non-empty list")
+        try:
+            days = [int(d) for d in days]
+        except Exception:
+            raise QueryError("days_of_week must be integers") from None
+        if any(d < 0 or d > 6 for d in days):
+            raise QueryError("days_of_week must be between 0 and 6")
+    else:
+        days = None
+    return name, start_date, frequency, days
+
+
+def parse_log_date(data):
+    """The day ``POST /<id>/log`` and ``/unlog`` act on; today by default."""
+    return _date_arg(data, "date") or date.today()
+
+
+def name_conflict_query(user_id, name):
+    """``(id, archived)`` of the user's habit already called ``name``."""
+    lowered = name.lower()
+    return lambda_stmt(
+        lambda: select(
+            Habit.id,
+            select(HabitPause.id)
+            .where(HabitPause.habit_id == Habit.id, HabitPause.end_date.is_(None))
+            .exists(),
+        ).where(func.lower(Habit.name) == lowered, Habit.user_id == user_id)
+    )
+
+
+def name_conflict_payload(existing):
+    """The 409 body for a name the ``uniq_habit_name_per_user`` index rejected."""
+    if existing and existing[1]:
+        return {"error": "duplicate_name_archived", "archivedHabitId": existing[0]}
+    return {"error": "duplicate_name_active"}
+
+
+def user_habit_query(habit_id, user_id):
+    """The ``Habit`` entity a write endpoint loads and changes."""
+    return lambda_stmt(
+        lambda: select(Habit).where(Habit.id == habit_id, Habit.user_id == user_id)
+    )
+
+
+def open_pause_query(habit_id):
+    return lambda_stmt(
+        lambda: select(HabitPause).where(
+            HabitPause.habit_id == habit_id, HabitPause.end_date.is_(None)
+        )
+    )
+
+
+def habit_log_query(habit_id, log_date):
+    return lambda_stmt(
+        lambda: select(HabitLog).where(HabitLog.habit_id == habit_id, HabitLog.date == log_date)
+    )
+
+
+# -------------------- GET / --------------------
+
+def parse_habit_list(args):
+    """Return ``(selected_date, fields, limit, after)`` for ``GET /``."""
+    selected_date = _date_arg(args, "date")
+
+    fields_str = args.get("fields")
+    if fields_str:
+        fields = [f.strip() for f in fields_str.split(",") if f.strip() and f.strip() != "id"]
+        unknown = [f for f in fields if f not in HABIT_FIELDS]
+        if unknown:
+            raise QueryError(f"Unknown field: {unknown[0]}")
+    else:
+        fields = list(HABIT_FIELDS)
+
+    try:
+        limit = int_arg(args, "limit")
+        after = int_arg(args, "after")
+    except ValueError:
+        raise QueryError("limit and after must be integers") from None
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise QueryError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return selected_date, fields, limit, after
+
+
+def habit_list_query(user_id, selected_date, fields, limit, after):
+    # Only fetch the columns the response needs; the date filter runs in SQL.
+    # Pauses, when asked for, come from pauses_query over the page's ids.
+    columns = [column for field, column in HABIT_COLUMNS.items() if field in fields]
+    stmt = lambda_stmt(
+        lambda: select(Habit.id, *columns).where(Habit.user_id == user_id).order_by(Habit.id)
+    )
+    if selected_date:
+        day_bit = 1 << selected_date.weekday()
+        stmt += lambda s: s.where(Habit.applicable_on(selected_date, day_bit))
+    if after is not None:
+        stmt += lambda s: s.where(Habit.id > after)
+    if limit is not None:
+        fetch = limit + 1
+        stmt += lambda s: s.limit(fetch)
+    return stmt
+
+
+def habit_list_payload(rows, pause_rows, fields, limit):
+    pauses = group_pauses(pause_rows)
+    if limit is None:
+        return [habit_fields(row, fields, pauses) for row in rows]
+
+    has_more = len(rows) > limit
+    page = rows[:limit]
+    return {
+        "habits": [habit_fields(row, fields, pauses) for row in page],
+        "next_after": page[-1].id if has_more else None,
+    }
+
+
+# -------------------- GET /archived --------------------
+
+def archived_habits_query(user_id):
+    return lambda_stmt(
+        lambda: select(Habit)
+        .where(Habit.user_id == user_id, Habit.pauses.any(HabitPause.end_date.is_(None)))
+        .order_by(Habit.id)
+        .options(selectinload(Habit.pauses))
+    )
+
+
+def archived_habits_payload(habits):
+    result = []
+    for h in habits:
+        pause = next((p for p in h.pauses if p.end_date is None), None)
+        result.append(
+            {
+                "id": h.id,
+                "name": h.name,
+                "start_date": h.start_date,
+                "frequency": h.frequency,
+                "days_of_week": h.days_of_week,
+                "pause_start_date": pause.start_date if pause else None,
+            }
+        )
+    return result
+
+
+# -------------------- GET /daily-summary --------------------
+
+def parse_daily_summary(args):
+    return _date_arg(args, "date", missing="Date query param is required. Format: YYYY-MM-DD")
+
+
+def daily_habits_query(user_id, selected_date):
+    day_bit = 1 << selected_date.weekday()
+    return lambda_stmt(
+        lambda: select(
+            Habit.id, Habit.name, Habit.start_date, Habit.frequency, Habit.days_of_week
+        ).where(Habit.user_id == user_id, Habit.applicable_on(selected_date, day_bit))
+    )
+
+
+def logged_on_query(habit_ids, selected_date):
+    return lambda_stmt(
+        lambda: select(HabitLog.habit_id).where(
+            HabitLog.habit_id.in_(habit_ids),
+            HabitLog.date == selected_date,
+        )
+    )
+
+
+def daily_summary_payload(habits, logged_ids, selected_date, today):
+    summary = []
+    for habit in habits:
+        if habit.id in logged_ids:
+            status = "complete"
+        else:
+            status = "missed" if selected_date < today else "unlogged"
+        summary.append({
+            "id": habit.id,
+            "name": habit.name,
+            "start_date": habit.start_date,
+            "frequency": habit.frequency,
+            "days_of_week": habit.days_of_week,
+            "status": status,
+            "completed": habit.id in logged_ids,
+        })
+    return summary
+
+
+# -------------------- GET /log-summary --------------------
+
+def parse_log_summary(args):
+    """Return ``(start_date, end_date, encoding, axis)`` for ``GET /log-summary``."""
+    month_str = args.get("month")
+    if not month_str:
+        raise QueryError("Month query param required. Format: YYYY-MM")
+    try:
+        year, month = map(int, month_str.split("-"))
+        start_date = date(year, month, 1)
+    except ValueError:
+        raise QueryError("Invalid month format. Use YYYY-MM") from None
+    end_date = date(year, month, monthrange(year, month)[1])
+
+    encoding = args.get("encoding", "json")
+    axis = args.get("axis", "day")
+    if encoding not in ("json", "bitmap") or axis not in ("day", "habit"):
+        raise QueryError("encoding must be json or bitmap, axis must be day or habit")
+    return start_date, end_date, encoding, axis
+
+
+def habit_ids_query(user_id):
+    return lambda_stmt(
+        lambda: select(Habit.id).where(Habit.user_id == user_id).order_by(Habit.id)
+    )
+
+
+def logs_between_query(habit_ids, start_date, end_date):
+    return lambda_stmt(
+        lambda: select(HabitLog.habit_id, HabitLog.date).where(
+            HabitLog.habit_id.in_(habit_ids),
+            HabitLog.date >= start_date,
+            HabitLog.date <= end_date,
+        )
+    )
+
+
+def log_summary_payload(logs, habit_ids, start_date, end_date, encoding, axis):
+    if encoding == "bitmap":
+        payload = {"encoding": "bitmap", "axis": axis, "habit_ids": habit_ids}
+        if axis == "day":
+            payload["days"] = day_bitmaps(logs, habit_ids)
+        else:
+            length = (end_date - start_date).days + 1
+            payload.update({
+                "start": start_date,
+                "length": length,
+                "habits": habit_bitmaps(logs, habit_ids, start_date, length),
+            })
+        return payload
+
+    result = {}
+    for habit_id, log_date in logs:
+        result.setdefault(log_date, []).append(habit_id)
+    return result
+
+
+# -------------------- GET /<id>/logs --------------------
+
+def parse_log_page(args):
+    """Return ``(before, limit, encoding)`` for ``GET /<id>/logs``."""
+    try:
+        before = args.get("before")
+        before = date.fromisoformat(before) if before else None
+        limit = int_arg(args, "limit")
+    except ValueError:
+        raise QueryError("before must be YYYY-MM-DD and limit an integer") from None
+    if limit is None:
+        limit = 100
+    if not 1 <= limit <= MAX_LOG_PAGE_SIZE:
+        raise QueryError(f"limit must be between 1 and {MAX_LOG_PAGE_SIZE}")
+    encoding = args.get("encoding", "dates")
+    if encoding not in ("dates", "rle"):
+        raise QueryError("encoding must be dates or rle")
+    return before, limit, encoding
+
+
+def owned_habit_query(habit_id, user_id):
+    return lambda_stmt(
+        lambda: select(Habit.id).where(Habit.id == habit_id, Habit.user_id == user_id)
+    )
+
+
+def log_page_query(habit_id, before, limit):
+    # Newest first; an index-only scan backwards over habit_log_pkey (habit_id, date).
+    fetch = limit + 1
+    stmt = lambda_stmt(
+        lambda: select(HabitLog.date).where(HabitLog.habit_id == habit_id)
+        .order_by(HabitLog.date.desc()).limit(fetch)
+    )
+    if before is not None:
+        stmt += lambda s: s.where(HabitLog.date < before)
+    return stmt
+
+
+def log_page_payload(habit_id, dates, limit, encoding):
+    has_more = len(dates) > limit
+    dates = dates[:limit]
+    payload = {"habit_id": habit_id, "next_before": dates[-1] if has_more else None}
+    if encoding == "rle":
+        payload.update({"encoding": "rle", "runs": encode_date_runs(dates)})
+    else:
+        payload["dates"] = dates
+    return payload
+
+
+# -------------------- GET /calendar-summary --------------------
+
+def parse_calendar_summary(args):
+    """Return the dates of the month named by ``?month=YYYY-MM``."""
+    month_str = args.get("month")
+    if not month_str:
+        raise QueryError("Month query param is required. Format: YYYY-MM")
+    try:
+        month_start = datetime.strptime(month_str, "%Y-%m").date()
+    except ValueError:
+        raise QueryError("Invalid month format. Use YYYY-MM") from None
+    _, last_day = monthrange(month_start.year, month_start.month)
+    return [month_start.replace(day=day) for day in range(1, last_day + 1)]
+
+
+def schedule_habits_query(user_id):
+    """The columns behind ``HabitSchedule``; pair with ``pauses_query``."""
+    return lambda_stmt(
+        lambda: select(Habit.id, Habit.start_date, Habit.weekday_mask)
+        .where(Habit.user_id == user_id)
+        .order_by(Habit.id)
+    )
+
+
+def calendar_summary_payload(habit_rows, pause_rows, logs, month_days, today):
+    schedules = habit_schedules(habit_rows, pause_rows)
+    logs_by_day = defaultdict(set)
+    for habit_id, log_date in logs:
+        logs_by_day[log_date.toordinal()].add(habit_id)
+    today = today.toordinal()
+
+    summary = {}
+    for day in month_days:
+        ordinal = day.toordinal()
+        if ordinal > today:
+            summary[day] = {"status": "future"}
+            continue
+
+        # Only consider habits that should appear on this day
+        applicable_ids = {s.id for s in schedules if s.applicable(ordinal)}
+        total = len(applicable_ids)
+        if total == 0:
+            summary[day] = {"status": "inactive"}
+            continue
+
+        done = len(logs_by_day.get(ordinal, set()) & applicable_ids)
+        if done == 0:
+            status = "incomplete"
+        elif done == total:
+            status = "complete"
+        else:
+            status = "partial"
+
+        summary[day] = {
+            "status": status,
+            "completed": done,
+            "total": total
+        }
+    return summary
+
+
+# -------------------- GET /week-grid --------------------
+
+def parse_week_grid(args):
+    """Return the dates covered by ``?week_start=...&days=N``."""
+    week_start_str = args.get("week_start")
+    if not week_start_str:
+        raise QueryError("week_start query param is required. Format: YYYY-MM-DD")
+    try:
+        week_start = date.fromisoformat(week_start_str)
+        length = int_arg(args, "days")
+    except ValueError:
+        raise QueryError("Invalid week_start or days") from None
+    if length is None:
+        length = 7
+    if not 1 <= length <= MAX_GRID_DAYS:
+        raise QueryError(f"days must be between 1 and {MAX_GRID_DAYS}")
+    return [week_start + timedelta(days=i) for i in range(length)]
+
+
+def grid_row(schedule, logged, days, today):
+    """One code per ordinal in ``days``; ``logged`` holds ``(habit_id, ordinal)`` pairs."""
+    row = []
+    for day in days:
+        if day > today:
+            state = "future"
+        elif day < schedule.start:
+            state = "inactive"
+        elif schedule.paused(day):
+            state = "paused"
+        elif not schedule.scheduled(day):
+            state = "not_scheduled"
+        elif (schedule.id, day) in logged:
+            state = "done"
+        else:
+            state = "missed" if day < today else "pending"
+        row.append(GRID_CODES[state])
+    return "".join(row)
+
+
+def week_grid_payload(habit_rows, pause_rows, logs, days, today):
+    schedules = habit_schedules(habit_rows, pause_rows)
+    logged = {(habit_id, log_date.toordinal()) for habit_id, log_date in logs}
+    ordinals = [day.toordinal() for day in days]
+    today = today.toordinal()
+    return {
+        "week_start": days[0],
+        "days": len(days),
+        "states": GRID_STATES,
+        "habit_ids": [s.id for s in schedules],
+        "rows": [grid_row(s, logged, ordinals, today) for s in schedules],
+    }
@@ -0,0 +1,177 @@
+# app/utils/idempotency.py
+import hashlib
+import threading
+from datetime import datetime, timedelta
+
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+HEADER = "Idempotency-Key"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    for part in (request.method, request.full_path):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+class Idempotency:
+    """Replays stored responses for retried mutations carrying an Idempotency-Key.
+
+    Keys are scoped per user and kept in the ``idempotency_keys`` table so
+    every worker sees them. A first request claims its key with an
+    in-progress row in the request session's transaction, so the claim
+    commits with the handler's writes and a concurrent retry waits on it.
+    The response is stored in one more commit when the request finishes,
+    unless it is a 5xx, which releases the key for a retry. A replay costs
+    one keyed lookup.
+    """
+
+    def __init__(self):
+        self._db = None
+        self._table = None
+        self.ttl = timedelta(hours=24)
+        self.lock_timeout = timedelta(seconds=60)
+        self.purge_every = 500
+        self._stores = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        from app.models.idempotency import IdempotencyKey
+
+        app.config.setdefault("IDEMPOTENCY_TTL_SECONDS", 86400)
+        app.config.setdefault("IDEMPOTENCY_LOCK_SECONDS", 60)
+        app.config.setdefault("IDEMPOTENCY_PURGE_EVERY", 500)
+        self._db = db
+        self._table = IdempotencyKey.__table__
+        self.ttl = timedelta(seconds=float(app.config["IDEMPOTENCY_TTL_SECONDS"]))
+        self.lock_timeout = timedelta(seconds=float(app.config["IDEMPOTENCY_LOCK_SECONDS"]))
+        self.purge_every = int(app.config["IDEMPOTENCY_PURGE_EVERY"])
+
+    def route_blueprint(self, blueprint):
+        blueprint.before_request(self._before_request)
+        blueprint.after_request(self._after_request)
+        blueprint.teardown_request(self._teardown_request)
+
+    def purge(self, now=None):
+        """Delete stored responses older than the TTL; returns the row count."""
+        now = now or datetime.utcnow()
+        session = self._db.session
+        result = session.execute(delete(self._table).where(self._table.c.created_at < now - self.ttl))
+        session.commit()
+        return result.rowcount
+
+    def _lookup(self, session, user_id, key):
+        table = self._table
+        return session.execute(
+            select(table).where(table.c.user_id == user_id, table.c.key == key)
+        ).first()
+
+    def _replay(self, row, fingerprint):
+        if row.fingerprint != fingerprint:
+            return jsonify({"error": "idempotency_key_reused"}), 422
+        if row.status_code is None:
+            return jsonify({"error": "idempotency_key_in_progress"}), 409
+        response = current_app.response_class(
+            row.body, status=row.status_code, content_type=row.content_type
+        )
+        response.headers["Idempotent-Replayed"] = "true"
+        return response
+
+    def _before_request(self):
+        g.pop("idempotency_claim", None)
+        key = request.headers.get(HEADER)
+        if key is None or request.method not in MUTATING_METHODS:
+            return None
+        if not key or len(key) > 255:
+            return jsonify({"error": "Invalid Idempotency-Key"}), 400
+        user_id = _current_user()
+        if user_id is None:
+            return None  # jwt_required answers this request
+        user_id = int(user_id)
+
+        table = self._table
+        session = self._db.session
+        fingerprint = _fingerprint()
+        now = datetime.utcnow()
+        row = self._lookup(session, user_id, key)
+        if row is not None:
+            expired = row.created_at < now - self.ttl
+            abandoned = row.status_code is None and row.created_at < now - self.lock_timeout
+            if not (expired or abandoned):
+                session.rollback()
+                return self._replay(row, fingerprint)
+            session.execute(delete(table).where(table.c.user_id == user_id, table.c.key == key))
+        claim = {"user_id": user_id, "key": key, "fingerprint": fingerprint, "created_at": now}
+        try:
+            session.execute(insert(table).values(**claim))
+        except IntegrityError:
+            # A concurrent retry claimed the key first.
+            session.rollback()
+            row = self._lookup(session, user_id, key)
+            session.rollback()
+            return self._replay(row, fingerprint)
+        g.idempotency_claim = claim
+        return None
+
+    def _after_request(self, response):
+        claim = g.pop("idempotency_claim", None)
+        if claim is None:
+            return response
+        table = self._table
+        session = self._db.session
+        where = (table.c.user_id == claim["user_id"], table.c.key == claim["key"])
+        # Whatever the handler left uncommitted, the claim included, goes
+        # the way teardown would have sent it.
+        session.rollback()
+        if response.status_code >= 500:
+            session.execute(delete(table).where(*where))
+            session.commit()
+            return response
+
+        stored = {
+            "status_code": response.status_code,
+            "content_type": response.content_type,
+            "body": response.get_data(),
+        }
+        try:
+            if not session.execute(update(table).where(*where).values(**stored)).rowcount:
+                session.execute(insert(table).values(**claim, **stored))
+            session.commit()
+        except IntegrityError:
+            session.rollback()  # a retry claimed the key once this claim rolled back
+        self._maybe_purge()
+        return response
+
+    def _teardown_request(self, exc):
+        # Only reached with a claim when after_request never ran.
+        claim = g.pop("idempotency_claim", None)
+        if claim is not None:
+            table = self._table
+            session = self._db.session
+            session.rollback()
+            session.execute(
+                delete(table).where(table.c.user_id == claim["user_id"], table.c.key == claim["key"])
+            )
+            session.commit()
+
+    def _maybe_purge(self):
+        with self._lock:
+            self._stores += 1
+            due = self.purge_every > 0 and self._stores % self.purge_every == 0
+        if due:
+            self.purge()
+
+
+def _current_user():
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except Exception:
+        return None
@@ -0,0 +1,83 @@
+# app/utils/json_provider.py
+from datetime import date
+from decimal import Decimal
+from itertools import islice
+
+import orjson
+from flask.json.provider import JSONProvider
+
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj):
+    if isinstance(obj, Decimal):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Encode ``obj`` exactly as API responses are encoded, as bytes."""
+    return orjson.dumps(obj, default=_default, option=OPTIONS)
+
+
+def _key(key):
+    return key.isoformat() if isinstance(key, date) else str(key)
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def iter_encode(obj, chunk_size=64):
+    """Yield the JSON encoding of a top-level list or dict a slice at a time."""
+    if isinstance(obj, dict):
+        opening, closing = b"{", b"}"
+        encoded = (
+            orjson.dumps({_key(k): v for k, v in chunk}, default=_default, option=OPTIONS)[1:-1]
+            for chunk in _chunks(obj.items(), chunk_size)
+        )
+    else:
+        opening, closing = b"[", b"]"
+        encoded = (
+            orjson.dumps(chunk, default=_default, option=OPTIONS)[1:-1]
+            for chunk in _chunks(obj, chunk_size)
+        )
+
+    yield opening
+    first = True
+    for part in encoded:
+        if not first:
+            yield b","
+        yield part
+        first = False
+    yield closing
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson.
+
+    Dates serialize natively as ISO 8601, so handlers can return them as is.
+    Top-level lists and dicts with more than ``JSON_STREAM_THRESHOLD`` items
+    are streamed in encoded slices instead of being built as one buffer.
+    """
+
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        threshold = self._app.config.get("JSON_STREAM_THRESHOLD", 0)
+        if threshold and isinstance(obj, (list, dict)) and len(obj) > threshold:
+            return self._app.response_class(iter_encode(obj), mimetype=self.mimetype)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
@@ -0,0 +1,176 @@
+# app/utils/log_partitions.py
+"""Yearly or monthly range partitions of ``habit_log`` by ``date`` (Postgres).
+
+Partitions are named ``habit_log_y2026`` or ``habit_log_m2026_03``. A
+default partition catches dates nobody created a partition for yet, so a
+log write never fails; creating the partition later moves those rows out
+of it. Every function takes a Connection and is a no-op on databases
+where ``habit_log`` is a plain table.
+"""
+import re
+from datetime import date
+
+from sqlalchemy import text
+
+PARENT = "habit_log"
+DEFAULT_PARTITION = "habit_log_default"
+ARCHIVE_SCHEMA = "habit_log_archive"
+PARTITION_NAME = re.compile(r"^habit_log_(default|y\d{4}|m\d{4}_\d{2})$")
+_BOUND = re.compile(r"FROM \('([\d-]+)'\) TO \('([\d-]+)'\)")
+
+
+def period_start(day, interval):
+    if interval == "year":
+        return date(day.year, 1, 1)
+    if interval == "month":
+        return date(day.year, day.month, 1)
+    raise ValueError(f"Unknown partition interval: {interval}")
+
+
+def next_period(start, interval):
+    if interval == "year":
+        return date(start.year + 1, 1, 1)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def partition_name(start, interval):
+    if interval == "year":
+        return f"{PARENT}_y{start.year}"
+    return f"{PARENT}_m{start.year}_{start.month:02d}"
+
+
+def is_partition_name(name):
+    return bool(PARTITION_NAME.match(name))
+
+
+def is_partitioned(connection):
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table"
+        " WHERE partrelid = to_regclass(:parent))"
+    ), {"parent": PARENT}).scalar()
+
+
+def list_partitions(connection):
+    """Return ``[(name, lower, upper)]`` by lower bound; the default partition is left out."""
+    if not is_partitioned(connection):
+        return []
+    rows = connection.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i"
+        " JOIN pg_class c ON c.oid = i.inhrelid"
+        " WHERE i.inhparent = to_regclass(:parent)"
+    ), {"parent": PARENT})
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND.search(bound)
+        if match:
+            lower, upper = (date.fromisoformat(value) for value in match.groups())
+            partitions.append((name, lower, upper))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partition(connection, start, interval):
+    """Create and attach the partition for the period starting at ``start``.
+
+    Rows already sitting in the default partition for that period are
+    moved into it first, since Postgres refuses to attach a range the
+    default partition still holds rows for.
+    """
+    end = next_period(start, interval)
+    name = partition_name(start, interval)
+    bounds = {"start": start, "end": end}
+    connection.execute(text(
+        f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+    ))
+    connection.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION}"
+        f" WHERE date >= :start AND date < :end RETURNING *)"
+        f" INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    # The CHECK lets ATTACH skip re-validating every row of the new table.
+    connection.execute(text(
+        f"ALTER TABLE {name} ADD CONSTRAINT {name}_bounds"
+        f" CHECK (date >= DATE '{start.isoformat()}' AND date < DATE '{end.isoformat()}')"
+    ))
+    connection.execute(text(
+        f"ALTER TABLE {PARENT} ATTACH PARTITION {name}"
+        f" FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    connection.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {name}_bounds"))
+    return name
+
+
+def compact_partition(connection, name):
+    """Rewrite one partition in primary-key order.
+
+    The new heap drops the bytes of dropped columns and stores each habit's
+    logs together; run VACUUM afterwards so reads can be index-only. Holds
+    an ACCESS EXCLUSIVE lock on this partition only, for the rewrite.
+    """
+    key = connection.execute(text(
+        "SELECT indexrelid::regclass::text FROM pg_index"
+        " WHERE indrelid = to_regclass(:name) AND indisprimary"
+    ), {"name": name}).scalar()
+    connection.execute(text(f"CLUSTER {name} USING {key}"))
+
+
+def horizon(day, interval, ahead):
+    """Start of the last period to pre-create: ``ahead`` periods after ``day``'s."""
+    start = period_start(day, interval)
+    for _ in range(ahead):
+        start = next_period(start, interval)
+    return start
+
+
+def ensure_partitions(connection, interval, through, since=None):
+    """Create the missing partitions from ``since`` (default: today) through ``through``.
+
+    Periods with rows stranded in the default partition get their
+    partition too. Returns the names of the partitions created.
+    """
+    if not is_partitioned(connection):
+        return []
+    existing = {name for name, _, _ in list_partitions(connection)}
+    starts = set()
+    start = period_start(since or date.today(), interval)
+    while start <= through:
+        starts.add(start)
+        start = next_period(start, interval)
+    stranded = connection.execute(text(
+        f"SELECT DISTINCT date_trunc('{interval}', date)::date FROM {DEFAULT_PARTITION}"
+    )).scalars()
+    starts.update(stranded)
+
+    return [
+        create_partition(connection, start, interval)
+        for start in sorted(starts)
+        if partition_name(start, interval) not in existing
+    ]
+
+
+def archive_partitions(connection, before, drop=False):
+    """Detach every partition that ends on or before ``before``.
+
+    Detached partitions move to the ``habit_log_archive`` schema, or are
+    dropped with ``drop=True``. Their foreign key to ``habit`` is removed
+    so habits can still be deleted; returns the names detached.
+    """
+    detached = []
+    for name, _, upper in list_partitions(connection):
+        if upper > before:
+            continue
+        connection.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        if drop:
+            connection.execute(text(f"DROP TABLE {name}"))
+        else:
+            foreign_keys = connection.execute(text(
+                "SELECT conname FROM pg_constraint"
+                " WHERE conrelid = to_regclass(:name) AND contype = 'f'"
+            ), {"name": name}).scalars().all()
+            for constraint in foreign_keys:
+                connection.execute(text(f'ALTER TABLE {name} DROP CONSTRAINT "{constraint}"'))
+            connection.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA}"))
+            connection.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA}"))
+        detached.append(name)
+    return detached
@@ -0,0 +1,93 @@
+# app/utils/pauses.py
+from bisect import bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from sqlalchemy import delete, select, update
+
+from app.models.habit_pause import HabitPause
+
+ONE_DAY = timedelta(days=1)
+
+
+def merge_intervals(intervals):
+    """Sort, drop empty and collapse overlapping or adjacent ``(start, end)`` pairs.
+
+    ``end`` is inclusive and ``None`` means open-ended; a pause that ends
+    the day before it starts (archived and unarchived on the same day)
+    covers nothing and is dropped.
+    """
+    merged = []
+    for start, end in sorted(intervals, key=lambda pair: pair[0]):
+        if end is not None and end < start:
+            continue
+        if merged:
+            last_start, last_end = merged[-1]
+            if last_end is None:
+                continue
+            if start <= last_end + ONE_DAY:
+                merged[-1] = (last_start, None if end is None else max(end, last_end))
+                continue
+        merged.append((start, end))
+    return merged
+
+
+class PauseIndex:
+    """A habit's pauses as disjoint sorted intervals, searched with bisect."""
+
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, pauses=()):
+        merged = merge_intervals((p.start_date, p.end_date) for p in pauses)
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    def __len__(self):
+        return len(self._starts)
+
+    def covers(self, day):
+        i = bisect_right(self._starts, day) - 1
+        return i >= 0 and (self._ends[i] is None or self._ends[i] >= day)
+
+    def resume_date(self, day):
+        """``day`` if unpaused, else the day after its pause ends (None if open)."""
+        i = bisect_right(self._starts, day) - 1
+        if i < 0 or (self._ends[i] is not None and self._ends[i] < day):
+            return day
+        return None if self._ends[i] is None else self._ends[i] + ONE_DAY
+
+
+def normalize_pauses(session, habit_ids=None):
+    """Rewrite pause rows so each habit keeps only merged, non-empty intervals.
+
+    Surviving rows are reused in id order and the rest deleted, so whether
+    a habit has an open pause never changes. Returns the number of rows
+    removed.
+    """
+    query = select(HabitPause.id, HabitPause.habit_id, HabitPause.start_date, HabitPause.end_date)
+    if habit_ids is not None:
+        if not habit_ids:
+            return 0
+        query = query.where(HabitPause.habit_id.in_(habit_ids))
+
+    rows_by_habit = defaultdict(list)
+    for row in session.execute(query.order_by(HabitPause.habit_id, HabitPause.id)):
+        rows_by_habit[row.habit_id].append(row)
+
+    updates, stale = [], []
+    for rows in rows_by_habit.values():
+        merged = merge_intervals((row.start_date, row.end_date) for row in rows)
+        for row, (start, end) in zip(rows, merged):
+            if (row.start_date, row.end_date) != (start, end):
+                updates.append({"id": row.id, "start_date": start, "end_date": end})
+        stale.extend(row.id for row in rows[len(merged):])
+
+    if stale:
+        session.execute(
+            delete(HabitPause)
+            .where(HabitPause.id.in_(stale))
+            .execution_options(synchronize_session=False)
+        )
+    if updates:
+        session.execute(update(HabitPause), updates)
+    return len(stale)
@@ -0,0 +1,68 @@
+# app/utils/read_models.py
+"""Compact records for the hot habit reads.
+
+The GET endpoints select plain columns with Core ``select()`` rather than
+loading ``Habit``/``HabitPause`` entities, so rows skip the identity map,
+attribute instrumentation and change tracking. Schedule checks run on
+``HabitSchedule``: days as ordinals and the weekday bitmask, so the
+per-day loops of calendar-summary and week-grid compare integers.
+"""
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+
+from app.utils.pauses import merge_intervals
+
+OPEN_END = date.max.toordinal()
+
+
+def weekday(ordinal):
+    """``date.fromordinal(ordinal).weekday()`` without building the date."""
+    return (ordinal - 1) % 7
+
+
+def group_pauses(pause_rows):
+    """``{habit_id: [(start_date, end_date), ...]}`` from ``(habit_id, start, end)`` rows."""
+    grouped = defaultdict(list)
+    for habit_id, start, end in pause_rows:
+        grouped[habit_id].append((start, end))
+    return grouped
+
+
+@dataclass(slots=True)
+class HabitSchedule:
+    """What ``is_applicable`` reads of a habit, with ordinal days."""
+
+    id: int
+    start: int
+    mask: int
+    pause_starts: list
+    pause_ends: list  # inclusive; OPEN_END for an open pause
+
+    @classmethod
+    def from_row(cls, row, pauses=()):
+        merged = merge_intervals(pauses)
+        return cls(
+            row.id,
+            row.start_date.toordinal(),
+            row.weekday_mask,
+            [start.toordinal() for start, _ in merged],
+            [OPEN_END if end is None else end.toordinal() for _, end in merged],
+        )
+
+    def paused(self, day):
+        i = bisect_right(self.pause_starts, day) - 1
+        return i >= 0 and self.pause_ends[i] >= day
+
+    def scheduled(self, day):
+        return bool(self.mask >> weekday(day) & 1)
+
+    def applicable(self, day):
+        return day >= self.start and self.scheduled(day) and not self.paused(day)
+
+
+def habit_schedules(habit_rows, pause_rows):
+    """One ``HabitSchedule`` per ``(id, start_date, weekday_mask)`` row, in row order."""
+    pauses = group_pauses(pause_rows)
+    return [HabitSchedule.from_row(row, pauses.get(row.id, ())) for row in habit_rows]
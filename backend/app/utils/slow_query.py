@@ -0,0 +1,168 @@
+# app/utils/slow_query.py
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from flask import has_request_context, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+
+logger = logging.getLogger("app.slow_query")
+
+# ``(endpoint, user_id)`` of an ASGI request, which has no Flask request context
+asgi_request = ContextVar("slow_query_asgi_request", default=(None, None))
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|\?|(?<!:):\w+|\$\d+")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """Collapse literals, placeholders and IN lists so equal shapes group together."""
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _PLACEHOLDER_LIST.sub("(?, ...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def parameter_shape(parameters, executemany: bool = False):
+    """Describe bind parameters by type only, never by value."""
+    if executemany:
+        rows = list(parameters or [])
+        return {"rows": len(rows), "row": parameter_shape(rows[0]) if rows else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def _request_context():
+    endpoint, user_id = asgi_request.get()
+    if endpoint is not None or not has_request_context():
+        return endpoint, user_id
+    try:
+        user_id = get_jwt_identity()
+    except Exception:
+        user_id = None
+    return request.endpoint, user_id
+
+
+class SlowQueryLog:
+    """Flags statements slower than a threshold into a bounded ring buffer."""
+
+    def __init__(self):
+        self.threshold_ms = 250.0
+        self.explain_sample_rate = 0.0
+        self._entries = deque(maxlen=200)
+        self._lock = threading.Lock()
+
+    def init_app(self, app, db):
+        app.config.setdefault("SLOW_QUERY_THRESHOLD_MS", 250)
+        app.config.setdefault("SLOW_QUERY_LOG_SIZE", 200)
+        app.config.setdefault("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", 0.0)
+
+        self.threshold_ms = float(app.config["SLOW_QUERY_THRESHOLD_MS"])
+        self.explain_sample_rate = float(app.config["SLOW_QUERY_EXPLAIN_SAMPLE_RATE"])
+        with self._lock:
+            self._entries = deque(self._entries, maxlen=int(app.config["SLOW_QUERY_LOG_SIZE"]))
+
+        with app.app_context():
+            for engine in db.engines.values():
+                self.instrument(engine)
+
+    def instrument(self, engine):
+        """Time every statement ``engine`` runs; pass ``sync_engine`` for an AsyncEngine."""
+        if not event.contains(engine, "before_cursor_execute", self._before_execute):
+            event.listen(engine, "before_cursor_execute", self._before_execute)
+            event.listen(engine, "after_cursor_execute", self._after_execute)
+            event.listen(engine, "handle_error", self._on_error)
+
+    def entries(self):
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+        if context is not None:
+            context.slow_query_timed = True
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if not starts:
+            return
+        if context is not None:
+            context.slow_query_timed = False
+        elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+        if self.threshold_ms < 0 or elapsed_ms < self.threshold_ms:
+            return
+
+        endpoint, user_id = _request_context()
+        entry = {
+            "recorded_at": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(elapsed_ms, 3),
+            "sql": normalize_sql(statement),
+            "params": parameter_shape(parameters, executemany),
+            "endpoint": endpoint,
+            "user_id": user_id,
+            "explain": None,
+        }
+        if self._should_explain(conn, statement, executemany):
+            entry["explain"] = self._explain(conn, statement, parameters)
+
+        logger.warning(
+            "slow query %.1fms endpoint=%s user=%s sql=%s",
+            elapsed_ms, endpoint, user_id, entry["sql"],
+        )
+        with self._lock:
+            self._entries.append(entry)
+
+    def _on_error(self, context):
+        # A statement that failed in the driver never reaches after_cursor_execute.
+        execution = context.execution_context
+        if execution is not None and getattr(execution, "slow_query_timed", False):
+            execution.slow_query_timed = False
+            starts = context.connection.info.get("slow_query_start")
+            if starts:
+                starts.pop()
+
+    def _should_explain(self, conn, statement, executemany):
+        if executemany or self.explain_sample_rate <= 0:
+            return False
+        if conn.dialect.name != "postgresql":
+            return False
+        if not statement.lstrip().upper().startswith("SELECT"):
+            return False
+        return random.random() < self.explain_sample_rate
+
+    def _explain(self, conn, statement, parameters):
+        # A raw DBAPI cursor keeps the EXPLAIN out of the event hooks above.
+        try:
+            cursor = conn.connection.dbapi_connection.cursor()
+            try:
+                cursor.execute("SAVEPOINT slow_query_explain")
+                try:
+                    cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+                    plan = [row[0] for row in cursor.fetchall()]
+                except Exception:
+                    cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                    raise
+                cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+                return plan
+            finally:
+                cursor.close()
+        except Exception as e:
+            logger.info("EXPLAIN failed for slow query: %s", e)
+            return None
@@ -0,0 +1,130 @@
+# app/utils/user_locks.py
+import asyncio
+import logging
+import threading
+import time
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("app.user_locks")
+
+# First key of the two-key advisory lock space, so other advisory locks
+# taken on the same database can't collide with user ids.
+HABIT_LIMITS_LOCK = 1
+_STRIPES = 64
+
+
+def _empty_stats():
+    return {"acquired": 0, "contended": 0, "wait_ms_total": 0.0, "wait_ms_max": 0.0}
+
+
+class UserLocks:
+    """Serializes a user's limit-guarded writes until their transaction ends.
+
+    On Postgres this is ``pg_advisory_xact_lock(HABIT_LIMITS_LOCK, user_id)``,
+    released by COMMIT or ROLLBACK, so concurrent requests from one user
+    queue instead of both passing a limit check and both inserting. Other
+    databases (SQLite in development and tests) get striped in-process
+    locks released when the session's transaction ends. Each acquisition
+    first tries without waiting; only ones that had to wait count as
+    contended, and waits over ``USER_LOCK_WARN_MS`` are logged.
+    """
+
+    def __init__(self):
+        self.warn_ms = 100.0
+        self._stripes = [threading.Lock() for _ in range(_STRIPES)]
+        self._stats = _empty_stats()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault("USER_LOCK_WARN_MS", 100)
+        self.warn_ms = float(app.config["USER_LOCK_WARN_MS"])
+        if not event.contains(Session, "after_transaction_end", _release_locks):
+            event.listen(Session, "after_transaction_end", _release_locks)
+
+    def lock(self, session, user_id):
+        """Hold the user's lock for the rest of ``session``'s transaction."""
+        user_id = int(user_id)
+        held = session.info.setdefault("user_locks", {})
+        if user_id in held:
+            return
+        connection = session.connection()
+        if connection.dialect.name == "postgresql":
+            held[user_id] = None
+            waited = self._advisory_lock(connection, user_id)
+        else:
+            stripe = self._stripes[user_id % _STRIPES]
+            if any(lock is stripe for lock in held.values()):
+                held[user_id] = None  # another of this session's users shares the stripe
+                return
+            waited = self._stripe_lock(stripe)
+            held[user_id] = stripe
+        self._record(user_id, waited)
+
+    async def alock(self, session, user_id):
+        """``lock`` for an ``AsyncSession``; a busy stripe is waited for off the event loop."""
+        connection = await session.connection()
+        if connection.dialect.name == "postgresql":
+            await session.run_sync(self.lock, user_id)
+            return
+        user_id = int(user_id)
+        held = session.info.setdefault("user_locks", {})
+        if user_id in held:
+            return
+        stripe = self._stripes[user_id % _STRIPES]
+        if any(lock is stripe for lock in held.values()):
+            held[user_id] = None
+            return
+        acquiring = asyncio.get_running_loop().run_in_executor(None, self._stripe_lock, stripe)
+        try:
+            waited = await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The thread still takes the stripe; hand it straight back.
+            acquiring.add_done_callback(lambda _: stripe.release())
+            raise
+        held[user_id] = stripe
+        self._record(user_id, waited)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = _empty_stats()
+
+    def _advisory_lock(self, connection, user_id):
+        params = {"space": HABIT_LIMITS_LOCK, "user_id": user_id}
+        if connection.scalar(text("SELECT pg_try_advisory_xact_lock(:space, :user_id)"), params):
+            return None
+        started = time.perf_counter()
+        connection.execute(text("SELECT pg_advisory_xact_lock(:space, :user_id)"), params)
+        return (time.perf_counter() - started) * 1000
+
+    def _stripe_lock(self, stripe):
+        if stripe.acquire(blocking=False):
+            return None
+        started = time.perf_counter()
+        stripe.acquire()
+        return (time.perf_counter() - started) * 1000
+
+    def _record(self, user_id, waited_ms):
+        with self._lock:
+            self._stats["acquired"] += 1
+            if waited_ms is None:
+                return
+            self._stats["contended"] += 1
+            self._stats["wait_ms_total"] += waited_ms
+            self._stats["wait_ms_max"] = max(self._stats["wait_ms_max"], waited_ms)
+        if waited_ms >= self.warn_ms:
+            logger.warning("user lock wait %.1fms user=%s", waited_ms, user_id)
+
+
+def _release_locks(session, transaction):
+    # Advisory locks end with the database transaction; stripes are ours to release.
+    if transaction.parent is not None:
+        return
+    for stripe in session.info.pop("user_locks", {}).values():
+        if stripe is not None:
+            stripe.release()
@@ -0,0 +1,55 @@
+"""Wire size and compression time per encoding for month payloads.
+
+Run from backend/:
+
+    python -m benchmarks.compression
+"""
+import time
+from datetime import date, timedelta
+
+import orjson
+
+from app.utils.compression import Compressor
+from benchmarks.json_encoding import list_habits_payload, log_summary_payload
+
+REPEAT = 5
+
+
+def calendar_summary_payload(days=31):
+    start = date(2025, 1, 1)
+    return {
+        start + timedelta(days=d): {"status": "partial", "completed": d % 7, "total": 12}
+        for d in range(days)
+    }
+
+
+def main():
+    compressor = Compressor()
+    payloads = {
+        "calendar_summary (31 days)": calendar_summary_payload(),
+        "log_summary (31 days x 100 habits)": log_summary_payload(days=31),
+        "list_habits (200 habits x 40 pauses)": list_habits_payload(),
+    }
+    levels = {"gzip": 6, "br": 5, "zstd": 3}
+    installed = compressor.available({"COMPRESS_ALGORITHMS": list(levels)})
+    print(f"{'payload':38} {'encoding':9} {'bytes':>9} {'ratio':>7} {'ms':>7}")
+    for label, payload in payloads.items():
+        raw = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+        print(f"{label:38} {'identity':9} {len(raw):9} {1:7.2f} {0:7.2f}")
+        for encoding in ("gzip", "br", "zstd"):
+            if encoding not in installed:
+                print(f"{label:38} {encoding:9} {'not installed':>9}")
+                continue
+            best = float("inf")
+            for _ in range(REPEAT):
+                started = time.perf_counter()
+                body = compressor._compress_once(raw, encoding, levels[encoding])
+                best = min(best, time.perf_counter() - started)
+            print(
+                f"{label:38} {encoding:9} {len(body):9} "
+                f"{len(raw) / len(body):7.2f} {best * 1000:7.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Cold-start profile: `python -X importtime` parsed into a report.
+
+Run from backend/:
+
+    python -m benchmarks.import_time [--top 15]
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+STARTUP = "from app import create_app; create_app()"
+FIRST_RESPONSE = (
+    "import time; started = time.perf_counter();"
+    "from app import create_app; app = create_app();"
+    "app.test_client().get('/api/habits/test');"
+    "print((time.perf_counter() - started) * 1000)"
+)
+PROVIDER_SDKS = ("google.auth.transport.requests", "google.oauth2.id_token", "requests")
+LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _env():
+    env = dict(os.environ)
+    db_path = os.path.join(tempfile.gettempdir(), "habee_import_time.db")
+    env.setdefault("DATABASE_URL", f"sqlite:///{db_path}")
+    env.setdefault("JWT_SECRET_KEY", "benchmark")
+    return env
+
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return rows
+
+
+def report(rows, top):
+    by_package = defaultdict(int)
+    for module, self_us, _, _ in rows:
+        by_package[module.split(".")[0]] += self_us
+    total = sum(self_us for _, self_us, _, _ in rows)
+
+    print(f"total import time: {total / 1000:.1f} ms across {len(rows)} modules\n")
+    print(f"{'package':32} {'self ms':>9} {'share':>7}")
+    for package, self_us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+        print(f"{package:32} {self_us / 1000:9.1f} {self_us / total:7.1%}")
+
+    loaded = {module for module, _, _, _ in rows}
+    print("\nauth provider SDKs imported at startup:")
+    for module in PROVIDER_SDKS:
+        print(f"  {module:40} {'yes' if module in loaded else 'no'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    profiled = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    report(parse_importtime(profiled.stderr), args.top)
+
+    timed = subprocess.run(
+        [sys.executable, "-c", FIRST_RESPONSE],
+        capture_output=True, text=True, env=_env(), check=True,
+    )
+    print(f"\ntime to first response: {float(timed.stdout.strip().splitlines()[-1]):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
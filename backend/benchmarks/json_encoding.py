@@ -0,0 +1,91 @@
+"""Encode time and peak memory for the largest habit payloads.
+
+Run from backend/:
+
+    python -m benchmarks.json_encoding
+"""
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+import orjson
+
+from app.utils.json_provider import OPTIONS, iter_encode
+
+REPEAT = 5
+
+
+def list_habits_payload(habits=200, pauses=40):
+    start = date(2023, 1, 1)
+    return [
+        {
+            "id": i,
+            "name": f"Habit {i}",
+            "start_date": start,
+            "frequency": "WEEKLY",
+            "days_of_week": [0, 2, 4],
+            "pauses": [
+                {"start_date": start + timedelta(days=7 * p), "end_date": start + timedelta(days=7 * p + 2)}
+                for p in range(pauses)
+            ],
+        }
+        for i in range(habits)
+    ]
+
+
+def log_summary_payload(days=366, habits=100):
+    start = date(2025, 1, 1)
+    return {start + timedelta(days=d): list(range(habits)) for d in range(days)}
+
+
+def with_iso_dates(obj):
+    """What the handlers had to build before dates serialized natively."""
+    if isinstance(obj, dict):
+        return {
+            (k.isoformat() if isinstance(k, date) else k): with_iso_dates(v) for k, v in obj.items()
+        }
+    if isinstance(obj, list):
+        return [with_iso_dates(v) for v in obj]
+    if isinstance(obj, date):
+        return obj.isoformat()
+    return obj
+
+
+def measure(fn):
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 1024
+
+
+def main():
+    app = Flask(__name__)
+    stdlib = DefaultJSONProvider(app)
+
+    payloads = {
+        "list_habits (200 habits x 40 pauses)": list_habits_payload(),
+        "log_summary (366 days x 100 habits)": log_summary_payload(),
+    }
+    print(f"{'payload':40} {'encoder':22} {'ms':>8} {'peak KiB':>10}")
+    for label, payload in payloads.items():
+        runs = {
+            "stdlib json": lambda: stdlib.dumps(with_iso_dates(payload)).encode(),
+            "orjson": lambda: orjson.dumps(payload, option=OPTIONS),
+            "orjson streamed": lambda: sum(len(part) for part in iter_encode(payload)),
+        }
+        for encoder, fn in runs.items():
+            ms, peak = measure(fn)
+            print(f"{label:40} {encoder:22} {ms:8.2f} {peak:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""is_applicable cost for habits with long pause histories.
+
+Run from backend/:
+
+    python -m benchmarks.pauses [--pauses 50 200 800]
+"""
+import argparse
+import timeit
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from app.routes.habits import is_applicable
+from app.utils.pauses import PauseIndex
+
+
+def linear_is_applicable(habit, check_date):
+    """The pre-index implementation: scan every pause."""
+    if habit.start_date > check_date:
+        return False
+    for p in habit.pauses:
+        if p.start_date <= check_date and (p.end_date is None or p.end_date >= check_date):
+            return False
+    return True
+
+
+def toggled_habit(pauses, start=date(2020, 1, 1)):
+    """A daily habit archived for two days out of every five."""
+    rows = [
+        SimpleNamespace(
+            start_date=start + timedelta(days=5 * i + 1),
+            end_date=start + timedelta(days=5 * i + 2),
+        )
+        for i in range(pauses)
+    ]
+    return SimpleNamespace(start_date=start, frequency="DAILY", days_of_week=None, pauses=rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pauses", type=int, nargs="+", default=[50, 200, 800])
+    parser.add_argument("--checks", type=int, default=365)
+    args = parser.parse_args()
+
+    print(f"{'pauses':>7} {'linear µs':>10} {'indexed µs':>11} {'speedup':>8}")
+    for count in args.pauses:
+        habit = toggled_habit(count)
+        days = [habit.start_date + timedelta(days=i * 5 * count // args.checks) for i in range(args.checks)]
+        index = PauseIndex(habit.pauses)
+        assert all(linear_is_applicable(habit, d) == is_applicable(habit, d, index) for d in days)
+
+        runs = 20
+        linear = timeit.timeit(lambda: [linear_is_applicable(habit, d) for d in days], number=runs)
+        indexed = timeit.timeit(lambda: [is_applicable(habit, d, index) for d in days], number=runs)
+        per_check = 1e6 / (runs * len(days))
+        print(
+            f"{count:7} {linear * per_check:10.2f} {indexed * per_check:11.2f} "
+            f"{linear / indexed:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""ORM entities vs column read models for the hot habit reads, at the 200-habit cap.
+
+Each endpoint's queries and payload run once per sample in a fresh session.
+``live blocks`` counts the allocations still held when the payload is
+built (loaded rows or entities plus the payload); ``peak KiB`` is the
+tracemalloc high-water mark for the whole read.
+
+Run from backend/ (a throwaway SQLite file unless --database-url is given;
+the database is dropped afterwards):
+
+    python -m benchmarks.read_models [--database-url postgresql://...]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+HABITS = 200
+PAUSES = 12
+REPEAT = 20
+TODAY = date(2025, 3, 20)
+
+
+def orm_calendar_payload(habits, logs, month_days, today):
+    """calendar_summary_payload as it ran on Habit entities."""
+    from app.utils.habit_queries import is_applicable
+    from app.utils.pauses import PauseIndex
+
+    pause_indexes = {h.id: PauseIndex(h.pauses) for h in habits}
+    logs_by_date = {}
+    for habit_id, log_date in logs:
+        logs_by_date.setdefault(log_date, []).append(habit_id)
+    summary = {}
+    for day in month_days:
+        if day > today:
+            summary[day] = {"status": "future"}
+            continue
+        applicable_ids = {h.id for h in habits if is_applicable(h, day, pause_indexes[h.id])}
+        if not applicable_ids:
+            summary[day] = {"status": "inactive"}
+            continue
+        done = len({hid for hid in logs_by_date.get(day, []) if hid in applicable_ids})
+        total = len(applicable_ids)
+        status = "incomplete" if done == 0 else "complete" if done == total else "partial"
+        summary[day] = {"status": status, "completed": done, "total": total}
+    return summary
+
+
+def paths(user_id):
+    from sqlalchemy import select
+    from sqlalchemy.orm import noload, selectinload
+
+    from app.extensions import db
+    from app.models.habit import Habit
+    from app.utils import habit_queries as q
+
+    month_days = q.parse_calendar_summary({"month": TODAY.strftime("%Y-%m")})
+    fields = list(q.HABIT_FIELDS)
+
+    def orm_list():
+        habits = db.session.scalars(
+            select(Habit).where(Habit.user_id == user_id).order_by(Habit.id)
+            .options(selectinload(Habit.pauses))
+        ).all()
+        payload = [
+            {
+                "id": h.id, "name": h.name, "start_date": h.start_date,
+                "frequency": h.frequency, "days_of_week": h.days_of_week,
+                "pauses": [{"start_date": p.start_date, "end_date": p.end_date} for p in h.pauses],
+            }
+            for h in habits
+        ]
+        return habits, payload
+
+    def read_list():
+        rows = db.session.execute(q.habit_list_query(user_id, None, fields, None, None)).all()
+        pauses = db.session.execute(q.pauses_query([r.id for r in rows])).all()
+        return (rows, pauses), q.habit_list_payload(rows, pauses, fields, None)
+
+    def orm_daily():
+        habits = db.session.scalars(
+            select(Habit).where(Habit.user_id == user_id, Habit.applicable_on(TODAY))
+            .options(noload(Habit.pauses))
+        ).all()
+        logged = set(db.session.scalars(q.logged_on_query([h.id for h in habits], TODAY)))
+        return habits, q.daily_summary_payload(habits, logged, TODAY, TODAY)
+
+    def read_daily():
+        rows = db.session.execute(q.daily_habits_query(user_id, TODAY)).all()
+        logged = set(db.session.scalars(q.logged_on_query([r.id for r in rows], TODAY)))
+        return rows, q.daily_summary_payload(rows, logged, TODAY, TODAY)
+
+    def orm_calendar():
+        habits = db.session.scalars(
+            select(Habit).where(Habit.user_id == user_id).options(selectinload(Habit.pauses))
+        ).all()
+        logs = db.session.execute(
+            q.logs_between_query([h.id for h in habits], month_days[0], month_days[-1])
+        ).all()
+        return (habits, logs), orm_calendar_payload(habits, logs, month_days, TODAY)
+
+    def read_calendar():
+        rows = db.session.execute(q.schedule_habits_query(user_id)).all()
+        ids = [r.id for r in rows]
+        pauses = db.session.execute(q.pauses_query(ids)).all()
+        logs = db.session.execute(q.logs_between_query(ids, month_days[0], month_days[-1])).all()
+        payload = q.calendar_summary_payload(rows, pauses, logs, month_days, TODAY)
+        return (rows, pauses, logs), payload
+
+    return {
+        "list_habits": (orm_list, read_list),
+        "daily_summary": (orm_daily, read_daily),
+        "calendar_summary": (orm_calendar, read_calendar),
+    }
+
+
+def seed():
+    from app.extensions import db
+    from app.models.habit import Habit
+    from app.models.habit_pause import HabitPause
+    from app.models.log import HabitLog
+    from app.models.user import User
+
+    user = User(email="bench@example.com", password_hash="-")
+    db.session.add(user)
+    db.session.flush()
+    start = TODAY - timedelta(days=400)
+    for i in range(HABITS):
+        weekly = i % 3 == 0
+        habit = Habit(
+            name=f"Habit {i}", user_id=user.id, start_date=start,
+            frequency="WEEKLY" if weekly else "DAILY",
+            days_of_week=[0, 2, 4] if weekly else None,
+        )
+        db.session.add(habit)
+        db.session.flush()
+        db.session.add_all(
+            HabitPause(
+                habit_id=habit.id,
+                start_date=start + timedelta(days=30 * p + 3),
+                end_date=start + timedelta(days=30 * p + 5),
+            )
+            for p in range(PAUSES)
+        )
+        db.session.add_all(
+            HabitLog(habit_id=habit.id, date=TODAY - timedelta(days=d))
+            for d in range(60) if (d + i) % 4
+        )
+    db.session.commit()
+    return user.id
+
+
+def measure(fn):
+    from app.extensions import db
+
+    best = float("inf")
+    for _ in range(REPEAT):
+        db.session.remove()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    db.session.remove()
+    tracemalloc.start()
+    held = fn()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics("filename"))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return best * 1000, blocks, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    db_path = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("JWT_SECRET_KEY", "bench")
+
+    from app import create_app
+    from app.config import Config
+    from app.extensions import db
+    from app.models.habit import Habit
+
+    if not args.database_url:
+        Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    app = create_app()
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            Habit.__table__.columns["days_of_week"].type = db.PickleType()
+        db.create_all()
+        try:
+            user_id = seed()
+            print(f"{'endpoint':18} {'path':12} {'ms':>8} {'live blocks':>12} {'peak KiB':>10}")
+            for endpoint, (orm, read) in paths(user_id).items():
+                assert orm()[1] == read()[1], endpoint
+                for label, fn in (("orm", orm), ("read model", read)):
+                    ms, blocks, peak = measure(fn)
+                    print(f"{endpoint:18} {label:12} {ms:8.2f} {blocks:12} {peak:10.0f}")
+        finally:
+            db.session.remove()
+            db.drop_all()
+    if db_path:
+        os.unlink(db_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""Python-side statement construction per endpoint: select() vs lambda_stmt.
+
+Times what a request pays before any SQL is sent: building each statement
+the endpoint runs and computing the cache key the engine looks its compiled
+form up by. Habit-id lists vary in length between calls, as they do between
+users. No database is needed.
+
+Run from backend/:
+
+    python -m benchmarks.statements [--runs 2000]
+"""
+import argparse
+import timeit
+from datetime import date
+
+from sqlalchemy import select
+from sqlalchemy.orm import configure_mappers
+
+from app.models.cold_log_archive import ColdLogArchive
+from app.models.habit import Habit
+from app.models.habit_pause import HabitPause
+from app.models.log import HabitLog
+from app.utils import habit_queries as q
+
+TODAY = date(2025, 3, 20)
+MONTH = (date(2025, 3, 1), date(2025, 3, 31))
+ID_LISTS = [list(range(1, n + 1)) for n in (1, 7, 40, 200)]
+FIELDS = list(q.HABIT_FIELDS)
+
+
+def select_statements():
+    """The statements as the routes built them before lambda_stmt."""
+    def user_habit(habit_id, user_id):
+        return select(Habit).where(Habit.id == habit_id, Habit.user_id == user_id)
+
+    def habit_log(habit_id, log_date):
+        return select(HabitLog).where(HabitLog.habit_id == habit_id, HabitLog.date == log_date)
+
+    def open_pause(habit_id):
+        return select(HabitPause).where(
+            HabitPause.habit_id == habit_id, HabitPause.end_date.is_(None)
+        )
+
+    def cold_before(user_id):
+        return select(ColdLogArchive.before).where(ColdLogArchive.user_id == user_id)
+
+    def habit_list(user_id, ids):
+        columns = [column for field, column in q.HABIT_COLUMNS.items() if field in FIELDS]
+        return (
+            select(Habit.id, *columns).where(Habit.user_id == user_id).order_by(Habit.id)
+            .where(Habit.applicable_on(TODAY)).limit(51)
+        )
+
+    def pauses(ids):
+        return (
+            select(HabitPause.habit_id, HabitPause.start_date, HabitPause.end_date)
+            .where(HabitPause.habit_id.in_(ids))
+            .order_by(HabitPause.habit_id, HabitPause.start_date)
+        )
+
+    def daily(user_id):
+        return select(
+            Habit.id, Habit.name, Habit.start_date, Habit.frequency, Habit.days_of_week
+        ).where(Habit.user_id == user_id, Habit.applicable_on(TODAY))
+
+    def logged_on(ids):
+        return select(HabitLog.habit_id).where(HabitLog.habit_id.in_(ids), HabitLog.date == TODAY)
+
+    def habit_ids(user_id):
+        return select(Habit.id).where(Habit.user_id == user_id).order_by(Habit.id)
+
+    def logs_between(ids, start, end):
+        return select(HabitLog.habit_id, HabitLog.date).where(
+            HabitLog.habit_id.in_(ids), HabitLog.date >= start, HabitLog.date <= end
+        )
+
+    def schedule(user_id):
+        return (
+            select(Habit.id, Habit.start_date, Habit.weekday_mask)
+            .where(Habit.user_id == user_id).order_by(Habit.id)
+        )
+
+    def owned(habit_id, user_id):
+        return select(Habit.id).where(Habit.id == habit_id, Habit.user_id == user_id)
+
+    def log_page(habit_id):
+        return (
+            select(HabitLog.date).where(HabitLog.habit_id == habit_id, HabitLog.date < TODAY)
+            .order_by(HabitLog.date.desc()).limit(101)
+        )
+
+    return endpoints(
+        user_habit, habit_log, open_pause, cold_before, habit_list, pauses, daily,
+        logged_on, habit_ids, logs_between, schedule, owned, log_page,
+    )
+
+
+def lambda_statements():
+    return endpoints(
+        q.user_habit_query,
+        q.habit_log_query,
+        q.open_pause_query,
+        q.cold_before_query,
+        lambda user_id, ids: q.habit_list_query(user_id, TODAY, FIELDS, 50, None),
+        q.pauses_query,
+        lambda user_id: q.daily_habits_query(user_id, TODAY),
+        lambda ids: q.logged_on_query(ids, TODAY),
+        q.habit_ids_query,
+        q.logs_between_query,
+        q.schedule_habits_query,
+        q.owned_habit_query,
+        lambda habit_id: q.log_page_query(habit_id, TODAY, 100),
+    )
+
+
+def endpoints(user_habit, habit_log, open_pause, cold_before, habit_list, pauses, daily,
+              logged_on, habit_ids, logs_between, schedule, owned, log_page):
+    """``{endpoint: fn(user_id, ids) -> [statement, ...]}``."""
+    return {
+        "log/unlog": lambda u, ids: [
+            user_habit(ids[-1], u), habit_log(ids[-1], TODAY), cold_before(u),
+        ],
+        "archive": lambda u, ids: [user_habit(ids[-1], u), open_pause(ids[-1])],
+        "list_habits": lambda u, ids: [habit_list(u, ids), pauses(ids)],
+        "daily_summary": lambda u, ids: [daily(u), logged_on(ids), cold_before(u)],
+        "log_summary": lambda u, ids: [habit_ids(u), logs_between(ids, *MONTH), cold_before(u)],
+        "calendar_summary": lambda u, ids: [
+            schedule(u), pauses(ids), logs_between(ids, *MONTH), cold_before(u),
+        ],
+        "habit_logs": lambda u, ids: [owned(ids[-1], u), log_page(ids[-1]), cold_before(u)],
+    }
+
+
+def prepare(build, calls):
+    """One request's worth of work: build the statements and their cache keys."""
+    def run():
+        for user_id, ids in calls:
+            for stmt in build(user_id, ids):
+                stmt._generate_cache_key()
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+    configure_mappers()
+
+    calls = [(user_id, ids) for user_id, ids in enumerate(ID_LISTS, start=1)]
+    paths = {"select": select_statements(), "lambda_stmt": lambda_statements()}
+    for name, built in paths.items():
+        for endpoint, build in built.items():
+            # Same key whatever the ids, or the compiled cache would miss.
+            keys = {tuple(s._generate_cache_key().key for s in build(u, ids)) for u, ids in calls}
+            assert len(keys) == 1, (name, endpoint)
+
+    print(f"{'endpoint':18} {'select µs':>10} {'lambda µs':>10} {'speedup':>8}")
+    for endpoint in paths["select"]:
+        timings = [
+            timeit.timeit(prepare(built[endpoint], calls), number=args.runs)
+            for built in paths.values()
+        ]
+        per_request = [1e6 * t / (args.runs * len(calls)) for t in timings]
+        print(
+            f"{endpoint:18} {per_request[0]:10.1f} {per_request[1]:10.1f} "
+            f"{timings[0] / timings[1]:7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
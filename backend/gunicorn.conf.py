@@ -0,0 +1,6 @@
+# backend/gunicorn.conf.py
+# Loaded by gunicorn from the working directory. Workers and threads come
+# from the same variables that size the SQLAlchemy pool in app.config.
+from app.config import server_concurrency
+
+workers, threads = server_concurrency()
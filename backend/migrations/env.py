@@ -5,6 +5,8 @@ from flask import current_app
 
 from alembic import context
 
+from app.utils.log_partitions import is_partition_name
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -90,9 +92,21 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # habit_log's date partitions are created by app.utils.log_partitions,
+    # not declared as models; keep autogenerate from dropping them.
+    def include_name(name, type_, parent_names):
+        if type_ == "table":
+            return not is_partition_name(name)
+        return True
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_name") is None:
+        conf_args["include_name"] = include_name
+    # Migrations that build indexes CONCURRENTLY commit mid-way; keep each
+    # revision in its own transaction so earlier ones are recorded first.
+    conf_args.setdefault("transaction_per_migration", True)
 
     connectable = get_engine()
 
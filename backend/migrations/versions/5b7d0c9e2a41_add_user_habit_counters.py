@@ -0,0 +1,42 @@
+"""add user habit counters
+
+Revision ID: 5b7d0c9e2a41
+Revises: b2e6264f1423
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5b7d0c9e2a41'
+down_revision = 'b2e6264f1423'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'user_habit_counters',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('active_count', sa.Integer(), nullable=False),
+        sa.Column('total_count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute(
+        """
+        INSERT INTO user_habit_counters (user_id, active_count, total_count)
+        SELECT h.user_id,
+               SUM(CASE WHEN NOT EXISTS (
+                   SELECT 1 FROM habit_pauses p
+                   WHERE p.habit_id = h.id AND p.end_date IS NULL
+               ) THEN 1 ELSE 0 END),
+               COUNT(*)
+        FROM habit h
+        GROUP BY h.user_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('user_habit_counters')
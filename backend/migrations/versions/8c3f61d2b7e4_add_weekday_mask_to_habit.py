@@ -0,0 +1,35 @@
+"""add weekday mask to habit
+
+Revision ID: 8c3f61d2b7e4
+Revises: 5b7d0c9e2a41
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '8c3f61d2b7e4'
+down_revision = '5b7d0c9e2a41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'habit',
+        sa.Column('weekday_mask', sa.SmallInteger(), nullable=False, server_default='127'),
+    )
+    op.execute(
+        """
+        UPDATE habit
+        SET weekday_mask = COALESCE(
+            (SELECT bit_or(1 << d) FROM unnest(days_of_week) AS d WHERE d BETWEEN 0 AND 6),
+            0
+        )
+        WHERE frequency = 'WEEKLY'
+        """
+    )
+
+
+def downgrade():
+    op.drop_column('habit', 'weekday_mask')
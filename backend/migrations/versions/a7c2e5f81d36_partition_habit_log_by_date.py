@@ -0,0 +1,126 @@
+"""partition habit_log by date
+
+Revision ID: a7c2e5f81d36
+Revises: 6e0b2f9a1c37
+Create Date: 2026-10-19 00:00:00.000000
+
+Postgres only: habit_log becomes a table range-partitioned on date, with
+one partition per HABIT_LOG_PARTITION_INTERVAL (year or month) from the
+oldest log through HABIT_LOG_PARTITIONS_AHEAD periods from now, plus a
+default partition. The DDL is written out here rather than taken from
+app.utils.log_partitions, so this revision keeps doing what it did when
+it shipped. The primary key widens to (id, date) because Postgres
+requires the partition key in every unique constraint; uix_habit_date
+already contains it. Existing rows are copied, so on a large table run
+this in a maintenance window.
+"""
+import os
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'a7c2e5f81d36'
+down_revision = '6e0b2f9a1c37'
+branch_labels = None
+depends_on = None
+
+
+def _interval():
+    interval = os.getenv("HABIT_LOG_PARTITION_INTERVAL", "year")
+    if interval not in ("year", "month"):
+        raise ValueError(f"Unknown partition interval: {interval}")
+    return interval
+
+
+def _period_start(day, interval):
+    return date(day.year, 1, 1) if interval == "year" else date(day.year, day.month, 1)
+
+
+def _next_period(start, interval):
+    if interval == "year":
+        return date(start.year + 1, 1, 1)
+    return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def _partition_name(start, interval):
+    if interval == "year":
+        return f"habit_log_y{start.year}"
+    return f"habit_log_m{start.year}_{start.month:02d}"
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE habit_log RENAME TO habit_log_unpartitioned")
+    op.execute("ALTER TABLE habit_log_unpartitioned RENAME CONSTRAINT habit_log_pkey TO habit_log_unpartitioned_pkey")
+    op.execute("ALTER TABLE habit_log_unpartitioned RENAME CONSTRAINT uix_habit_date TO uix_habit_date_unpartitioned")
+    op.execute("ALTER TABLE habit_log_unpartitioned RENAME CONSTRAINT habit_log_habit_id_fkey TO habit_log_unpartitioned_habit_id_fkey")
+    op.execute(
+        """
+        CREATE TABLE habit_log (
+            id integer NOT NULL DEFAULT nextval('habit_log_id_seq'),
+            date date NOT NULL,
+            habit_id integer NOT NULL,
+            CONSTRAINT habit_log_pkey PRIMARY KEY (id, date),
+            CONSTRAINT habit_log_habit_id_fkey FOREIGN KEY (habit_id) REFERENCES habit (id),
+            CONSTRAINT uix_habit_date UNIQUE (habit_id, date)
+        ) PARTITION BY RANGE (date)
+        """
+    )
+    op.execute("ALTER SEQUENCE habit_log_id_seq OWNED BY habit_log.id")
+    op.execute("CREATE TABLE habit_log_default PARTITION OF habit_log DEFAULT")
+
+    # The new table is still empty, so each partition is created attached.
+    interval = _interval()
+    today = date.today()
+    oldest = bind.execute(sa.text("SELECT min(date) FROM habit_log_unpartitioned")).scalar()
+    through = _period_start(today, interval)
+    for _ in range(int(os.getenv("HABIT_LOG_PARTITIONS_AHEAD", "1"))):
+        through = _next_period(through, interval)
+    start = _period_start(min(oldest or today, today), interval)
+    while start <= through:
+        end = _next_period(start, interval)
+        op.execute(
+            f"CREATE TABLE {_partition_name(start, interval)} PARTITION OF habit_log"
+            f" FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        start = end
+
+    op.execute(
+        "INSERT INTO habit_log (id, date, habit_id)"
+        " SELECT id, date, habit_id FROM habit_log_unpartitioned"
+    )
+    op.execute("DROP TABLE habit_log_unpartitioned")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    op.execute(
+        """
+        CREATE TABLE habit_log_unpartitioned (
+            id integer NOT NULL DEFAULT nextval('habit_log_id_seq'),
+            date date NOT NULL,
+            habit_id integer NOT NULL,
+            CONSTRAINT habit_log_unpartitioned_pkey PRIMARY KEY (id),
+            CONSTRAINT habit_log_unpartitioned_habit_id_fkey FOREIGN KEY (habit_id) REFERENCES habit (id),
+            CONSTRAINT uix_habit_date_unpartitioned UNIQUE (habit_id, date)
+        )
+        """
+    )
+    op.execute(
+        "INSERT INTO habit_log_unpartitioned (id, date, habit_id)"
+        " SELECT id, date, habit_id FROM habit_log"
+    )
+    op.execute("ALTER SEQUENCE habit_log_id_seq OWNED BY habit_log_unpartitioned.id")
+    op.execute("DROP TABLE habit_log")
+    op.execute("ALTER TABLE habit_log_unpartitioned RENAME TO habit_log")
+    op.execute("ALTER TABLE habit_log RENAME CONSTRAINT habit_log_unpartitioned_pkey TO habit_log_pkey")
+    op.execute("ALTER TABLE habit_log RENAME CONSTRAINT uix_habit_date_unpartitioned TO uix_habit_date")
+    op.execute("ALTER TABLE habit_log RENAME CONSTRAINT habit_log_unpartitioned_habit_id_fkey TO habit_log_habit_id_fkey")
@@ -0,0 +1,30 @@
+"""add cold log archives
+
+Revision ID: c5d18e3f7a92
+Revises: a7c2e5f81d36
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'c5d18e3f7a92'
+down_revision = 'a7c2e5f81d36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cold_log_archives',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('before', sa.Date(), nullable=False),
+        sa.Column('log_count', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+
+
+def downgrade():
+    op.drop_table('cold_log_archives')
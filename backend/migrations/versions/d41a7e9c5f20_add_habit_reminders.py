@@ -0,0 +1,40 @@
+"""add habit reminders
+
+Revision ID: d41a7e9c5f20
+Revises: 8c3f61d2b7e4
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'd41a7e9c5f20'
+down_revision = '8c3f61d2b7e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'habit_reminders',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('habit_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('time_of_day', sa.Time(), nullable=False),
+        sa.Column('timezone', sa.String(length=64), nullable=False),
+        sa.Column('enabled', sa.Boolean(), nullable=False),
+        sa.Column('next_due_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['habit_id'], ['habit.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('habit_id')
+    )
+    op.create_index(op.f('ix_habit_reminders_next_due_at'), 'habit_reminders', ['next_due_at'], unique=False)
+    op.create_index(op.f('ix_habit_reminders_user_id'), 'habit_reminders', ['user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_habit_reminders_user_id'), table_name='habit_reminders')
+    op.drop_index(op.f('ix_habit_reminders_next_due_at'), table_name='habit_reminders')
+    op.drop_table('habit_reminders')
@@ -0,0 +1,104 @@
+"""key habit_log by (habit_id, date)
+
+Revision ID: e8b4a1d6c3f9
+Revises: c5d18e3f7a92
+Create Date: 2026-10-19 00:00:00.000000
+
+Drops the surrogate id and makes (habit_id, date) the primary key in
+place of uix_habit_date. On Postgres nothing is rebuilt under a lock:
+dropping a column only touches the catalog, each partition's key index
+is built with CREATE INDEX CONCURRENTLY outside the transaction and then
+adopted as its primary key, and the parent key attaches those indexes
+instead of building its own. uix_habit_date keeps rejecting duplicates
+until the new key is in place. Old rows keep the dropped column's bytes
+until rewritten; `flask habit-log-partitions compact` rewrites past
+partitions one at a time.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'e8b4a1d6c3f9'
+down_revision = 'c5d18e3f7a92'
+branch_labels = None
+depends_on = None
+
+
+def _is_partitioned(bind):
+    return bind.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table"
+        " WHERE partrelid = to_regclass('habit_log'))"
+    )).scalar()
+
+
+def _key_tables(bind):
+    """The tables that hold rows: every attached partition, or habit_log itself."""
+    if not _is_partitioned(bind):
+        return ['habit_log']
+    return bind.execute(sa.text(
+        "SELECT inhrelid::regclass::text FROM pg_inherits"
+        " WHERE inhparent = 'habit_log'::regclass ORDER BY 1"
+    )).scalars().all()
+
+
+def _has_primary_key(bind, table):
+    return bind.execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_index"
+        " WHERE indrelid = to_regclass(:table) AND indisprimary)"
+    ), {"table": table}).scalar()
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        with op.batch_alter_table('habit_log', schema=None) as batch_op:
+            batch_op.drop_constraint('uix_habit_date', type_='unique')
+            batch_op.drop_column('id')
+            batch_op.create_primary_key('habit_log_pkey', ['habit_id', 'date'])
+        return
+
+    partitioned = _is_partitioned(bind)
+    # Partitions detached by `habit-log-partitions archive` keep their id
+    # column, but not the default on the sequence dropped along with it.
+    detached = bind.execute(sa.text(
+        "SELECT c.oid::regclass::text FROM pg_attrdef d JOIN pg_class c ON c.oid = d.adrelid"
+        " WHERE c.relkind = 'r' AND NOT c.relispartition"
+        " AND pg_get_expr(d.adbin, d.adrelid) LIKE '%habit_log_id_seq%'"
+    )).scalars().all()
+    for table in detached:
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER TABLE habit_log DROP CONSTRAINT IF EXISTS habit_log_pkey")
+    op.execute("ALTER TABLE habit_log DROP COLUMN IF EXISTS id")  # and its sequence
+
+    with op.get_context().autocommit_block():
+        for table in _key_tables(bind):
+            if _has_primary_key(bind, table):
+                continue  # keyed by an earlier, interrupted run
+            index = f"{table}_pkey"
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+            op.execute(f"CREATE UNIQUE INDEX CONCURRENTLY {index} ON {table} (habit_id, date)")
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {index} PRIMARY KEY USING INDEX {index}")
+
+    if partitioned:
+        op.execute("ALTER TABLE habit_log ADD CONSTRAINT habit_log_pkey PRIMARY KEY (habit_id, date)")
+    op.execute("ALTER TABLE habit_log DROP CONSTRAINT uix_habit_date")
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        with op.batch_alter_table('habit_log', schema=None) as batch_op:
+            batch_op.drop_constraint('habit_log_pkey', type_='primary')
+            batch_op.add_column(sa.Column('id', sa.Integer(), nullable=True))
+            batch_op.create_unique_constraint('uix_habit_date', ['habit_id', 'date'])
+        op.execute("UPDATE habit_log SET id = rowid")
+        with op.batch_alter_table('habit_log', schema=None) as batch_op:
+            batch_op.alter_column('id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_primary_key('habit_log_pkey', ['id'])
+        return
+
+    op.execute("ALTER TABLE habit_log ADD COLUMN id serial")
+    op.execute("ALTER TABLE habit_log ADD CONSTRAINT uix_habit_date UNIQUE (habit_id, date)")
+    op.execute("ALTER TABLE habit_log DROP CONSTRAINT habit_log_pkey")
+    key = "(id, date)" if _is_partitioned(bind) else "(id)"
+    op.execute(f"ALTER TABLE habit_log ADD CONSTRAINT habit_log_pkey PRIMARY KEY {key}")
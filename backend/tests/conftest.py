@@ -55,6 +55,17 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture()
+def asgi_client(app):
+    from starlette.testclient import TestClient
+
+    from app.asgi import create_asgi_app
+    from tests.helpers import ASGIClient
+
+    with TestClient(create_asgi_app(app)) as test_client:
+        yield ASGIClient(test_client)
+
+
 @pytest.fixture()
 def register_user(client):
     def _register(email="test@example.com", password="Password1"):
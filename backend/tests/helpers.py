@@ -10,3 +10,27 @@ def create_habit(client, headers, **overrides):
     }
     payload.update(overrides)
     return client.post("/api/habits/", headers=headers, json=payload)
+
+
+class ASGIClient:
+    """The slice of Flask's test client the API tests use, over Starlette's."""
+
+    def __init__(self, test_client):
+        self._client = test_client
+
+    def open(self, method, path, headers=None, json=None):
+        response = self._client.request(method, path, headers=headers, json=json)
+        response.get_json = response.json
+        return response
+
+    def get(self, path, **kwargs):
+        return self.open("GET", path, **kwargs)
+
+    def post(self, path, **kwargs):
+        return self.open("POST", path, **kwargs)
+
+    def put(self, path, **kwargs):
+        return self.open("PUT", path, **kwargs)
+
+    def delete(self, path, **kwargs):
+        return self.open("DELETE", path, **kwargs)
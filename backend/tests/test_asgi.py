@@ -0,0 +1,235 @@
+from datetime import date, timedelta
+
+import pytest
+
+from app.asgi.database import async_database_url
+from tests.helpers import create_habit
+
+READ_PATHS = [
+    "/api/habits/",
+    "/api/habits/?fields=name,pauses&limit=1",
+    "/api/habits/?date={today}",
+    "/api/habits/archived",
+    "/api/habits/daily-summary?date={yesterday}",
+    "/api/habits/log-summary?month={month}",
+    "/api/habits/log-summary?month={month}&encoding=bitmap&axis=habit",
+    "/api/habits/calendar-summary?month={month}",
+    "/api/habits/week-grid?week_start={week_start}",
+    "/api/habits/{habit_id}/logs?encoding=rle",
+]
+
+
+@pytest.mark.unit
+def test_async_database_url_swaps_in_asyncio_drivers():
+    assert async_database_url("sqlite:////tmp/app.db").drivername == "sqlite+aiosqlite"
+    url = async_database_url("postgresql://u:p@db/habee?sslmode=require")
+    assert url.drivername == "postgresql+asyncpg"
+    assert dict(url.query) == {"ssl": "require"}
+
+
+@pytest.mark.integration
+def test_asgi_reads_match_flask_without_calling_flask(app, client, asgi_client, auth_headers):
+    headers = auth_headers()
+    today = date.today()
+    yesterday = today - timedelta(days=1)
+    habit_id = create_habit(
+        client, headers, name="Read", start_date=(today - timedelta(days=10)).isoformat()
+    ).get_json()["habit"]["id"]
+    archived_id = create_habit(client, headers, name="Stretch").get_json()["habit"]["id"]
+    for day in (yesterday, today - timedelta(days=3)):
+        client.post(f"/api/habits/{habit_id}/log", headers=headers, json={"date": day.isoformat()})
+    client.post(f"/api/habits/{archived_id}/archive", headers=headers)
+
+    params = {
+        "today": today.isoformat(),
+        "yesterday": yesterday.isoformat(),
+        "month": today.strftime("%Y-%m"),
+        "week_start": (today - timedelta(days=today.weekday())).isoformat(),
+        "habit_id": habit_id,
+    }
+    expected = {}
+    for path in READ_PATHS:
+        rv = client.get(path.format(**params), headers=headers)
+        assert rv.status_code == 200, path
+        expected[path] = rv.get_json()
+
+    # Served natively: the Flask views are never reached.
+    for endpoint in list(app.view_functions):
+        if endpoint.startswith("habits."):
+            app.view_functions[endpoint] = None
+    for path in READ_PATHS:
+        rv = asgi_client.get(path.format(**params), headers=headers)
+        assert rv.status_code == 200, path
+        assert rv.get_json() == expected[path], path
+
+
+@pytest.mark.integration
+def test_asgi_errors_match_flask(client, asgi_client, auth_headers):
+    headers = auth_headers()
+    for path, kwargs in [
+        ("/api/habits/daily-summary", {"headers": headers}),
+        ("/api/habits/?limit=0", {"headers": headers}),
+        ("/api/habits/week-grid?week_start=nope", {"headers": headers}),
+        ("/api/habits/999/logs", {"headers": headers}),
+        ("/api/habits/", {}),
+        ("/api/habits/", {"headers": {"Authorization": "Bearer not-a-jwt"}}),
+    ]:
+        flask_rv = client.get(path, **kwargs)
+        asgi_rv = asgi_client.get(path, **kwargs)
+        assert asgi_rv.status_code == flask_rv.status_code, path
+        assert asgi_rv.get_json() == flask_rv.get_json(), path
+
+
+@pytest.mark.integration
+def test_asgi_compresses_and_caches_like_flask(app, client, asgi_client, auth_headers):
+    from app.extensions import compressor
+
+    headers = auth_headers()
+    create_habit(client, headers, name="Compressed")
+    app.config["COMPRESS_MIN_SIZE"] = 0
+    last_month = (date.today().replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+
+    for encoding in compressor.available(app.config):
+        encoded = {**headers, "Accept-Encoding": encoding}
+        for path in ("/api/habits/", f"/api/habits/log-summary?month={last_month}"):
+            flask_rv = client.get(path, headers=encoded)
+            asgi_rv = asgi_client.get(path, headers=encoded)
+            assert flask_rv.headers["Content-Encoding"] == encoding, path
+            assert asgi_rv.headers["content-encoding"] == encoding, path
+            assert "Accept-Encoding" in asgi_rv.headers["vary"], path
+
+    # A past month's summary is compressed once for both stacks
+    hits = compressor.hits
+    asgi_client.get(
+        f"/api/habits/log-summary?month={last_month}", headers={**headers, "Accept-Encoding": "gzip"}
+    )
+    assert compressor.hits == hits + 1
+
+
+@pytest.mark.integration
+def test_asgi_slow_queries_are_recorded_with_endpoint(client, asgi_client, auth_headers, monkeypatch):
+    from app.extensions import slow_query_log
+
+    headers = auth_headers()
+    create_habit(client, headers, name="Slow")
+    slow_query_log.clear()
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0.0)
+    asgi_client.get("/api/habits/", headers=headers)
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 250.0)
+
+    entries = slow_query_log.entries()
+    assert entries
+    assert {entry["endpoint"] for entry in entries} == {"habits.list_habits"}
+    assert all(entry["user_id"] is not None for entry in entries)
+
+
+WRITE_ENDPOINTS = ["create_habit", "update_habit", "delete_habit", "archive_habit", "log_habit", "unlog_habit"]
+
+
+def _write_scenario(c, headers):
+    """Responses of a run through every native write, with the habit id masked."""
+    today = date.today().isoformat()
+    created = create_habit(c, headers, name="Read")
+    habit_id = created.get_json()["habit"]["id"]
+    steps = [
+        created,
+        create_habit(c, headers, name=" read "),
+        create_habit(c, headers, name="Other", frequency="MONTHLY"),
+        create_habit(c, headers, name="Other", frequency="WEEKLY", days_of_week=[]),
+        c.put(f"/api/habits/{habit_id}", headers=headers, json={"name": "Write"}),
+        c.put(f"/api/habits/{habit_id}", headers=headers, json={"name": ""}),
+        c.put("/api/habits/999999", headers=headers, json={"name": "Missing"}),
+        c.post(f"/api/habits/{habit_id}/log", headers=headers, json={"date": today}),
+        c.post(f"/api/habits/{habit_id}/log", headers=headers, json={"date": today}),
+        c.post(f"/api/habits/{habit_id}/log", headers=headers, json={"date": "nope"}),
+        c.post(f"/api/habits/{habit_id}/log", headers=headers, json={"date": "2000-01-01"}),
+        c.post(f"/api/habits/{habit_id}/unlog", headers=headers, json={"date": today}),
+        c.post(f"/api/habits/{habit_id}/unlog", headers=headers, json={"date": today}),
+        c.post(f"/api/habits/{habit_id}/archive", headers=headers),
+        c.post(f"/api/habits/{habit_id}/archive", headers=headers),
+        create_habit(c, headers, name="write"),
+        c.delete(f"/api/habits/{habit_id}", headers=headers),
+        c.delete(f"/api/habits/{habit_id}", headers=headers),
+    ]
+    def mask(value):
+        if isinstance(value, dict):
+            return {
+                k: "<id>" if v == habit_id and k in ("id", "archivedHabitId") else mask(v)
+                for k, v in value.items()
+            }
+        return value
+
+    return [(rv.status_code, mask(rv.get_json())) for rv in steps]
+
+
+@pytest.mark.integration
+def test_asgi_writes_match_flask_without_calling_flask(app, client, asgi_client, auth_headers):
+    from app.extensions import db, habit_events
+    from app.models.habit_counter import UserHabitCounter
+    from app.utils.events import Subscription
+
+    flask_headers = auth_headers()
+    asgi_headers = auth_headers("asgi@example.com", "Password1")
+    expected = _write_scenario(client, flask_headers)
+
+    # The ASGI user is id 2
+    subscription = Subscription(100)
+    habit_events.hub.subscribe(2, subscription)
+    for endpoint in WRITE_ENDPOINTS:
+        app.view_functions[f"habits.{endpoint}"] = None
+    served = _write_scenario(asgi_client, asgi_headers)
+    habit_events.hub.unsubscribe(2, subscription)
+
+    for step, (flask_rv, asgi_rv) in enumerate(zip(expected, served)):
+        assert asgi_rv == flask_rv, step
+    published = []
+    while (message := subscription.get(0)) is not None:
+        published.append(message.split("\n")[1])
+    assert published == [
+        "event: habit.created", "event: habit.updated", "event: log.created",
+        "event: log.deleted", "event: habit.archived", "event: habit.deleted",
+    ]
+    with app.app_context():
+        counters = db.session.scalars(
+            db.select(UserHabitCounter).order_by(UserHabitCounter.user_id)
+        ).all()
+        assert [(c.active_count, c.total_count) for c in counters] == [(0, 0), (0, 0)]
+
+
+@pytest.mark.integration
+def test_asgi_writes_pin_reads_and_hand_keyed_requests_to_flask(
+    app, client, asgi_client, auth_headers
+):
+    from app.extensions import replica_router
+    from app.utils.db_routing import LAST_WRITE_HEADER
+
+    headers = auth_headers()
+    replica_router.forget_writes()
+    created = create_habit(asgi_client, headers, name="Pinned")
+    assert replica_router.pinned("1", created.headers[LAST_WRITE_HEADER])
+
+    keyed = {**headers, "Idempotency-Key": "asgi-1"}
+    first = create_habit(asgi_client, keyed, name="Keyed")
+    retry = create_habit(asgi_client, keyed, name="Keyed")
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+    # Bodies Flask's get_json() rejects get its own answer
+    not_json = asgi_client.post("/api/habits/", headers=headers)
+    assert not_json.status_code == client.post("/api/habits/", headers=headers).status_code
+
+
+@pytest.mark.integration
+def test_asgi_log_is_rate_limited_like_flask(app, client, asgi_client, auth_headers):
+    from app.extensions import limiter
+
+    headers = auth_headers()
+    habit_id = create_habit(client, headers, name="Often").get_json()["habit"]["id"]
+    if not limiter.enabled:
+        pytest.skip("rate limiting is disabled")
+    statuses = [
+        asgi_client.post(f"/api/habits/{habit_id}/log", headers=headers).status_code
+        for _ in range(11)
+    ]
+    assert statuses == [200] * 10 + [429]
@@ -1,3 +1,6 @@
+import os
+import subprocess
+import sys
 from datetime import datetime, timedelta
 from unittest.mock import patch
 
@@ -256,3 +259,17 @@ def test_validate_and_reset_reject_expired_token(client, register_user, app):
     assert reset.status_code == 400
     assert validate.get_json()["error"] == "Invalid or expired token"
     assert reset.get_json()["error"] == "Invalid or expired token"
+
+
+@pytest.mark.unit
+def test_auth_routes_do_not_import_provider_sdks_eagerly():
+    code = (
+        "import sys, app.routes.auth; "
+        "print('google.auth.transport.requests' in sys.modules or 'requests' in sys.modules)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    assert result.stdout.strip() == "False"
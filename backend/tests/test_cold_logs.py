@@ -0,0 +1,157 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.extensions import cold_storage, db
+from app.models.cold_log_archive import ColdLogArchive
+from app.models.log import HabitLog
+from app.utils.cold_logs import ColdLogs
+from tests.helpers import create_habit
+
+OLD_DAYS = [date(2019, 1, 1) + timedelta(days=i) for i in (0, 1, 2, 4, 40)]
+
+
+@pytest.fixture()
+def cold_app(app, tmp_path):
+    app.config["COLD_STORAGE_URL"] = str(tmp_path)
+    cold_storage.init_app(app)
+    yield app
+    app.config["COLD_STORAGE_URL"] = ""
+    cold_storage.init_app(app)
+
+
+def _archive(app, before="2020-01-01"):
+    result = app.test_cli_runner().invoke(args=["cold-logs", "archive", "--before", before])
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def _post(client, headers, habit_id, action, day):
+    return client.post(f"/api/habits/{habit_id}/{action}", headers=headers, json={"date": day})
+
+
+def _habit_with_old_logs(client, headers):
+    habit_id = create_habit(client, headers, start_date="2019-01-01").get_json()["habit"]["id"]
+    for day in [*OLD_DAYS, date.today()]:
+        rv = _post(client, headers, habit_id, "log", day.isoformat())
+        assert rv.status_code == 200
+    return habit_id
+
+
+@pytest.mark.unit
+def test_cold_logs_round_trip_bit_packed_columns():
+    logs = ColdLogs()
+    logs.update([(1, day) for day in OLD_DAYS] + [(2, date(2018, 12, 31))])
+    logs.update([(1, date(2018, 6, 1))])
+
+    restored = ColdLogs.from_bytes(logs.to_bytes())
+
+    assert len(restored) == 7
+    assert list(restored.pairs([1, 2], date(2018, 12, 31), date(2019, 1, 3))) == [
+        (1, date(2019, 1, 1)), (1, date(2019, 1, 2)), (1, date(2019, 1, 3)),
+        (2, date(2018, 12, 31)),
+    ]
+    assert restored.dates(1, before=date(2019, 1, 3)) == [
+        date(2019, 1, 2), date(2019, 1, 1), date(2018, 6, 1),
+    ]
+    assert restored.discard(1, date(2019, 1, 2))
+    assert not restored.discard(1, date(2019, 1, 2))
+    restored.retain([1])
+    assert not restored.contains(2, date(2018, 12, 31))
+    assert len(ColdLogs.from_bytes(restored.to_bytes())) == 5
+
+
+@pytest.mark.integration
+def test_archived_logs_leave_the_hot_table_and_still_read_back(cold_app, client, auth_headers):
+    headers = auth_headers()
+    habit_id = _habit_with_old_logs(client, headers)
+    before_summary = client.get("/api/habits/log-summary?month=2019-01", headers=headers).get_json()
+    before_calendar = client.get(
+        "/api/habits/calendar-summary?month=2019-01", headers=headers
+    ).get_json()
+
+    assert "Archived 5 logs" in _archive(cold_app).output
+
+    with cold_app.app_context():
+        assert [log.date for log in HabitLog.query.all()] == [date.today()]
+        assert ColdLogArchive.query.one().before == date(2020, 1, 1)
+    summary = client.get("/api/habits/log-summary?month=2019-01", headers=headers).get_json()
+    assert summary == before_summary
+    assert client.get(
+        "/api/habits/calendar-summary?month=2019-01", headers=headers
+    ).get_json() == before_calendar
+    grid = client.get("/api/habits/week-grid?week_start=2019-01-01", headers=headers).get_json()
+    assert grid["rows"] == ["3334344"]
+    daily = client.get("/api/habits/daily-summary?date=2019-01-05", headers=headers).get_json()
+    assert daily[0]["completed"] is True
+
+    page = client.get(f"/api/habits/{habit_id}/logs?limit=3", headers=headers).get_json()
+    assert page["dates"] == [date.today().isoformat(), "2019-02-10", "2019-01-05"]
+    rest = client.get(
+        f"/api/habits/{habit_id}/logs?limit=3&before={page['next_before']}", headers=headers
+    ).get_json()
+    assert rest["dates"] == ["2019-01-03", "2019-01-02", "2019-01-01"]
+    assert rest["next_before"] is None
+
+
+@pytest.mark.integration
+def test_logging_and_unlogging_archived_days(cold_app, client, auth_headers):
+    headers = auth_headers()
+    habit_id = _habit_with_old_logs(client, headers)
+    _archive(cold_app)
+
+    again = _post(client, headers, habit_id, "log", "2019-01-02")
+    assert again.get_json()["message"] == "Habit already logged for this date"
+
+    undone = _post(client, headers, habit_id, "unlog", "2019-01-02")
+    assert undone.status_code == 200
+    missing = _post(client, headers, habit_id, "unlog", "2019-01-02")
+    assert missing.status_code == 404
+
+    # A day logged after archiving stays hot until the next run, which merges it in.
+    _post(client, headers, habit_id, "log", "2019-01-04")
+    assert "Archived 1 logs" in _archive(cold_app).output
+    summary = client.get("/api/habits/log-summary?month=2019-01", headers=headers).get_json()
+    assert sorted(summary) == ["2019-01-01", "2019-01-03", "2019-01-04", "2019-01-05"]
+
+
+@pytest.mark.integration
+def test_log_written_while_archiving_is_not_lost(cold_app, client, auth_headers):
+    headers = auth_headers()
+    habit_id = _habit_with_old_logs(client, headers)
+    late_day = date(2019, 1, 20)
+
+    def log_before_delete(conn, cursor, statement, parameters, context, executemany):
+        # A /log for an old day committing just before the archive's DELETE runs.
+        if statement.startswith("DELETE FROM habit_log"):
+            cursor.execute(
+                "INSERT INTO habit_log (habit_id, date) VALUES (?, ?)",
+                (habit_id, late_day.isoformat()),
+            )
+
+    with cold_app.app_context():
+        event.listen(db.engine, "before_cursor_execute", log_before_delete)
+        try:
+            assert "Archived 6 logs" in _archive(cold_app).output
+        finally:
+            event.remove(db.engine, "before_cursor_execute", log_before_delete)
+
+    summary = client.get("/api/habits/log-summary?month=2019-01", headers=headers).get_json()
+    assert late_day.isoformat() in summary
+
+
+@pytest.mark.integration
+def test_asgi_reads_merge_cold_logs(cold_app, client, asgi_client, auth_headers):
+    headers = auth_headers()
+    habit_id = _habit_with_old_logs(client, headers)
+    _archive(cold_app)
+
+    for path in (
+        "/api/habits/log-summary?month=2019-01&encoding=bitmap&axis=habit",
+        "/api/habits/calendar-summary?month=2019-01",
+        "/api/habits/week-grid?week_start=2019-01-01",
+        f"/api/habits/{habit_id}/logs?limit=2&before=2019-01-04",
+    ):
+        expected = client.get(path, headers=headers).get_json()
+        assert asgi_client.get(path, headers=headers).get_json() == expected
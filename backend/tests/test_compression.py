@@ -0,0 +1,91 @@
+import gzip
+import json
+from datetime import date, timedelta
+
+import pytest
+
+from app.extensions import compressor
+from tests.helpers import create_habit
+
+
+def _past_month(today=None):
+    today = today or date.today()
+    return (today.replace(day=1) - timedelta(days=1)).strftime("%Y-%m")
+
+
+@pytest.mark.integration
+def test_large_json_is_gzip_encoded_when_accepted(client, auth_headers, app):
+    headers = auth_headers()
+    create_habit(client, headers, name="Compress me")
+    app.config["COMPRESS_MIN_SIZE"] = 0
+    app.config["COMPRESS_ALGORITHMS"] = ["gzip"]
+
+    rv = client.get("/api/habits/", headers={**headers, "Accept-Encoding": "gzip"})
+    assert rv.status_code == 200
+    assert rv.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in rv.headers["Vary"]
+    body = json.loads(gzip.decompress(rv.data))
+    assert body[0]["name"] == "Compress me"
+
+
+@pytest.mark.integration
+def test_small_or_unaccepted_responses_are_left_alone(client, auth_headers, app):
+    headers = auth_headers()
+    create_habit(client, headers, name="Tiny")
+
+    small = client.get("/api/habits/", headers={**headers, "Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+    app.config["COMPRESS_MIN_SIZE"] = 0
+    identity = client.get("/api/habits/", headers={**headers, "Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers
+    assert identity.get_json()[0]["name"] == "Tiny"
+
+
+@pytest.mark.integration
+def test_streamed_responses_are_compressed_incrementally(client, auth_headers, app):
+    headers = auth_headers()
+    for i in range(3):
+        create_habit(client, headers, name=f"Streamed {i}")
+    app.config["JSON_STREAM_THRESHOLD"] = 1
+    app.config["COMPRESS_ALGORITHMS"] = ["gzip"]
+
+    rv = client.get("/api/habits/", headers={**headers, "Accept-Encoding": "gzip"})
+    assert rv.headers["Content-Encoding"] == "gzip"
+    assert len(json.loads(gzip.decompress(rv.data))) == 3
+
+
+@pytest.mark.integration
+def test_past_month_compression_is_cached(client, auth_headers, app):
+    headers = {**auth_headers(), "Accept-Encoding": "gzip"}
+    app.config["COMPRESS_MIN_SIZE"] = 0
+    app.config["COMPRESS_ALGORITHMS"] = ["gzip"]
+    month = _past_month()
+
+    hits = compressor.hits
+    first = client.get(f"/api/habits/calendar-summary?month={month}", headers=headers)
+    second = client.get(f"/api/habits/calendar-summary?month={month}", headers=headers)
+    assert first.data == second.data
+    assert compressor.hits == hits + 1
+
+    current = date.today().strftime("%Y-%m")
+    client.get(f"/api/habits/calendar-summary?month={current}", headers=headers)
+    client.get(f"/api/habits/calendar-summary?month={current}", headers=headers)
+    assert compressor.hits == hits + 1
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("encoding, module", [("br", "brotli"), ("zstd", "zstandard")])
+def test_optional_encodings_are_preferred_when_installed(client, auth_headers, app, encoding, module):
+    lib = pytest.importorskip(module)
+    headers = auth_headers()
+    create_habit(client, headers, name="Optional")
+    app.config["COMPRESS_MIN_SIZE"] = 0
+
+    rv = client.get("/api/habits/", headers={**headers, "Accept-Encoding": f"gzip, {encoding}"})
+    assert rv.headers["Content-Encoding"] == encoding
+    if module == "brotli":
+        raw = lib.decompress(rv.data)
+    else:
+        raw = lib.ZstdDecompressor().decompressobj().decompress(rv.data)
+    assert json.loads(raw)[0]["name"] == "Optional"
@@ -5,6 +5,14 @@ import pytest
 from tests.helpers import create_habit
 
 
+@pytest.fixture(params=["wsgi", "asgi"])
+def client(request, app):
+    """Every contract test runs against the Flask app and the ASGI entry point."""
+    if request.param == "asgi":
+        return request.getfixturevalue("asgi_client")
+    return app.test_client()
+
+
 def assert_habit_shape(habit: dict):
     assert isinstance(habit["id"], int)
     assert isinstance(habit["name"], str)
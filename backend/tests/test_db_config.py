@@ -0,0 +1,104 @@
+import runpy
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from flask import g
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+
+from app.config import engine_options
+from app.utils.db_timeouts import apply_timeouts, db_timeouts
+
+
+@pytest.mark.unit
+def test_direct_profile_defaults_match_previous_pool():
+    options = engine_options({})
+    assert options["pool_size"] == 5
+    assert options["max_overflow"] == 5
+    assert options["pool_recycle"] == 300
+
+
+@pytest.mark.unit
+def test_direct_profile_splits_connection_budget_across_workers():
+    options = engine_options(
+        {"WEB_CONCURRENCY": "4", "GUNICORN_THREADS": "4", "DB_MAX_CONNECTIONS": "20"}
+    )
+    assert options["pool_size"] == 4
+    assert options["max_overflow"] == 1
+
+
+@pytest.mark.unit
+def test_gunicorn_threads_follow_the_pool_settings(monkeypatch):
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    monkeypatch.setenv("GUNICORN_THREADS", "7")
+    settings = runpy.run_path(str(Path(__file__).parents[1] / "gunicorn.conf.py"))
+    assert (settings["workers"], settings["threads"]) == (3, 7)
+    assert engine_options()["pool_size"] == settings["threads"]
+
+
+@pytest.mark.unit
+def test_pgbouncer_profile_disables_pool_and_prepared_statements():
+    options = engine_options(
+        {"DB_CONNECTION_PROFILE": "pgbouncer", "DATABASE_URL": "postgresql+psycopg://x/db"}
+    )
+    assert options["poolclass"] is NullPool
+    assert options["connect_args"] == {"prepare_threshold": None}
+    assert "pool_size" not in options
+
+    with pytest.raises(RuntimeError):
+        engine_options({"DB_CONNECTION_PROFILE": "mystery"})
+
+
+@pytest.mark.unit
+def test_asyncio_options_size_the_pool_for_the_asgi_process():
+    options = engine_options({"ASYNC_DB_POOL_SIZE": "50", "GUNICORN_THREADS": "4"}, asyncio=True)
+    assert options["pool_size"] == options["max_overflow"] == 50
+
+    bouncer = engine_options(
+        {"DB_CONNECTION_PROFILE": "pgbouncer", "DATABASE_URL": "postgresql://x/db"}, asyncio=True
+    )
+    assert bouncer["connect_args"] == {"statement_cache_size": 0}
+
+
+@pytest.mark.unit
+def test_timeouts_are_set_locally_on_postgres(app):
+    connection = Mock()
+    connection.dialect = SimpleNamespace(name="postgresql")
+    app.config.update({"DB_STATEMENT_TIMEOUT_MS": 15000, "DB_LOCK_TIMEOUT_MS": 0})
+
+    @db_timeouts(statement_ms=2000, lock_ms=500)
+    def view():
+        apply_timeouts(None, None, connection)
+
+    with app.test_request_context():
+        view()
+    connection.exec_driver_sql.assert_called_once_with(
+        "SELECT set_config('statement_timeout', '2000', true), "
+        "set_config('lock_timeout', '500', true)"
+    )
+
+    connection.reset_mock()
+    with app.app_context():
+        g.pop("db_statement_timeout_ms", None)
+        g.pop("db_lock_timeout_ms", None)
+        apply_timeouts(None, None, connection)
+    connection.exec_driver_sql.assert_called_once_with(
+        "SELECT set_config('statement_timeout', '15000', true)"
+    )
+
+    sqlite = Mock()
+    sqlite.dialect = SimpleNamespace(name="sqlite")
+    apply_timeouts(None, None, sqlite)
+    sqlite.exec_driver_sql.assert_not_called()
+
+
+@pytest.mark.unit
+def test_cancelled_statements_map_to_query_timeout(app):
+    cancelled = OperationalError("SELECT 1", {}, SimpleNamespace(pgcode="57014"))
+    handler = app.error_handler_spec[None][None][OperationalError]
+    with app.test_request_context():
+        response, status = handler(cancelled)
+    assert status == 503
+    assert response.get_json() == {"error": "query_timeout"}
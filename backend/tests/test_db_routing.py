@@ -0,0 +1,122 @@
+import os
+import tempfile
+import time
+
+import pytest
+
+from app.extensions import replica_router
+from app.utils.db_routing import LAST_WRITE_HEADER, ReplicaRouter
+from tests.helpers import create_habit
+
+
+@pytest.fixture()
+def replica_app():
+    """A primary plus an empty SQLite replica that never receives writes."""
+    from app import create_app, db
+    from app.config import Config
+    from app.models.habit import Habit
+
+    primary_fd, primary_path = tempfile.mkstemp()
+    replica_fd, replica_path = tempfile.mkstemp()
+    original = Config.SQLALCHEMY_DATABASE_URI, Config.SQLALCHEMY_BINDS
+    Config.SQLALCHEMY_DATABASE_URI = f"sqlite:///{primary_path}"
+    Config.SQLALCHEMY_BINDS = {"replica_0": f"sqlite:///{replica_path}"}
+    Config.SQLALCHEMY_ENGINE_OPTIONS = {}
+    try:
+        routed = create_app()
+    finally:
+        Config.SQLALCHEMY_DATABASE_URI, Config.SQLALCHEMY_BINDS = original
+    routed.config.update({"TESTING": True, "RATELIMIT_ENABLED": False})
+    with routed.app_context():
+        Habit.__table__.columns["days_of_week"].type = db.PickleType()
+        for engine in db.engines.values():
+            db.metadata.create_all(engine)
+    replica_router.forget_writes()
+
+    yield routed
+
+    with routed.app_context():
+        for engine in db.engines.values():
+            db.metadata.drop_all(engine)
+    # Binds register metadata on the shared extension; drop it for later apps.
+    db.metadatas.pop("replica_0", None)
+    for fd, path in ((primary_fd, primary_path), (replica_fd, replica_path)):
+        os.close(fd)
+        os.unlink(path)
+
+
+@pytest.mark.integration
+def test_reads_go_to_replica_unless_user_recently_wrote(replica_app):
+    client = replica_app.test_client()
+    client.post("/api/auth/register", json={"email": "r@example.com", "password": "Password1"})
+    token = client.post(
+        "/api/auth/login", json={"email": "r@example.com", "password": "Password1"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    assert create_habit(client, headers, name="Fresh").status_code == 200
+
+    # Inside the read-your-writes window the primary serves the read.
+    pinned = client.get("/api/habits/", headers=headers)
+    assert [h["name"] for h in pinned.get_json()] == ["Fresh"]
+
+    # Once the window lapses reads go to the (lagging, here empty) replica.
+    replica_router.forget_writes()
+    routed = client.get("/api/habits/", headers=headers)
+    assert routed.status_code == 200
+    assert routed.get_json() == []
+
+
+@pytest.mark.integration
+def test_last_write_header_pins_reads_on_another_worker(replica_app):
+    client = replica_app.test_client()
+    client.post("/api/auth/register", json={"email": "w@example.com", "password": "Password1"})
+    token = client.post(
+        "/api/auth/login", json={"email": "w@example.com", "password": "Password1"}
+    ).get_json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    created = create_habit(client, headers, name="Elsewhere")
+    last_write = created.headers[LAST_WRITE_HEADER]
+    # The next read lands on a worker that never saw the write
+    replica_router.forget_writes()
+
+    pinned = client.get("/api/habits/", headers={**headers, LAST_WRITE_HEADER: last_write})
+    assert [h["name"] for h in pinned.get_json()] == ["Elsewhere"]
+    forged = client.get("/api/habits/", headers={**headers, LAST_WRITE_HEADER: "1.forged"})
+    assert forged.get_json() == []
+
+
+@pytest.mark.unit
+def test_write_token_pins_the_user_on_every_router(app, monkeypatch):
+    from app.asgi.database import AsyncDatabase
+
+    writer, reader = ReplicaRouter(), ReplicaRouter()
+    for router in (writer, reader):
+        router.init_app(app, None)
+    writer.record_write("7")
+    token = writer.write_token("7")
+
+    assert not reader.recently_wrote("7")
+    assert reader.pinned("7", token)
+    assert not reader.pinned("8", token)
+    assert not reader.pinned("7", None)
+
+    database = AsyncDatabase(app.config, reader)
+    database.primary, database.replicas = "primary", ["replica"]
+    assert database.read_engine("7", token) == "primary"
+    assert database.read_engine("7") == "replica"
+
+    signed_at = int(time.time() - reader.window - 1)
+    monkeypatch.setattr(writer._signer, "get_timestamp", lambda: signed_at)
+    expired = writer.write_token("7")
+    assert not reader.pinned("7", expired)
+
+
+@pytest.mark.integration
+def test_no_replicas_means_primary_reads(client, auth_headers):
+    headers = auth_headers()
+    create_habit(client, headers, name="Primary only")
+    replica_router.forget_writes()
+    rv = client.get("/api/habits/", headers=headers)
+    assert [h["name"] for h in rv.get_json()] == ["Primary only"]
@@ -8,6 +8,8 @@ from sqlalchemy.exc import OperationalError
 import app.extensions as ext
 import app.routes.auth as auth_routes
 from app.routes.habits import is_applicable
+from app.utils.date_runs import decode_date_runs, encode_date_runs
+from app.utils.pauses import PauseIndex, merge_intervals
 
 
 def _habit(
@@ -65,6 +67,43 @@ def test_is_applicable_excludes_open_and_closed_pauses():
     assert is_applicable(habit_with_old_pause, today) is True
 
 
+@pytest.mark.unit
+def test_habit_schedule_matches_is_applicable():
+    from app.models.habit import weekday_mask
+    from app.utils.read_models import habit_schedules
+
+    monday = date(2026, 1, 5)
+    pauses = [
+        SimpleNamespace(start_date=monday + timedelta(days=9), end_date=monday + timedelta(days=16)),
+        SimpleNamespace(start_date=monday + timedelta(days=12), end_date=monday + timedelta(days=20)),
+        SimpleNamespace(start_date=monday + timedelta(days=40), end_date=None),
+    ]
+    habit = _habit(start_date_value=monday + timedelta(days=2), frequency="WEEKLY",
+                   days_of_week=[0, 2, 4], pauses=pauses)
+    row = SimpleNamespace(id=1, start_date=habit.start_date,
+                          weekday_mask=weekday_mask(habit.frequency, habit.days_of_week))
+    [schedule] = habit_schedules([row], [(1, p.start_date, p.end_date) for p in pauses])
+
+    for offset in range(60):
+        day = monday + timedelta(days=offset)
+        assert schedule.applicable(day.toordinal()) is is_applicable(habit, day), day
+
+
+@pytest.mark.unit
+def test_hot_statements_reuse_one_cache_key_with_fresh_values():
+    from app.utils import habit_queries
+
+    monday = habit_queries.daily_habits_query(1, date(2026, 1, 5))
+    tuesday = habit_queries.daily_habits_query(2, date(2026, 1, 6))
+    assert monday._generate_cache_key().key == tuesday._generate_cache_key().key
+    assert tuesday.compile().params["day_bit_1"] == 2
+
+    few = habit_queries.logs_between_query([1], date(2026, 1, 1), date(2026, 1, 31))
+    many = habit_queries.logs_between_query([4, 5, 6], date(2026, 2, 1), date(2026, 2, 28))
+    assert few._generate_cache_key().key == many._generate_cache_key().key
+    assert many.compile().params["habit_ids_1"] == [4, 5, 6]
+
+
 @pytest.mark.unit
 def test_retry_on_operational_error_retries_once(monkeypatch):
     rollback = Mock()
@@ -129,3 +168,67 @@ def test_rate_limit_key_falls_back_to_ip(monkeypatch):
     monkeypatch.setattr(ext, "verify_jwt_in_request", raise_auth_error)
     monkeypatch.setattr(ext, "get_remote_address", lambda: "5.6.7.8")
     assert ext.rate_limit_key() == "5.6.7.8"
+
+
+@pytest.mark.unit
+def test_bitmaps_use_little_endian_bit_order():
+    from app.utils.bitmaps import day_bitmaps, habit_bitmaps, pack_bits
+
+    assert pack_bits(0b1_0000_0001, 9) == b"\x01\x01"
+
+    day = date(2026, 3, 2)
+    pairs = [(10, day), (30, day), (20, day + timedelta(days=1))]
+    assert day_bitmaps(pairs, [10, 20, 30]) == {day: "BQ==", day + timedelta(days=1): "Ag=="}
+    assert habit_bitmaps(pairs, [10, 20, 30], day, 31) == ["AQAAAA==", "AgAAAA==", "AQAAAA=="]
+
+
+@pytest.mark.unit
+def test_merge_intervals_collapses_adjacent_overlapping_and_empty():
+    d = date(2026, 1, 1)
+    merged = merge_intervals([
+        (d + timedelta(days=10), d + timedelta(days=12)),
+        (d, d + timedelta(days=2)),
+        (d + timedelta(days=3), d + timedelta(days=4)),  # adjacent
+        (d + timedelta(days=1), d + timedelta(days=3)),  # overlapping
+        (d + timedelta(days=7), d + timedelta(days=6)),  # empty
+        (d + timedelta(days=11), None),
+    ])
+    assert merged == [(d, d + timedelta(days=4)), (d + timedelta(days=10), None)]
+
+
+@pytest.mark.unit
+def test_pause_index_matches_linear_scan():
+    start = date(2026, 1, 1)
+    pauses = [
+        SimpleNamespace(start_date=start + timedelta(days=s), end_date=e and start + timedelta(days=e))
+        for s, e in [(3, 5), (9, 9), (6, 7), (20, None)]
+    ]
+    index = PauseIndex(pauses)
+    assert len(index) == 3
+    for offset in range(30):
+        day = start + timedelta(days=offset)
+        linear = any(p.start_date <= day and (p.end_date is None or p.end_date >= day) for p in pauses)
+        assert index.covers(day) is linear
+
+
+@pytest.mark.unit
+def test_date_runs_round_trip():
+    d = date(2026, 3, 10)
+    dates = [d, d - timedelta(days=1), d - timedelta(days=2), d - timedelta(days=5)]
+    runs = encode_date_runs(dates)
+    assert runs == [[d, 3], [d - timedelta(days=5), 1]]
+    assert decode_date_runs(runs) == dates
+
+
+@pytest.mark.unit
+def test_log_partition_periods_and_names():
+    from app.utils.log_partitions import horizon, is_partition_name, next_period, partition_name
+
+    assert next_period(date(2026, 12, 1), "month") == date(2027, 1, 1)
+    assert next_period(date(2026, 1, 1), "year") == date(2027, 1, 1)
+    assert horizon(date(2026, 11, 19), "month", 2) == date(2027, 1, 1)
+    assert partition_name(date(2026, 3, 1), "month") == "habit_log_m2026_03"
+    assert partition_name(date(2026, 1, 1), "year") == "habit_log_y2026"
+    assert is_partition_name("habit_log_default")
+    assert is_partition_name("habit_log_m2026_03")
+    assert not is_partition_name("habit_logs")
@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+
+import pytest
+
+from app.extensions import habit_events
+from app.utils.events import RESYNC, Hub, PostgresBroker, Subscription, open_broker
+from tests.helpers import create_habit
+
+
+@pytest.fixture()
+def short_streams(monkeypatch):
+    monkeypatch.setattr(habit_events, "stream_seconds", 0.3)
+    monkeypatch.setattr(habit_events, "keepalive_seconds", 0.1)
+    monkeypatch.setattr(habit_events, "wsgi_streams", True)
+
+
+def _events(body):
+    """``(id, event, data)`` for each event in an SSE body, skipping comments."""
+    events = []
+    for block in body.split("\n\n"):
+        fields = dict(
+            line.split(": ", 1) for line in block.splitlines() if line and not line.startswith(":")
+        )
+        if "event" in fields:
+            events.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def _read(client, headers, last_event_id=None):
+    """Open the stream (subscribed once this returns) and a reader for its body."""
+    if last_event_id:
+        headers = {**headers, "Last-Event-ID": last_event_id}
+    rv = client.get("/api/habits/events", headers=headers, buffered=False)
+    assert rv.status_code == 200
+    assert rv.mimetype == "text/event-stream"
+    return lambda: _events("".join(chunk.decode() for chunk in rv.response))
+
+
+@pytest.mark.unit
+def test_hub_replays_after_last_event_id_or_asks_for_resync():
+    hub = Hub()
+    for i in range(3):
+        hub.dispatch(7, f"n.{i}", f"event {i}")
+
+    caught_up = Subscription(10)
+    hub.subscribe(7, caught_up, last_event_id="n.0")
+    hub.dispatch(7, "n.3", "event 3")
+    assert [caught_up.get(0) for _ in range(3)] == ["event 1", "event 2", "event 3"]
+
+    lost = Subscription(10)
+    hub.subscribe(7, lost, last_event_id="n.unknown")
+    assert lost.get(0) == RESYNC
+    hub.unsubscribe(7, lost)
+    hub.dispatch(7, "n.4", "event 4")
+    assert lost.get(0) is None
+
+
+@pytest.mark.integration
+def test_event_stream_delivers_deltas_for_the_user_only(
+    client, auth_headers, short_streams
+):
+    headers = auth_headers()
+    other = auth_headers("other@example.com", "Password1")
+    read_mine = _read(client, headers)
+    read_theirs = _read(client, other)
+
+    habit = create_habit(client, headers, name="Live").get_json()["habit"]
+    client.post(f"/api/habits/{habit['id']}/log", headers=headers, json={"date": habit["start_date"]})
+    client.post(f"/api/habits/{habit['id']}/log", headers=headers, json={"date": habit["start_date"]})
+    client.post(f"/api/habits/{habit['id']}/archive", headers=headers)
+
+    events = read_mine()
+    assert [(event, data) for _, event, data in events] == [
+        ("habit.created", habit),
+        ("log.created", {"habit_id": habit["id"], "date": habit["start_date"]}),
+        ("habit.archived", {"id": habit["id"], "pause_start_date": habit["start_date"]}),
+    ]
+    assert read_theirs() == []
+
+    # Reconnecting after the first event replays the rest
+    replayed = _read(client, headers, last_event_id=events[0][0])()
+    assert replayed == events[1:]
+
+
+@pytest.mark.integration
+def test_failed_mutations_publish_nothing(client, auth_headers, short_streams):
+    headers = auth_headers()
+    read = _read(client, headers)
+    assert client.post("/api/habits/", headers=headers, json={"name": ""}).status_code == 400
+    assert client.post("/api/habits/999/log", headers=headers).status_code == 404
+    assert read() == []
+
+
+@pytest.mark.integration
+def test_asgi_event_stream(app, asgi_client, auth_headers, monkeypatch):
+    monkeypatch.setattr(habit_events, "stream_seconds", 2)
+    headers = auth_headers()
+    created = []
+
+    def mutate():
+        # The test client only returns the response once the stream has ended.
+        while not habit_events.hub._streams.get(1):
+            time.sleep(0.01)
+        client = app.test_client()
+        habit_id = create_habit(client, headers, name="Over ASGI").get_json()["habit"]["id"]
+        client.delete(f"/api/habits/{habit_id}", headers=headers)
+        created.append(habit_id)
+
+    writer = threading.Thread(target=mutate)
+    writer.start()
+    rv = asgi_client.get("/api/habits/events", headers=headers)
+    writer.join()
+
+    assert rv.headers["content-type"].startswith("text/event-stream")
+    assert [(event, data.get("id")) for _, event, data in _events(rv.text)] == [
+        ("habit.created", created[0]),
+        ("habit.deleted", created[0]),
+    ]
+    assert asgi_client.get("/api/habits/events").status_code == 401
+    # Sync WSGI workers would be held for the whole stream
+    assert app.test_client().get("/api/habits/events", headers=headers).status_code == 501
+
+
+@pytest.mark.unit
+def test_postgres_brokers_need_psycopg2():
+    hub = Hub()
+    for url in ("postgresql+asyncpg://u@db/habee", "postgresql+psycopg://u@db/habee"):
+        with pytest.raises(RuntimeError, match="psycopg2"):
+            open_broker(url, hub)
+    broker = open_broker("postgresql+psycopg2://u@db/habee", hub)
+    assert isinstance(broker, PostgresBroker)
+    broker.engine.dispose()
@@ -1,9 +1,15 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 
 import pytest
+from sqlalchemy import event
 
-from app.extensions import db
+import app.routes.habits as habit_routes
+from app.extensions import db, user_locks
 from app.models.habit import Habit
+from app.models.habit_counter import UserHabitCounter
+from app.models.log import HabitLog
 from app.models.habit_pause import HabitPause
 from app.models.user import User
 from tests.helpers import create_habit
@@ -419,3 +425,465 @@ def test_log_and_unlog_return_404_for_missing_habit(client, auth_headers):
     missing_unlog = client.post("/api/habits/99999/unlog", headers=headers)
     assert missing_log.status_code == 404
     assert missing_unlog.status_code == 404
+
+
+@pytest.mark.integration
+def test_list_habits_keyset_pagination(client, auth_headers):
+    headers = auth_headers()
+    ids = [create_habit(client, headers, name=f"Page {i}").get_json()["habit"]["id"] for i in range(5)]
+
+    first = client.get("/api/habits?limit=2", headers=headers)
+    assert first.status_code == 200
+    body = first.get_json()
+    assert [h["id"] for h in body["habits"]] == ids[:2]
+    assert body["next_after"] == ids[1]
+
+    seen = [h["id"] for h in body["habits"]]
+    cursor = body["next_after"]
+    while cursor is not None:
+        page = client.get(f"/api/habits?limit=2&after={cursor}", headers=headers).get_json()
+        seen += [h["id"] for h in page["habits"]]
+        cursor = page["next_after"]
+    assert seen == ids
+
+    unpaged = client.get(f"/api/habits?after={ids[2]}", headers=headers).get_json()
+    assert [h["id"] for h in unpaged] == ids[3:]
+
+
+@pytest.mark.integration
+def test_list_habits_pagination_applies_date_filter_before_limit(client, auth_headers):
+    headers = auth_headers()
+    today = date.today()
+    tomorrow = (today + timedelta(days=1)).isoformat()
+    create_habit(client, headers, name="Later 1", start_date=tomorrow)
+    visible = create_habit(client, headers, name="Visible").get_json()["habit"]["id"]
+    create_habit(client, headers, name="Later 2", start_date=tomorrow)
+
+    rv = client.get(f"/api/habits?limit=1&date={today.isoformat()}", headers=headers)
+    body = rv.get_json()
+    assert [h["id"] for h in body["habits"]] == [visible]
+    assert body["next_after"] is None
+
+
+@pytest.mark.integration
+def test_list_habits_field_projection(client, auth_headers):
+    headers = auth_headers()
+    create_habit(client, headers, name="Projected")
+
+    rv = client.get("/api/habits?fields=name,frequency", headers=headers)
+    assert rv.status_code == 200
+    assert rv.get_json() == [{"id": rv.get_json()[0]["id"], "name": "Projected", "frequency": "DAILY"}]
+
+    bad = client.get("/api/habits?fields=name,secret", headers=headers)
+    assert bad.status_code == 400
+    assert bad.get_json()["error"] == "Unknown field: secret"
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize("query", ["limit=0", "limit=201", "limit=abc", "after=x"])
+def test_list_habits_rejects_bad_pagination_params(client, auth_headers, query):
+    headers = auth_headers()
+    rv = client.get(f"/api/habits?{query}", headers=headers)
+    assert rv.status_code == 400
+
+
+def _decode_bits(b64):
+    import base64
+
+    return int.from_bytes(base64.b64decode(b64), "little")
+
+
+@pytest.mark.integration
+def test_log_summary_bitmap_encoding_matches_json(client, auth_headers):
+    headers = auth_headers()
+    first = date.today().replace(day=1)
+    ids = [
+        create_habit(client, headers, name=f"Bits {i}", start_date=first.isoformat()).get_json()[
+            "habit"
+        ]["id"]
+        for i in range(10)
+    ]
+    client.post(f"/api/habits/{ids[0]}/log", headers=headers, json={"date": first.isoformat()})
+    client.post(f"/api/habits/{ids[9]}/log", headers=headers, json={"date": first.isoformat()})
+    month = first.strftime("%Y-%m")
+
+    by_day = client.get(
+        f"/api/habits/log-summary?month={month}&encoding=bitmap", headers=headers
+    ).get_json()
+    assert by_day["habit_ids"] == ids
+    bits = _decode_bits(by_day["days"][first.isoformat()])
+    logged = {ids[i] for i in range(len(ids)) if bits >> i & 1}
+    assert logged == {ids[0], ids[9]}
+
+    by_habit = client.get(
+        f"/api/habits/log-summary?month={month}&encoding=bitmap&axis=habit", headers=headers
+    ).get_json()
+    assert by_habit["start"] == first.isoformat()
+    assert _decode_bits(by_habit["habits"][0]) == 1
+    assert _decode_bits(by_habit["habits"][1]) == 0
+    assert _decode_bits(by_habit["habits"][9]) == 1
+
+    bad = client.get(f"/api/habits/log-summary?month={month}&encoding=xml", headers=headers)
+    assert bad.status_code == 400
+
+
+@pytest.mark.integration
+def test_habit_counters_follow_create_archive_unarchive_delete(client, auth_headers, app):
+    headers = auth_headers("counters@example.com", "Password1")
+    first = create_habit(client, headers, name="Counted 1").get_json()["habit"]["id"]
+    create_habit(client, headers, name="Counted 2")
+
+    def counts():
+        with app.app_context():
+            user = User.query.filter_by(email="counters@example.com").first()
+            row = db.session.get(UserHabitCounter, user.id)
+            return row and (row.active_count, row.total_count)
+
+    assert counts() == (2, 2)
+    client.post(f"/api/habits/{first}/archive", headers=headers)
+    assert counts() == (1, 2)
+    client.post(f"/api/habits/{first}/unarchive", headers=headers)
+    assert counts() == (2, 2)
+    client.post(f"/api/habits/{first}/archive", headers=headers)
+    client.delete(f"/api/habits/{first}", headers=headers)
+    assert counts() == (1, 1)
+
+    client.delete("/api/auth/delete", headers=headers)
+    with app.app_context():
+        assert db.session.query(UserHabitCounter).count() == 0
+
+
+@pytest.mark.integration
+def test_parallel_creates_stop_at_the_active_limit(client, auth_headers, app, monkeypatch):
+    monkeypatch.setattr(habit_routes, "MAX_ACTIVE_HABITS", 3)
+    headers = auth_headers()
+    user_locks.reset_stats()
+    start = threading.Barrier(8)
+
+    def create(i):
+        start.wait()
+        return create_habit(app.test_client(), headers, name=f"Parallel {i}")
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        responses = list(pool.map(create, range(8)))
+
+    assert sorted(rv.status_code for rv in responses) == [200] * 3 + [400] * 5
+    assert {
+        rv.get_json()["error"] for rv in responses if rv.status_code == 400
+    } == {"active_habit_limit_reached"}
+    with app.app_context():
+        assert Habit.query.count() == 3
+        row = db.session.query(UserHabitCounter).one()
+        assert (row.active_count, row.total_count) == (3, 3)
+
+    app.config["ADMIN_USER_IDS"] = {"1"}
+    stats = client.get("/api/admin/user-locks", headers=headers).get_json()
+    assert stats["acquired"] == 8
+    assert stats["contended"] == 0 or stats["wait_ms_max"] > 0
+
+
+@pytest.mark.integration
+def test_parallel_archives_pause_a_habit_once(client, auth_headers, app):
+    headers = auth_headers()
+    habit_id = create_habit(client, headers, name="Contested").get_json()["habit"]["id"]
+    create_habit(client, headers, name="Bystander")
+    start = threading.Barrier(6)
+
+    def archive(_):
+        start.wait()
+        return app.test_client().post(f"/api/habits/{habit_id}/archive", headers=headers)
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        responses = list(pool.map(archive, range(6)))
+
+    assert [rv.status_code for rv in responses] == [200] * 6
+    with app.app_context():
+        assert HabitPause.query.filter_by(habit_id=habit_id, end_date=None).count() == 1
+        row = db.session.query(UserHabitCounter).one()
+        assert (row.active_count, row.total_count) == (1, 2)
+
+
+@pytest.mark.integration
+def test_rename_to_archived_name_is_rejected_by_unique_index(client, auth_headers):
+    headers = auth_headers()
+    archived_id = create_habit(client, headers, name="Stretch").get_json()["habit"]["id"]
+    client.post(f"/api/habits/{archived_id}/archive", headers=headers)
+    other_id = create_habit(client, headers, name="Walk").get_json()["habit"]["id"]
+
+    rv = client.put(f"/api/habits/{other_id}", json={"name": "STRETCH"}, headers=headers)
+    assert rv.status_code == 409
+    assert rv.get_json() == {"error": "duplicate_name_archived", "archivedHabitId": archived_id}
+
+    rv = client.put(f"/api/habits/{other_id}", json={"name": "Walk "}, headers=headers)
+    assert rv.status_code == 200
+
+
+@pytest.mark.integration
+def test_create_habit_uses_two_statements(client, auth_headers, app):
+    headers = auth_headers()
+    create_habit(client, headers, name="First")
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert create_habit(client, headers, name="Second").status_code == 200
+        created = list(statements)
+        statements.clear()
+        assert create_habit(client, headers, name="second").status_code == 409
+        duplicate = list(statements)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(created) == 2
+    assert len(duplicate) == 2
+
+
+@pytest.mark.integration
+def test_bulk_archive_unarchive_delete(client, auth_headers, app):
+    headers = auth_headers("bulk@example.com", "Password1")
+    ids = [
+        create_habit(client, headers, name=f"Bulk {i}").get_json()["habit"]["id"]
+        for i in range(3)
+    ]
+    other = create_habit(client, auth_headers("other@example.com", "Password1"), name="Theirs")
+    other_id = other.get_json()["habit"]["id"]
+
+    rv = client.post(
+        "/api/habits/bulk",
+        json={"action": "archive", "habit_ids": ids[:2] + [other_id]},
+        headers=headers,
+    )
+    assert rv.status_code == 200
+    assert rv.get_json()["results"] == [
+        {"id": ids[0], "status": "archived"},
+        {"id": ids[1], "status": "archived"},
+        {"id": other_id, "status": "not_found"},
+    ]
+    archived = client.get("/api/habits/archived", headers=headers).get_json()
+    assert sorted(h["id"] for h in archived) == ids[:2]
+
+    rv = client.post(
+        "/api/habits/bulk", json={"action": "unarchive", "habit_ids": ids}, headers=headers
+    )
+    statuses = [r["status"] for r in rv.get_json()["results"]]
+    assert statuses == ["unarchived", "unarchived", "not_archived"]
+    assert client.get("/api/habits/archived", headers=headers).get_json() == []
+
+    client.post(f"/api/habits/{ids[0]}/log", headers=headers)
+    client.post(f"/api/habits/{ids[1]}/archive", headers=headers)
+    rv = client.post(
+        "/api/habits/bulk", json={"action": "delete", "habit_ids": ids[:2]}, headers=headers
+    )
+    assert [r["status"] for r in rv.get_json()["results"]] == ["deleted", "deleted"]
+
+    with app.app_context():
+        user = User.query.filter_by(email="bulk@example.com").first()
+        assert [h.id for h in Habit.query.filter_by(user_id=user.id)] == [ids[2]]
+        assert HabitLog.query.filter(HabitLog.habit_id.in_(ids[:2])).count() == 0
+        counters = db.session.get(UserHabitCounter, user.id)
+        assert (counters.active_count, counters.total_count) == (1, 1)
+
+
+@pytest.mark.integration
+def test_bulk_archive_skips_a_habit_paused_after_its_read(client, auth_headers, app):
+    headers = auth_headers()
+    ids = [
+        create_habit(client, headers, name=f"Racing {i}").get_json()["habit"]["id"]
+        for i in range(2)
+    ]
+
+    def archive_first(conn, cursor, statement, parameters, context, executemany):
+        # A single archive of ids[0] committing between the bulk read and its INSERT.
+        if statement.startswith("INSERT INTO habit_pauses"):
+            cursor.execute(
+                "INSERT INTO habit_pauses (habit_id, start_date) VALUES (?, ?)",
+                (ids[0], date.today().isoformat()),
+            )
+            cursor.execute("UPDATE user_habit_counters SET active_count = active_count - 1")
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", archive_first)
+    try:
+        rv = client.post(
+            "/api/habits/bulk", json={"action": "archive", "habit_ids": ids}, headers=headers
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", archive_first)
+
+    assert rv.status_code == 200
+    with app.app_context():
+        assert HabitPause.query.filter(HabitPause.end_date.is_(None)).count() == 2
+        counters = db.session.query(UserHabitCounter).one()
+        assert (counters.active_count, counters.total_count) == (0, 2)
+
+
+@pytest.mark.integration
+def test_bulk_unarchive_enforces_active_limit_for_batch(client, auth_headers, app):
+    headers = auth_headers("bulk-limit@example.com", "Password1")
+    ids = [
+        create_habit(client, headers, name=f"Paused {i}").get_json()["habit"]["id"]
+        for i in range(2)
+    ]
+    client.post("/api/habits/bulk", json={"action": "archive", "habit_ids": ids}, headers=headers)
+
+    with app.app_context():
+        user = User.query.filter_by(email="bulk-limit@example.com").first()
+        for i in range(99):
+            db.session.add(Habit(name=f"Filler {i}", user_id=user.id, start_date=date.today()))
+        db.session.commit()
+
+    rv = client.post(
+        "/api/habits/bulk", json={"action": "unarchive", "habit_ids": ids}, headers=headers
+    )
+    assert rv.status_code == 400
+    assert rv.get_json()["error"] == "active_habit_limit_reached"
+    assert len(client.get("/api/habits/archived", headers=headers).get_json()) == 2
+
+
+@pytest.mark.integration
+@pytest.mark.parametrize(
+    "payload, expected_error",
+    [
+        ({"action": "pause", "habit_ids": [1]}, "Invalid action"),
+        ({"action": "archive", "habit_ids": []}, "habit_ids must be a non-empty list of integers"),
+        ({"action": "archive", "habit_ids": ["1"]}, "habit_ids must be a non-empty list of integers"),
+    ],
+)
+def test_bulk_rejects_bad_payload(client, auth_headers, payload, expected_error):
+    rv = client.post("/api/habits/bulk", json=payload, headers=auth_headers())
+    assert rv.status_code == 400
+    assert rv.get_json()["error"] == expected_error
+
+
+@pytest.mark.integration
+def test_archive_toggles_keep_pauses_normalized(client, auth_headers, app):
+    headers = auth_headers()
+    habit_id = create_habit(client, headers, name="Toggle").get_json()["habit"]["id"]
+
+    for _ in range(3):
+        client.post(f"/api/habits/{habit_id}/archive", headers=headers)
+        client.post(f"/api/habits/{habit_id}/unarchive", headers=headers)
+    with app.app_context():
+        assert HabitPause.query.filter_by(habit_id=habit_id).count() == 0
+
+    today = date.today()
+    with app.app_context():
+        db.session.add_all([
+            HabitPause(habit_id=habit_id, start_date=today - timedelta(days=9),
+                       end_date=today - timedelta(days=5)),
+            HabitPause(habit_id=habit_id, start_date=today - timedelta(days=4),
+                       end_date=today - timedelta(days=1)),
+            HabitPause(habit_id=habit_id, start_date=today - timedelta(days=3), end_date=None),
+        ])
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=["compact-pauses"])
+    assert "Removed 2 redundant pause rows." in result.output
+    with app.app_context():
+        pauses = HabitPause.query.filter_by(habit_id=habit_id).all()
+        assert [(p.start_date, p.end_date) for p in pauses] == [(today - timedelta(days=9), None)]
+
+
+@pytest.mark.integration
+def test_weekday_mask_filters_daily_summary_in_sql(client, auth_headers, app):
+    headers = auth_headers()
+    monday = date(2026, 1, 5)
+    create_habit(client, headers, name="Daily", start_date=monday.isoformat())
+    weekly = create_habit(
+        client, headers, name="MWF", start_date=monday.isoformat(),
+        frequency="WEEKLY", days_of_week=[0, 2, 4],
+    ).get_json()["habit"]["id"]
+
+    with app.app_context():
+        assert db.session.get(Habit, weekly).weekday_mask == 0b10101
+
+    tuesday = (monday + timedelta(days=1)).isoformat()
+    names = [h["name"] for h in client.get(
+        f"/api/habits/daily-summary?date={tuesday}", headers=headers
+    ).get_json()]
+    assert names == ["Daily"]
+
+    client.put(
+        f"/api/habits/{weekly}",
+        json={"name": "MWF", "frequency": "WEEKLY", "days_of_week": [1]},
+        headers=headers,
+    )
+    listed = client.get(f"/api/habits?date={tuesday}&fields=name", headers=headers).get_json()
+    assert [h["name"] for h in listed] == ["Daily", "MWF"]
+
+
+@pytest.mark.integration
+def test_week_grid_encodes_one_state_per_cell(client, auth_headers, app):
+    headers = auth_headers()
+    today = date.today()
+    week_start = today - timedelta(days=3)
+    daily = create_habit(client, headers, name="Daily", start_date=week_start.isoformat())
+    daily_id = daily.get_json()["habit"]["id"]
+    late_id = create_habit(
+        client, headers, name="Late", start_date=(today - timedelta(days=1)).isoformat()
+    ).get_json()["habit"]["id"]
+    client.post(f"/api/habits/{daily_id}/log", json={"date": week_start.isoformat()}, headers=headers)
+    with app.app_context():
+        db.session.add(HabitPause(
+            habit_id=daily_id,
+            start_date=week_start + timedelta(days=1),
+            end_date=week_start + timedelta(days=1),
+        ))
+        db.session.commit()
+
+    rv = client.get(f"/api/habits/week-grid?week_start={week_start.isoformat()}", headers=headers)
+    assert rv.status_code == 200
+    body = rv.get_json()
+    assert body["habit_ids"] == [daily_id, late_id]
+    decode = lambda row: [body["states"][int(c)] for c in row]
+    assert decode(body["rows"][0]) == [
+        "done", "paused", "missed", "pending", "future", "future", "future",
+    ]
+    assert decode(body["rows"][1])[:4] == ["inactive", "inactive", "missed", "pending"]
+
+
+@pytest.mark.integration
+def test_week_grid_rejects_bad_params(client, auth_headers):
+    headers = auth_headers()
+    assert client.get("/api/habits/week-grid", headers=headers).status_code == 400
+    rv = client.get("/api/habits/week-grid?week_start=2026-01-05&days=40", headers=headers)
+    assert rv.status_code == 400
+    assert rv.get_json()["error"] == "days must be between 1 and 31"
+
+
+@pytest.mark.integration
+def test_habit_logs_keyset_pagination_and_rle(client, auth_headers, app):
+    headers = auth_headers()
+    start = date(2025, 1, 1)
+    habit_id = create_habit(client, headers, name="History", start_date=start.isoformat())
+    habit_id = habit_id.get_json()["habit"]["id"]
+    other_id = create_habit(client, headers, name="Other").get_json()["habit"]["id"]
+    logged = [start + timedelta(days=offset) for offset in (0, 1, 2, 5, 6, 9)]
+    with app.app_context():
+        db.session.add_all([HabitLog(habit_id=habit_id, date=d) for d in logged])
+        db.session.add(HabitLog(habit_id=other_id, date=start))
+        db.session.commit()
+
+    pages, before = [], None
+    while True:
+        url = f"/api/habits/{habit_id}/logs?limit=4" + (f"&before={before}" if before else "")
+        body = client.get(url, headers=headers).get_json()
+        pages.append(body["dates"])
+        before = body["next_before"]
+        if before is None:
+            break
+    expected = [d.isoformat() for d in reversed(logged)]
+    assert pages == [expected[:4], expected[4:]]
+
+    rle = client.get(f"/api/habits/{habit_id}/logs?encoding=rle", headers=headers).get_json()
+    assert rle["runs"] == [["2025-01-10", 1], ["2025-01-07", 2], ["2025-01-03", 3]]
+
+    assert client.get(f"/api/habits/{other_id + 100}/logs", headers=headers).status_code == 404
+    assert client.get(f"/api/habits/{habit_id}/logs?limit=0", headers=headers).status_code == 400
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.extensions import db, idempotency
+from app.models.habit import Habit
+from app.models.idempotency import IdempotencyKey
+from app.utils.idempotency import _fingerprint
+from tests.helpers import create_habit
+
+
+def _keyed(headers, key):
+    return {**headers, "Idempotency-Key": key}
+
+
+@pytest.mark.integration
+def test_retried_create_replays_the_first_response(client, auth_headers):
+    headers = _keyed(auth_headers(), "create-1")
+
+    first = create_habit(client, headers, name="Read")
+    retry = create_habit(client, headers, name="Read")
+
+    assert first.status_code == 200
+    assert retry.status_code == 200
+    assert retry.get_json() == first.get_json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert Habit.query.filter_by(name="Read").count() == 1
+
+
+@pytest.mark.integration
+def test_key_reused_for_a_different_request_is_rejected(client, auth_headers):
+    headers = _keyed(auth_headers(), "create-2")
+
+    assert create_habit(client, headers, name="Read").status_code == 200
+    other = create_habit(client, headers, name="Write")
+
+    assert other.status_code == 422
+    assert other.get_json()["error"] == "idempotency_key_reused"
+
+
+@pytest.mark.integration
+def test_keys_are_scoped_per_user_and_validated(client, auth_headers):
+    first = create_habit(client, _keyed(auth_headers(), "shared"), name="Read")
+    second = create_habit(
+        client, _keyed(auth_headers(email="other@example.com"), "shared"), name="Read"
+    )
+    assert first.status_code == second.status_code == 200
+    assert first.get_json()["habit"]["id"] != second.get_json()["habit"]["id"]
+
+    too_long = create_habit(client, _keyed(auth_headers(register=False), "k" * 256))
+    assert too_long.status_code == 400
+
+
+@pytest.mark.integration
+def test_error_responses_are_replayed_and_in_progress_keys_conflict(app, client, auth_headers):
+    headers = auth_headers()
+    habit_id = create_habit(client, headers).get_json()["habit"]["id"]
+    log_headers = _keyed(headers, "log-1")
+
+    bad = client.post(f"/api/habits/{habit_id}/log", headers=log_headers, json={"date": "nope"})
+    replay = client.post(f"/api/habits/{habit_id}/log", headers=log_headers, json={"date": "nope"})
+    assert bad.status_code == replay.status_code == 400
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+    path = f"/api/habits/{habit_id}/log"
+    with app.test_request_context(path, method="POST"):
+        user_id = db.session.get(Habit, habit_id).user_id
+        fingerprint = _fingerprint()
+        db.session.add(IdempotencyKey(user_id=user_id, key="busy", fingerprint=fingerprint))
+        db.session.commit()
+    busy = client.post(path, headers=_keyed(headers, "busy"))
+    assert busy.status_code == 409
+
+    with app.app_context():
+        row = db.session.get(IdempotencyKey, (user_id, "busy"))
+        row.created_at = datetime.utcnow() - timedelta(days=2)
+        db.session.commit()
+        assert idempotency.purge() == 1
+
+
+@pytest.mark.integration
+def test_response_of_a_handler_that_rolled_back_is_replayed(client, auth_headers):
+    headers = auth_headers()
+    create_habit(client, headers, name="Read")
+    keyed = _keyed(headers, "duplicate-1")
+
+    # The duplicate-name 409 rolls the handler's transaction, claim included, back
+    conflict = create_habit(client, keyed, name="Read")
+    replay = create_habit(client, keyed, name="Read")
+    assert conflict.status_code == replay.status_code == 409
+    assert replay.get_json() == conflict.get_json()
+    assert replay.headers["Idempotent-Replayed"] == "true"
+
+
+@pytest.mark.integration
+def test_keyed_mutation_costs_one_extra_commit_on_the_request_session(app, client, auth_headers):
+    headers = auth_headers()
+    commits = []
+
+    def count(conn):
+        commits.append(conn)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "commit", count)
+    try:
+        create_habit(client, headers, name="Plain")
+        plain = len(commits)
+        create_habit(client, _keyed(headers, "create-3"), name="Keyed")
+    finally:
+        event.remove(engine, "commit", count)
+    # The claim commits with the habit; storing the response is the one extra
+    assert len(commits) - plain == plain + 1
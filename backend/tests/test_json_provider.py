@@ -0,0 +1,46 @@
+from datetime import date
+
+import orjson
+import pytest
+
+from app.utils.json_provider import iter_encode
+from tests.helpers import create_habit
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "payload",
+    [
+        [],
+        {},
+        [{"id": i, "start_date": date(2026, 1, 1)} for i in range(600)],
+        {date(2026, 1, day): [day, day + 1] for day in range(1, 32)},
+    ],
+)
+def test_iter_encode_matches_single_shot_encoding(payload):
+    streamed = b"".join(iter_encode(payload, chunk_size=7))
+    expected = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    assert orjson.loads(streamed) == orjson.loads(expected)
+
+
+@pytest.mark.unit
+def test_provider_serializes_dates_as_iso(app):
+    assert app.json.dumps({"day": date(2026, 3, 1)}) == '{"day":"2026-03-01"}'
+    assert app.json.dumps({date(2026, 3, 1): 1}) == '{"2026-03-01":1}'
+
+
+@pytest.mark.integration
+def test_large_responses_are_streamed(client, auth_headers, app):
+    headers = auth_headers()
+    for i in range(3):
+        create_habit(client, headers, name=f"Stream {i}")
+
+    app.config["JSON_STREAM_THRESHOLD"] = 2
+    streamed = client.get("/api/habits/", headers=headers)
+    assert "Content-Length" not in streamed.headers
+    assert [h["name"] for h in streamed.get_json()] == ["Stream 0", "Stream 1", "Stream 2"]
+
+    app.config["JSON_STREAM_THRESHOLD"] = 500
+    buffered = client.get("/api/habits/", headers=headers)
+    assert "Content-Length" in buffered.headers
+    assert buffered.get_json() == streamed.get_json()
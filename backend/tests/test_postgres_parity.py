@@ -16,6 +16,12 @@ def postgres_app():
     os.environ.setdefault("APPLE_CLIENT_ID", "test-apple-client-id")
 
     from app import create_app, db
+    from app.config import Config
+    from app.models.habit import Habit
+
+    # Undo what the SQLite app fixture may have patched earlier in the run.
+    Config.SQLALCHEMY_DATABASE_URI = db_url
+    Habit.__table__.columns["days_of_week"].type = db.ARRAY(db.Integer)
 
     app = create_app()
     app.config.update({"TESTING": True, "RATELIMIT_ENABLED": False})
@@ -78,3 +84,186 @@ def test_postgres_calendar_summary_endpoint(postgres_client):
     rv = postgres_client.get(f"/api/habits/calendar-summary?month={month}", headers=headers)
     assert rv.status_code == 200
     assert isinstance(rv.get_json(), dict)
+
+
+@pytest.mark.postgres
+def test_postgres_partitioned_habit_log(postgres_app, postgres_client):
+    import importlib.util
+    from pathlib import Path
+
+    from alembic.migration import MigrationContext
+    from alembic.operations import Operations
+    from sqlalchemy import text
+
+    from app import db
+    from app.utils import log_partitions
+
+    versions = Path(__file__).resolve().parents[1] / "migrations" / "versions"
+
+    def upgrade(revision):
+        path = next(versions.glob(f"{revision}_*.py"))
+        spec = importlib.util.spec_from_file_location(f"migration_{revision}", path)
+        migration = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(migration)
+        with db.engine.connect() as conn:
+            context = MigrationContext.configure(conn)
+            with context.begin_transaction(), Operations.context(context):
+                migration.upgrade()
+
+    # habit_log as it was before the partitioning migration
+    with postgres_app.app_context(), db.engine.begin() as conn:
+        conn.execute(text("DROP TABLE habit_log"))
+        conn.execute(text(
+            "CREATE TABLE habit_log (id serial PRIMARY KEY, date date NOT NULL,"
+            " habit_id integer NOT NULL REFERENCES habit (id),"
+            " CONSTRAINT uix_habit_date UNIQUE (habit_id, date))"
+        ))
+
+    headers = _register_and_login(postgres_client, email="partitions@example.com")
+    old = date(2019, 5, 2)
+    habit_id = postgres_client.post(
+        "/api/habits/",
+        headers=headers,
+        json={"name": "Partitioned", "start_date": old.isoformat(), "frequency": "DAILY"},
+    ).get_json()["habit"]["id"]
+    postgres_client.post(f"/api/habits/{habit_id}/log", headers=headers, json={"date": old.isoformat()})
+
+    with postgres_app.app_context():
+        upgrade("a7c2e5f81d36")
+        upgrade("e8b4a1d6c3f9")
+
+    log = postgres_client.post(f"/api/habits/{habit_id}/log", headers=headers)
+    assert log.status_code == 200
+    again = postgres_client.post(f"/api/habits/{habit_id}/log", headers=headers)
+    assert again.get_json()["message"] == "Habit already logged for this date"
+
+    with postgres_app.app_context(), db.engine.begin() as conn:
+        placed = dict(conn.execute(text("SELECT date, tableoid::regclass::text FROM habit_log")).all())
+        assert placed == {
+            old: "habit_log_y2019",
+            date.today(): log_partitions.partition_name(date(date.today().year, 1, 1), "year"),
+        }
+        key = conn.execute(text(
+            "SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conname = 'habit_log_pkey'"
+        )).scalar()
+        assert key == "PRIMARY KEY (habit_id, date)"
+        log_partitions.compact_partition(conn, "habit_log_y2019")
+        assert log_partitions.archive_partitions(conn, date(2020, 1, 1)) == ["habit_log_y2019"]
+
+    rv = postgres_client.delete(f"/api/habits/{habit_id}", headers=headers)
+    assert rv.status_code == 200
+
+    with postgres_app.app_context(), db.engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA {log_partitions.ARCHIVE_SCHEMA} CASCADE"))
+
+
+@pytest.mark.postgres
+def test_postgres_parallel_writes_respect_the_active_limit(postgres_app, monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from sqlalchemy import text
+
+    import app.routes.habits as habit_routes
+    from app.extensions import db, user_locks
+
+    monkeypatch.setattr(habit_routes, "MAX_ACTIVE_HABITS", 3)
+    headers = _register_and_login(postgres_app.test_client(), email="limits@example.com")
+    user_locks.reset_stats()
+
+    def in_parallel(requests):
+        start = threading.Barrier(len(requests))
+
+        def send(request):
+            start.wait()
+            return request(postgres_app.test_client())
+
+        with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+            return [rv.status_code for rv in pool.map(send, requests)]
+
+    # The user has no counter row yet, so every create races the backfill too.
+    created = in_parallel([
+        lambda c, i=i: c.post("/api/habits/", headers=headers, json={"name": f"Parallel {i}"})
+        for i in range(8)
+    ])
+    assert sorted(created) == [200] * 3 + [400] * 5
+
+    client = postgres_app.test_client()
+    habit_ids = [h["id"] for h in client.get("/api/habits/", headers=headers).get_json()]
+    client.post("/api/habits/bulk", headers=headers, json={"action": "archive", "habit_ids": habit_ids})
+    for name in ("Fresh 1", "Fresh 2"):
+        client.post("/api/habits/", headers=headers, json={"name": name})
+
+    unarchived = in_parallel([
+        lambda c, habit_id=habit_id: c.post(f"/api/habits/{habit_id}/unarchive", headers=headers)
+        for habit_id in habit_ids
+    ])
+    assert sorted(unarchived) == [200, 400, 400]
+
+    active = client.get(f"/api/habits/?date={date.today().isoformat()}", headers=headers).get_json()
+    assert len(active) == 3
+    stats = user_locks.stats()
+    assert stats["acquired"] == 8 + 1 + 2 + 3
+    assert stats["contended"] <= stats["acquired"]
+
+    contested = active[0]["id"]
+    archived = in_parallel([
+        lambda c: c.post(f"/api/habits/{contested}/archive", headers=headers) for _ in range(6)
+    ])
+    assert archived == [200] * 6
+    with postgres_app.app_context():
+        open_pauses = db.session.scalar(text(
+            "SELECT count(*) FROM habit_pauses WHERE habit_id = :id AND end_date IS NULL"
+        ), {"id": contested})
+        counts = db.session.execute(text("SELECT active_count FROM user_habit_counters")).all()
+    assert open_pauses == 1
+    assert counts == [(2,)]
+
+    # Retries of a keyed create wait on the first claim, then replay it or conflict
+    keyed = {**headers, "Idempotency-Key": "parallel-create"}
+    retried = in_parallel([
+        lambda c: c.post("/api/habits/", headers=keyed, json={"name": "Keyed"}) for _ in range(6)
+    ])
+    assert set(retried) <= {200, 409} and 200 in retried
+    with postgres_app.app_context():
+        keyed_habits = db.session.scalar(text("SELECT count(*) FROM habit WHERE name = 'Keyed'"))
+    assert keyed_habits == 1
+
+
+@pytest.mark.postgres
+def test_postgres_asgi_writes_respect_the_active_limit(postgres_app, monkeypatch):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    from sqlalchemy import text
+    from starlette.testclient import TestClient
+
+    import app.routes.habits as habit_routes
+    from app.asgi import create_asgi_app
+    from app.extensions import db
+
+    monkeypatch.setattr(habit_routes, "MAX_ACTIVE_HABITS", 3)
+    headers = _register_and_login(postgres_app.test_client(), email="async@example.com")
+    for endpoint in ("create_habit", "archive_habit", "delete_habit"):
+        postgres_app.view_functions[f"habits.{endpoint}"] = None
+
+    with TestClient(create_asgi_app(postgres_app)) as client:
+        start = threading.Barrier(8)
+
+        def create(i):
+            start.wait()
+            return client.post("/api/habits/", headers=headers, json={"name": f"Async {i}"})
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            created = [rv.status_code for rv in pool.map(create, range(8))]
+        assert sorted(created) == [200] * 3 + [400] * 5
+
+        habit_ids = [h["id"] for h in client.get("/api/habits/", headers=headers).json()]
+        assert client.post(f"/api/habits/{habit_ids[0]}/archive", headers=headers).status_code == 200
+        assert client.delete(f"/api/habits/{habit_ids[1]}", headers=headers).status_code == 200
+
+    with postgres_app.app_context():
+        counts = db.session.execute(
+            text("SELECT active_count, total_count FROM user_habit_counters")
+        ).all()
+    assert counts == [(1, 2)]
@@ -0,0 +1,118 @@
+import random
+from datetime import date, datetime, time, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.extensions import db
+from app.models.log import HabitLog
+from app.models.reminder import HabitReminder
+from app.reminders import PushSender, ReminderScheduler, TimingWheel, next_due_at
+from tests.helpers import create_habit
+
+MONDAY = date(2026, 3, 2)
+
+
+class RecordingSender(PushSender):
+    def __init__(self, app=None):
+        super().__init__(app)
+        self.sent = []
+
+    def send(self, messages):
+        self.sent.extend(messages)
+
+
+def _habit(mask=0b1111111, start=MONDAY, pauses=()):
+    return SimpleNamespace(start_date=start, weekday_mask=mask, pauses=list(pauses))
+
+
+def _pause(start, end):
+    return SimpleNamespace(start_date=start, end_date=end)
+
+
+@pytest.mark.unit
+def test_timing_wheel_fires_each_item_on_its_tick():
+    rng = random.Random(7)
+    wheel = TimingWheel(tick=1, slots=(8, 4, 3), start=10)
+    due = {}
+    for i in range(500):
+        due[i] = 10 + rng.randint(0, 400)  # well past the 96-tick wheel range
+        wheel.schedule(due[i], i)
+
+    for now in range(10, 420):
+        for item in wheel.advance(now):
+            assert due.pop(item) == now
+    assert not due and len(wheel) == 0
+
+
+@pytest.mark.unit
+def test_next_due_at_follows_weekdays_pauses_and_timezone():
+    reminder = SimpleNamespace(time_of_day=time(8, 0), timezone="UTC")
+    after = datetime(2026, 3, 2, 9, 0)  # Monday, after today's 08:00
+
+    assert next_due_at(_habit(), reminder, after) == datetime(2026, 3, 3, 8, 0)
+    weekly = _habit(mask=1 << 4)  # Fridays
+    assert next_due_at(weekly, reminder, after) == datetime(2026, 3, 6, 8, 0)
+
+    paused = _habit(pauses=[_pause(date(2026, 3, 3), date(2026, 3, 9))])
+    assert next_due_at(paused, reminder, after) == datetime(2026, 3, 10, 8, 0)
+    archived = _habit(pauses=[_pause(date(2026, 3, 1), None)])
+    assert next_due_at(archived, reminder, after) is None
+
+    tokyo = SimpleNamespace(time_of_day=time(8, 0), timezone="Asia/Tokyo")
+    assert next_due_at(_habit(), tokyo, after) == datetime(2026, 3, 2, 23, 0)
+
+
+@pytest.mark.integration
+def test_set_and_delete_reminder(client, auth_headers):
+    headers = auth_headers()
+    habit_id = create_habit(client, headers, name="Remind me").get_json()["habit"]["id"]
+
+    rv = client.put(
+        f"/api/habits/{habit_id}/reminder",
+        json={"time": "07:30", "timezone": "Europe/London"},
+        headers=headers,
+    )
+    assert rv.status_code == 200
+    reminder = rv.get_json()["reminder"]
+    assert reminder["time"] == "07:30" and reminder["next_due_at"]
+
+    bad = client.put(
+        f"/api/habits/{habit_id}/reminder", json={"time": "7pm"}, headers=headers
+    )
+    assert bad.get_json()["error"] == "time must be HH:MM"
+    bad = client.put(
+        f"/api/habits/{habit_id}/reminder",
+        json={"time": "07:30", "timezone": "Mars/Base"},
+        headers=headers,
+    )
+    assert bad.get_json()["error"] == "Invalid timezone"
+
+    assert len(client.get("/api/habits/reminders", headers=headers).get_json()) == 1
+    assert client.delete(f"/api/habits/{habit_id}/reminder", headers=headers).status_code == 200
+    assert client.get("/api/habits/reminders", headers=headers).get_json() == []
+
+
+@pytest.mark.integration
+def test_scheduler_skips_logged_habits_and_advances_due_times(client, auth_headers, app):
+    headers = auth_headers()
+    start = MONDAY.isoformat()
+    logged_id = create_habit(client, headers, name="Done", start_date=start).get_json()["habit"]["id"]
+    pending_id = create_habit(client, headers, name="Todo", start_date=start).get_json()["habit"]["id"]
+    for habit_id in (logged_id, pending_id):
+        client.put(f"/api/habits/{habit_id}/reminder", json={"time": "08:00"}, headers=headers)
+
+    due = datetime(2026, 3, 2, 8, 0)
+    with app.app_context():
+        HabitReminder.query.update({"next_due_at": due})
+        db.session.add(HabitLog(habit_id=logged_id, date=MONDAY))
+        db.session.commit()
+
+        sender = RecordingSender()
+        scheduler = ReminderScheduler(app, sender=sender)
+        assert scheduler.tick(now=due - timedelta(seconds=30)) == 0
+        assert scheduler.tick(now=due + timedelta(seconds=1)) == 1
+        assert [(m.habit_id, m.habit_name) for m in sender.sent] == [(pending_id, "Todo")]
+
+        next_due = {r.habit_id: r.next_due_at for r in HabitReminder.query}
+        assert next_due == {logged_id: due + timedelta(days=1), pending_id: due + timedelta(days=1)}
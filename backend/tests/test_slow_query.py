@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.extensions import db, slow_query_log
+from app.utils.slow_query import normalize_sql, parameter_shape
+from tests.helpers import create_habit
+
+
+@pytest.mark.unit
+def test_normalize_sql_collapses_literals_and_in_lists():
+    sql = """
+        SELECT habit_log.habit_id FROM habit_log
+        WHERE habit_log.habit_id IN (?, ?, ?) AND habit_log.date >= '2026-01-01' LIMIT 10
+    """
+    assert normalize_sql(sql) == (
+        "SELECT habit_log.habit_id FROM habit_log "
+        "WHERE habit_log.habit_id IN (?, ...) AND habit_log.date >= ? LIMIT ?"
+    )
+    assert normalize_sql("SELECT %(param_1)s::date") == "SELECT ?::date"
+
+
+@pytest.mark.unit
+def test_parameter_shape_reports_types_not_values():
+    assert parameter_shape({"user_id": 5, "name": "secret"}) == {"user_id": "int", "name": "str"}
+    assert parameter_shape([(1, "a"), (2, "b")], executemany=True) == {
+        "rows": 2,
+        "row": ["int", "str"],
+    }
+
+
+@pytest.mark.integration
+def test_slow_queries_are_recorded_with_endpoint_and_user(client, auth_headers, app, monkeypatch):
+    headers = auth_headers()
+    create_habit(client, headers, name="Slow")
+
+    slow_query_log.clear()
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 0.0)
+    client.get("/api/habits/", headers=headers)
+    monkeypatch.setattr(slow_query_log, "threshold_ms", 250.0)
+
+    entries = slow_query_log.entries()
+    assert entries
+    entry = entries[0]
+    assert entry["endpoint"] == "habits.list_habits"
+    assert entry["user_id"] is not None
+    assert entry["sql"].startswith("SELECT")
+    assert entry["explain"] is None
+
+
+@pytest.mark.integration
+def test_failed_statements_do_not_leave_timers_behind(app):
+    with app.app_context(), db.engine.connect() as conn:
+        for _ in range(3):
+            with pytest.raises(OperationalError):
+                conn.execute(text("SELECT * FROM no_such_table"))
+        conn.execute(text("SELECT 1"))
+        assert conn.info.get("slow_query_start") == []
+
+
+@pytest.mark.integration
+def test_slow_query_endpoint_is_admin_only(client, auth_headers, app):
+    headers = auth_headers()
+    forbidden = client.get("/api/admin/slow-queries", headers=headers)
+    assert forbidden.status_code == 403
+
+    app.config["ADMIN_USER_IDS"] = {"1"}
+    allowed = client.get("/api/admin/slow-queries", headers=headers)
+    assert allowed.status_code == 200
+    body = allowed.get_json()
+    assert isinstance(body["entries"], list)
+    assert body["threshold_ms"] == 250.0
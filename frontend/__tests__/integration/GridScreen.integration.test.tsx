@@ -2,10 +2,11 @@ import { fireEvent, render, waitFor } from "@testing-library/react-native";
 import React from "react";
 
 import GridScreen from "../../src/screens/GridScreen";
-import { getHabits } from "../../lib/api";
+import { getHabitsPage } from "../../lib/api";
+import { HABITS_PER_PAGE } from "../../src/constants/constants";
 
 jest.mock("../../lib/api", () => ({
-  getHabits: jest.fn(),
+  getHabitsPage: jest.fn(),
 }));
 
 jest.mock("react-native-toast-message", () => ({
@@ -34,9 +35,9 @@ describe("GridScreen integration", () => {
   });
 
   it("retries after load failure", async () => {
-    (getHabits as jest.Mock)
+    (getHabitsPage as jest.Mock)
       .mockRejectedValueOnce(new Error("offline"))
-      .mockResolvedValueOnce([]);
+      .mockResolvedValueOnce({ habits: [], next_after: null });
 
     const screen = render(<GridScreen />);
 
@@ -47,14 +48,15 @@ describe("GridScreen integration", () => {
     fireEvent.press(screen.getByText("Retry"));
 
     await waitFor(() => {
-      expect(getHabits).toHaveBeenCalledTimes(2);
+      expect(getHabitsPage).toHaveBeenCalledTimes(2);
     });
   });
 
   it("renders grid with data", async () => {
-    (getHabits as jest.Mock).mockResolvedValueOnce([
-      { id: 1, name: "Habit", start_date: "2026-03-01", frequency: "DAILY" },
-    ]);
+    (getHabitsPage as jest.Mock).mockResolvedValueOnce({
+      habits: [{ id: 1, name: "Habit" }],
+      next_after: null,
+    });
 
     const screen = render(<GridScreen />);
 
@@ -62,4 +64,40 @@ describe("GridScreen integration", () => {
       expect(screen.getByText("weekly-grid")).toBeTruthy();
     });
   });
+
+  it("loads one page first and the next one on demand", async () => {
+    const page = (from: number) =>
+      Array.from({ length: HABITS_PER_PAGE }).map((_, idx) => ({
+        id: from + idx,
+        name: `Habit ${from + idx}`,
+      }));
+    (getHabitsPage as jest.Mock)
+      .mockResolvedValueOnce({ habits: page(1), next_after: HABITS_PER_PAGE })
+      .mockResolvedValueOnce({
+        habits: page(HABITS_PER_PAGE + 1),
+        next_after: null,
+      });
+
+    const screen = render(<GridScreen />);
+
+    await waitFor(() => {
+      expect(screen.getByText("Habit 1")).toBeTruthy();
+    });
+    expect(getHabitsPage).toHaveBeenCalledWith({
+      limit: HABITS_PER_PAGE,
+      fields: ["name"],
+    });
+
+    fireEvent.press(screen.getByText("→"));
+
+    await waitFor(() => {
+      expect(screen.getByText(`Habit ${HABITS_PER_PAGE + 1}`)).toBeTruthy();
+    });
+    expect(getHabitsPage).toHaveBeenLastCalledWith({
+      limit: HABITS_PER_PAGE,
+      after: HABITS_PER_PAGE,
+      fields: ["name"],
+    });
+    expect(screen.queryByText("→")).toBeNull();
+  });
 });
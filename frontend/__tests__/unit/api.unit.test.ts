@@ -1,4 +1,13 @@
-import api, { getHabitLogSummary, getHabits } from "../../lib/api";
+import api, {
+  bulkUpdateHabits,
+  getHabitLogSummary,
+  getHabits,
+  getWeekGrid,
+} from "../../lib/api";
+
+jest.mock("expo-secure-store", () => ({
+  getItemAsync: jest.fn().mockResolvedValue(null),
+}));
 
 describe("api helpers", () => {
   afterEach(() => {
@@ -18,6 +27,56 @@ describe("api helpers", () => {
     expect(result["2026-03-02"]).toEqual(new Set([3]));
   });
 
+  it("decodes bitmap log summaries into Sets", async () => {
+    jest.spyOn(api, "get").mockResolvedValueOnce({
+      data: {
+        encoding: "bitmap",
+        axis: "day",
+        habit_ids: [10, 20, 30],
+        days: { "2026-03-02": "BQ==", "2026-03-03": "Ag==" },
+      },
+    } as any);
+
+    const result = await getHabitLogSummary("2026-03");
+    expect(result["2026-03-02"]).toEqual(new Set([10, 30]));
+    expect(result["2026-03-03"]).toEqual(new Set([20]));
+  });
+
+  it("sends bulk actions in one request and returns per-habit results", async () => {
+    const results = [
+      { id: 1, status: "deleted" },
+      { id: 2, status: "not_found" },
+    ];
+    const spy = jest
+      .spyOn(api, "post")
+      .mockResolvedValueOnce({ data: { action: "delete", results } } as any);
+
+    await expect(bulkUpdateHabits("delete", [1, 2])).resolves.toEqual(results);
+    expect(spy).toHaveBeenCalledWith("/habits/bulk", {
+      action: "delete",
+      habit_ids: [1, 2],
+    });
+  });
+
+  it("decodes week grid rows into per-habit cell states", async () => {
+    const spy = jest.spyOn(api, "get").mockResolvedValueOnce({
+      data: {
+        week_start: "2026-03-02",
+        days: 3,
+        states: ["inactive", "not_scheduled", "paused", "done", "missed", "pending", "future"],
+        habit_ids: [7, 9],
+        rows: ["346", "012"],
+      },
+    } as any);
+
+    const grid = await getWeekGrid("2026-03-02", 3);
+    expect(spy).toHaveBeenCalledWith("/habits/week-grid", {
+      params: { week_start: "2026-03-02", days: 3 },
+    });
+    expect(grid.cells[7]).toEqual(["done", "missed", "future"]);
+    expect(grid.cells[9]).toEqual(["inactive", "not_scheduled", "paused"]);
+  });
+
   it("passes date and timezone query params for getHabits", async () => {
     const spy = jest.spyOn(api, "get").mockResolvedValueOnce({ data: [] } as any);
     await getHabits("2026-03-03", "Europe/London");
@@ -26,4 +85,28 @@ describe("api helpers", () => {
       params: { date: "2026-03-03", tz: "Europe/London" },
     });
   });
+
+  it("echoes the latest Last-Write marker on later requests", async () => {
+    const sent: (string | undefined)[] = [];
+    const adapter = api.defaults.adapter;
+    api.defaults.adapter = async (config: any) => {
+      sent.push(config.headers["Last-Write"]);
+      const written = config.method === "post";
+      return {
+        data: {},
+        status: 200,
+        statusText: "OK",
+        headers: written ? { "last-write": "1.signed" } : {},
+        config,
+      };
+    };
+    try {
+      await api.get("/habits");
+      await api.post("/habits/1/log");
+      await api.get("/habits");
+    } finally {
+      api.defaults.adapter = adapter;
+    }
+    expect(sent).toEqual([undefined, undefined, "1.signed"]);
+  });
 });
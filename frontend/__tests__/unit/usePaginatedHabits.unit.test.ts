@@ -28,4 +28,11 @@ describe("usePaginatedHabits", () => {
     expect(result.current.habitsToDisplay).toHaveLength(2);
     expect(result.current.habitsToDisplay[0].id).toBe(HABITS_PER_PAGE + 1);
   });
+
+  it("counts a page past the loaded habits when more are on the server", () => {
+    const firstPage = habits.slice(0, HABITS_PER_PAGE);
+    const { result } = renderHook(() => usePaginatedHabits(firstPage, 0, true));
+    expect(result.current.pageCount).toBe(2);
+    expect(result.current.habitsToDisplay).toHaveLength(HABITS_PER_PAGE);
+  });
 });
@@ -15,17 +15,42 @@ const api = axios.create({
   withCredentials: true,
 });
 
+// Signed marker of our latest write; any server worker that sees it on a
+// read serves it from the primary instead of a lagging replica.
+let lastWrite: string | null = null;
+
 api.interceptors.request.use(
   async (config) => {
     const token = await SecureStore.getItemAsync("token");
     if (token) {
       config.headers["Authorization"] = `Bearer ${token}`;
     }
+    if (lastWrite) {
+      config.headers["Last-Write"] = lastWrite;
+    }
     return config;
   },
   (error) => Promise.reject(error)
 );
 
+const rememberLastWrite = (headers: any) => {
+  const marker = headers?.["last-write"];
+  if (marker) {
+    lastWrite = marker;
+  }
+};
+
+api.interceptors.response.use(
+  (response) => {
+    rememberLastWrite(response.headers);
+    return response;
+  },
+  (error) => {
+    rememberLastWrite(error?.response?.headers);
+    return Promise.reject(error);
+  }
+);
+
 // Types
 export type HabitPause = {
   start_date: string;
@@ -47,6 +72,11 @@ export type ArchivedHabit = Habit & {
   pause_start_date: string;
 };
 
+export type HabitPage = {
+  habits: Habit[];
+  next_after: number | null;
+};
+
 export type CalendarSummary = {
   [date: string]: {
     status: "complete" | "partial" | "incomplete" | "inactive" | "future";
@@ -64,6 +94,28 @@ export const getHabits = async (
   return res.data;
 };
 
+export type HabitField =
+  | "name"
+  | "start_date"
+  | "frequency"
+  | "days_of_week"
+  | "pauses";
+
+export const getHabitsPage = async ({
+  limit,
+  after,
+  fields,
+}: {
+  limit: number;
+  after?: number | null;
+  fields?: HabitField[];
+}): Promise<HabitPage> => {
+  const res = await api.get(`/habits`, {
+    params: { limit, after: after ?? undefined, fields: fields?.join(",") },
+  });
+  return res.data;
+};
+
 export const getHabitSummary = async (
   date: string,
   tz?: string
@@ -72,11 +124,38 @@ export const getHabitSummary = async (
   return res.data;
 };
 
+type BitmapLogSummary = {
+  encoding: "bitmap";
+  habit_ids: number[];
+  days: Record<string, string>;
+};
+
+// Bit i of each base64 little-endian bitset marks habit_ids[i] as logged.
+export const decodeBitmapLogSummary = (
+  data: BitmapLogSummary
+): Record<string, Set<number>> => {
+  const result: Record<string, Set<number>> = {};
+  for (const date in data.days) {
+    const bytes = atob(data.days[date]);
+    const ids = new Set<number>();
+    for (let i = 0; i < data.habit_ids.length; i++) {
+      if ((bytes.charCodeAt(i >> 3) >> (i & 7)) & 1) ids.add(data.habit_ids[i]);
+    }
+    result[date] = ids;
+  }
+  return result;
+};
+
 export const getHabitLogSummary = async (
   month: string
 ): Promise<Record<string, Set<number>>> => {
-  const res = await api.get(`/habits/log-summary?month=${month}`);
+  const res = await api.get(
+    `/habits/log-summary?month=${month}&encoding=bitmap`
+  );
   const data = res.data;
+  if (data?.encoding === "bitmap") {
+    return decodeBitmapLogSummary(data);
+  }
 
   const result: Record<string, Set<number>> = {};
   for (const date in data) {
@@ -114,6 +193,96 @@ export const unarchiveHabit = async (habitId: number) => {
   await api.post(`/habits/${habitId}/unarchive`);
 };
 
+export type HabitLogPage = {
+  habit_id: number;
+  dates: string[];
+  next_before: string | null;
+};
+
+// Newest first; pass next_before back as `before` to page further back.
+export const getHabitLogs = async (
+  habitId: number,
+  before?: string,
+  limit?: number
+): Promise<HabitLogPage> => {
+  const res = await api.get(`/habits/${habitId}/logs`, {
+    params: { before, limit },
+  });
+  return res.data;
+};
+
+export type ServerReminder = {
+  habit_id: number;
+  time: string;
+  timezone: string;
+  enabled: boolean;
+  next_due_at: string | null;
+};
+
+export const setHabitReminderOnServer = async (
+  habitId: number,
+  time: string,
+  timezone: string,
+  enabled = true
+): Promise<ServerReminder> => {
+  const res = await api.put(`/habits/${habitId}/reminder`, {
+    time,
+    timezone,
+    enabled,
+  });
+  return res.data.reminder;
+};
+
+export const deleteHabitReminderOnServer = async (habitId: number) => {
+  await api.delete(`/habits/${habitId}/reminder`);
+};
+
+export type GridCellState =
+  | "inactive"
+  | "not_scheduled"
+  | "paused"
+  | "done"
+  | "missed"
+  | "pending"
+  | "future";
+
+export type WeekGrid = {
+  weekStart: string;
+  days: number;
+  // cells[habitId][i] is the state of that habit on weekStart + i days.
+  cells: Record<number, GridCellState[]>;
+};
+
+export const getWeekGrid = async (
+  weekStart: string,
+  days = 7
+): Promise<WeekGrid> => {
+  const res = await api.get(`/habits/week-grid`, {
+    params: { week_start: weekStart, days },
+  });
+  const { states, habit_ids, rows } = res.data;
+  const cells: Record<number, GridCellState[]> = {};
+  habit_ids.forEach((id: number, i: number) => {
+    cells[id] = Array.from(rows[i] as string, (code) => states[Number(code)]);
+  });
+  return { weekStart: res.data.week_start, days: res.data.days, cells };
+};
+
+export type BulkHabitAction = "archive" | "unarchive" | "delete";
+
+export type BulkHabitResult = {
+  id: number;
+  status: string;
+};
+
+export const bulkUpdateHabits = async (
+  action: BulkHabitAction,
+  habitIds: number[]
+): Promise<BulkHabitResult[]> => {
+  const res = await api.post(`/habits/bulk`, { action, habit_ids: habitIds });
+  return res.data.results;
+};
+
 export const createHabit = async (
   name: string,
   start_date: string,
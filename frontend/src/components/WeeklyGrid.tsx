@@ -1,17 +1,8 @@
 // components/WeeklyGrid.tsx
-import {
-  eachDayOfInterval,
-  endOfMonth,
-  format,
-  isBefore,
-  isAfter,
-  startOfMonth,
-  parseISO,
-} from "date-fns";
+import { eachDayOfInterval, endOfMonth, format, startOfMonth } from "date-fns";
 import React, { useEffect, useState } from "react";
 import { ScrollView, StyleSheet, Text, View } from "react-native";
-import { getHabitLogSummary, Habit } from "../../lib/api";
-import { isApplicable } from "../utils/isApplicable";
+import { getWeekGrid, GridCellState, Habit } from "../../lib/api";
 import { usePaginatedHabits } from "../hooks/usePaginatedHabits";
 import GridCell from "./GridCell";
 import Toast from "react-native-toast-message";
@@ -31,21 +22,21 @@ export default function WeeklyGrid({
   cellSize,
   dayLabelWidth,
 }: WeeklyGridProps) {
-  const [completedLogs, setCompletedLogs] = useState<
-    Record<string, Set<number>>
-  >({});
-  const today = new Date();
+  const [cells, setCells] = useState<Record<number, GridCellState[]>>({});
   const monthStart = startOfMonth(month);
   const monthEnd = endOfMonth(month);
   const monthDays = eachDayOfInterval({ start: monthStart, end: monthEnd });
 
   const { habitsToDisplay } = usePaginatedHabits(habits, currentPage);
 
-  const fetchHabitLogSummary = async () => {
+  // The server resolves every cell's state in one pass over the month.
+  const fetchGrid = async () => {
     try {
-      const monthStr = format(month, "yyyy-MM");
-      const data = await getHabitLogSummary(monthStr);
-      setCompletedLogs(data);
+      const grid = await getWeekGrid(
+        format(monthStart, "yyyy-MM-dd"),
+        monthDays.length
+      );
+      setCells(grid.cells);
     } catch (err: any) {
       Toast.show({
         type: "error",
@@ -59,7 +50,7 @@ export default function WeeklyGrid({
 
   useEffect(() => {
     if (!habits.length) return;
-    fetchHabitLogSummary();
+    fetchGrid();
   }, [habits, month]);
 
   return (
@@ -85,46 +76,26 @@ export default function WeeklyGrid({
 
           <ScrollView horizontal scrollEnabled={false}>
             <View>
-              {monthDays.map((day) => {
+              {monthDays.map((day, dayIndex) => {
                 const iso = format(day, "yyyy-MM-dd");
                 return (
                   <View key={iso} style={styles.row}>
                     {habitsToDisplay.map((habit) => {
-                      const completed = completedLogs[iso]?.has(habit.id);
-
-                      const inFuture = isAfter(day, today);
-                      const startDate = parseISO(habit.start_date);
-                      const beforeStart = isBefore(day, startDate);
-
-                      const inPause =
-                        habit.pauses?.some((p) => {
-                          const s = parseISO(p.start_date);
-                          const e = p.end_date ? parseISO(p.end_date) : null;
-                          return day >= s && (!e || day <= e);
-                        }) ?? false;
-
-                      const scheduleApplicable = isApplicable(habit, day);
-
+                      const state = cells[habit.id]?.[dayIndex];
                       const paused =
-                        !inFuture &&
-                        (inPause || (!beforeStart && !scheduleApplicable));
-
+                        state === "paused" || state === "not_scheduled";
                       const applicable =
-                        !inFuture &&
-                        !beforeStart &&
-                        !inPause &&
-                        scheduleApplicable;
-
-                      let status:
-                        | "complete"
-                        | "missed"
-                        | "unlogged"
-                        | undefined;
-                      if (applicable) {
-                        if (completed) status = "complete";
-                        else
-                          status = isBefore(day, today) ? "missed" : "unlogged";
-                      }
+                        state === "done" ||
+                        state === "missed" ||
+                        state === "pending";
+                      const status =
+                        state === "done"
+                          ? "complete"
+                          : state === "missed"
+                          ? "missed"
+                          : state === "pending"
+                          ? "unlogged"
+                          : undefined;
 
                       return (
                         <GridCell
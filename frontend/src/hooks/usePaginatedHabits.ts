@@ -3,8 +3,14 @@ import { useMemo } from "react";
 import { Habit } from "../../lib/api";
 import { HABITS_PER_PAGE } from "../constants/constants";
 
-export function usePaginatedHabits(habits: Habit[], currentPage: number) {
-  const pageCount = Math.ceil(habits.length / HABITS_PER_PAGE);
+// hasMore counts one page past the loaded habits, fetched when it is reached.
+export function usePaginatedHabits(
+  habits: Habit[],
+  currentPage: number,
+  hasMore = false
+) {
+  const loadedPages = Math.ceil(habits.length / HABITS_PER_PAGE);
+  const pageCount = hasMore ? loadedPages + 1 : loadedPages;
   const habitsToDisplay = useMemo(() => {
     const start = currentPage * HABITS_PER_PAGE;
     const end = start + HABITS_PER_PAGE;
@@ -8,9 +8,10 @@ import {
   Text,
   View,
 } from "react-native";
-import { getHabits, Habit } from "../../lib/api";
+import { getHabitsPage, Habit, HabitField } from "../../lib/api";
 import HeaderNav from "../components/HeaderNav";
 import WeeklyGrid from "../components/WeeklyGrid";
+import { HABITS_PER_PAGE } from "../constants/constants";
 import { getLayoutConstants } from "../constants/layout";
 import { usePaginatedHabits } from "../hooks/usePaginatedHabits";
 import LoadingSpinner from "../components/LoadingSpinner";
@@ -24,9 +25,13 @@ const gridLegendData = [
   { label: "Inactive", color: "#e5e5e5" },
 ];
 
+// Cell states come from the week grid; the header only needs names.
+const GRID_FIELDS: HabitField[] = ["name"];
+
 export default function GridScreen() {
   const [selectedMonth, setSelectedMonth] = useState(new Date());
   const [habits, setHabits] = useState<Habit[]>([]);
+  const [nextAfter, setNextAfter] = useState<number | null>(null);
   const [currentPage, setCurrentPage] = useState(0);
   const [refreshing, setRefreshing] = useState(false);
   const [loading, setLoading] = useState(false);
@@ -35,17 +40,25 @@ export default function GridScreen() {
 
   const { pageCount, habitsToDisplay } = usePaginatedHabits(
     habits,
-    currentPage
+    currentPage,
+    nextAfter !== null
   );
   const { cellSize, dayLabelWidth } = getLayoutConstants(
     habitsToDisplay.length
   );
 
+  // First paint loads one page; a refresh reloads the pages already seen.
   const fetchHabits = async (isInitial = false) => {
     if (isInitial) setLoading(true);
     try {
-      const data = await getHabits();
-      setHabits(data);
+      const pages = isInitial ? 1 : currentPage + 1;
+      const page = await getHabitsPage({
+        limit: pages * HABITS_PER_PAGE,
+        fields: GRID_FIELDS,
+      });
+      setHabits(page.habits);
+      setNextAfter(page.next_after);
+      if (isInitial) setCurrentPage(0);
       setError(false);
     } catch (err: any) {
       setError(true);
@@ -81,8 +94,30 @@ export default function GridScreen() {
     if (currentPage > 0) setCurrentPage((p) => p - 1);
   };
 
-  const handleRight = () => {
-    if (currentPage < pageCount - 1) setCurrentPage((p) => p + 1);
+  const fetchNextPage = async () => {
+    try {
+      const page = await getHabitsPage({
+        limit: HABITS_PER_PAGE,
+        after: nextAfter,
+        fields: GRID_FIELDS,
+      });
+      setHabits((prev) => [...prev, ...page.habits]);
+      setNextAfter(page.next_after);
+      return true;
+    } catch (err: any) {
+      Toast.show({
+        type: "error",
+        text1: "Error loading habits",
+        text2: err.response?.data?.error || "Server unreachable.",
+      });
+      return false;
+    }
+  };
+
+  const handleRight = async () => {
+    if (currentPage >= pageCount - 1) return;
+    const loaded = (currentPage + 1) * HABITS_PER_PAGE < habits.length;
+    if (loaded || (await fetchNextPage())) setCurrentPage((p) => p + 1);
   };
 
   return (